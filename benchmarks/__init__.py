@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# 性能基准测试脚本集合（不参与程序运行，也不会被打包进exe）
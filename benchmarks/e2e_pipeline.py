@@ -0,0 +1,387 @@
+# benchmarks/e2e_pipeline.py
+# 端到端流程基准：对 50 / 500 / 5000 行的表格运行真实处理流程
+# （加载表格 → 四平台提取 → 交叉兜底 → Twitter → 写入表格 → 保存），流量来自本地模拟服务器或录制的磁带。
+# 子进程与 main.py 调用同一组函数（src/targets.py 的 load_targets / process_targets / write_targets / save_targets），
+# 只是不做交互式配置；表格中重复的原名与 main.py 一样只提取一次。
+#
+# 用法：
+#   python -m benchmarks.e2e_pipeline                                  # 模拟服务器，50 和 500 行
+#   python -m benchmarks.e2e_pipeline --rows 50,500,5000 --latency 50-200 --rate-limit 20
+#   python -m benchmarks.e2e_pipeline --source replay --workbook mzzb.xlsx --cassettes mzzb_cache/cassettes
+#   python -m benchmarks.e2e_pipeline --json e2e.json --baseline e2e_baseline.json --max-regression 0.2
+#   python -m benchmarks.e2e_pipeline --rows 200 --profile sample --profile-dir profiles   # 附带性能剖析
+#   python -m benchmarks.e2e_pipeline --rows 500 --rate-limit 20 --row-workers 8           # 多行并发 + 自适应并发窗口
+#
+# 每种行数在独立子进程中运行（峰值内存、缓存互不影响）。输出指标：
+#   rows_per_sec、row_latency_ms（p50 / p95 / max）、requests_per_row、peak_rss_mb，
+#   以及各阶段耗时 stages_s（load / extract / fallback / twitter / write / save；fallback 和 twitter 与 extract 并行，耗时已包含在 extract 中）
+# Twitter配置需要交互输入，基准中按“配置未成功”处理，twitter 阶段只统计判断开销。
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+# 允许直接以脚本方式运行
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+DEFAULT_ROWS = "50,500"
+TEMPLATE_PATH = os.path.join(ROOT_DIR, "mzzb.xlsx")
+STAGES = ("load", "extract", "fallback", "twitter", "write", "save")
+
+# 指标 -> 是否越大越好（用于基线比较）
+COMPARED_METRICS = {
+    "rows_per_sec": True,
+    "row_latency_p95_ms": False,
+    "requests_per_row": False,
+    "peak_rss_mb": False,
+    "save_s": False,
+}
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """线性插值百分位数（q取0~100）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前进程的峰值常驻内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def build_workbook(titles: List[str], rows: int, path: str, year: int, template: str = TEMPLATE_PATH) -> None:
+    """
+    基于表格模板生成压测表格：原名列依次填入标题（不足时循环使用）
+    Args:
+        titles: 标题列表
+        rows: 数据行数
+        path: 输出路径
+        year: 目标年份（写入A1，程序从A1读取目标年份）
+        template: 表格模板
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(template)
+    ws = wb.active
+    ws["A1"] = f"{year}年XX月新番X期评分（基准测试）"
+    # 清空模板中已有的数据行（保留第3行的公式）
+    for row in ws.iter_rows(min_row=3, max_row=max(ws.max_row, 3)):
+        for cell in row:
+            if cell.value is not None and not str(cell.value).startswith("="):
+                cell.value = None
+    for offset in range(rows):
+        ws.cell(row=offset + 3, column=1, value=titles[offset % len(titles)])
+    wb.save(path)
+
+
+def _read_titles(workbook: str) -> List[str]:
+    """读取已有表格的原名列"""
+    from src.pipeline import load_pending_rows
+
+    return [str(name) for _, name in load_pending_rows(workbook)]
+
+
+# ----------------------------------------------------------------------
+# 子进程：对一个表格运行完整流程
+# ----------------------------------------------------------------------
+
+def run_pipeline(workbook: str, log_path: str, log_level: str = "INFO") -> Dict:
+    """
+    对表格运行完整流程并返回计时结果（在子进程中调用）
+    Args:
+        workbook: 表格路径（会被覆盖保存）
+        log_path: 日志文件路径
+        log_level: 日志级别
+    Returns:
+        dict: 计时结果
+    """
+    import logging
+
+    logging.basicConfig(level=getattr(logging, log_level.upper(), logging.INFO), filename=log_path,
+                        filemode="w", encoding="utf-8", format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from src.catalog import save_id_mapping, start_season_prefetch
+    from src.targets import load_targets, merge_pending_rows, process_targets, save_targets, write_targets
+    from utils import date_error
+    from utils.core.global_variables import get_desired_year
+    from utils.core.metrics import get_metrics
+    from utils.core.profiling import get_profile_mode, start_profiling, stop_profiling
+    from utils.network import get_replay_stats
+
+    stages = dict.fromkeys(STAGES, 0.0)
+
+    # 父进程通过 MZZB_PROFILE / MZZB_PROFILE_OUTPUT 传入剖析配置
+    profile_mode = get_profile_mode([])
+    if profile_mode:
+        start_profiling(profile_mode)
+
+    start = time.perf_counter()
+    # 基准表格由模板或用户表格生成，不检查模板版本
+    targets = load_targets([workbook], None)
+    date_error.clear()
+    pending_rows = merge_pending_rows(targets)
+    stages["load"] = time.perf_counter() - start
+    start_season_prefetch(len(pending_rows))
+
+    latencies = []
+    results = {}
+    extract_start = time.perf_counter()
+    # 行数并发由父进程通过 MZZB_ROW_WORKERS 传入；基准不加行间延时
+    for original_name, anime, elapsed in process_targets(pending_rows, twitter_config_success=False,
+                                                         timings=stages, row_delay=0):
+        latencies.append(elapsed)
+        results[original_name] = anime
+    rows_wall = time.perf_counter() - extract_start
+
+    start = time.perf_counter()
+    write_targets(targets, results, get_desired_year())
+    stages["write"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    save_id_mapping()
+    save_targets(targets)
+    stages["save"] = time.perf_counter() - start
+
+    profile_files = stop_profiling() if profile_mode else []
+
+    return {
+        "rows": sum(len(target.pending_rows) for target in targets),
+        "titles": len(pending_rows),
+        "rows_wall_s": round(rows_wall, 3),
+        "row_latencies_s": latencies,
+        "stages_s": {name: round(value, 4) for name, value in stages.items()},
+        "peak_rss_mb": peak_rss_mb(),
+        "replay_stats": get_replay_stats(),
+        "metrics": get_metrics().to_dict(),
+        "profile_files": profile_files,
+    }
+
+
+def _child_main(args) -> int:
+    result = run_pipeline(args.workbook, args.log, args.log_level)
+    with open(args.child_output, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    return 0
+
+
+# ----------------------------------------------------------------------
+# 父进程：准备流量来源和表格，汇总结果
+# ----------------------------------------------------------------------
+
+def summarize_run(raw: Dict, requests_total: Optional[int]) -> Dict:
+    """把子进程的原始结果整理为报告指标"""
+    rows = raw["rows"] or 0
+    latencies_ms = [value * 1000 for value in raw["row_latencies_s"]]
+    rows_wall = raw["rows_wall_s"]
+    return {
+        "rows": rows,
+        "rows_per_sec": round(rows / rows_wall, 2) if rows and rows_wall > 0 else None,
+        "row_latency_p50_ms": _round(percentile(latencies_ms, 50)),
+        "row_latency_p95_ms": _round(percentile(latencies_ms, 95)),
+        "row_latency_max_ms": _round(max(latencies_ms) if latencies_ms else None),
+        "requests_per_row": round(requests_total / rows, 2) if requests_total is not None and rows else None,
+        "peak_rss_mb": raw["peak_rss_mb"],
+        "save_s": raw["stages_s"]["save"],
+        "stages_s": raw["stages_s"],
+        "metrics": raw.get("metrics"),
+        "profile_files": raw.get("profile_files", []),
+    }
+
+
+def _round(value: Optional[float], digits: int = 1) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+def _run_child(workbook: str, workdir: str, env: Dict[str, str], log_level: str) -> Dict:
+    """在子进程中运行一次完整流程"""
+    output = os.path.join(workdir, "result.json")
+    command = [sys.executable, "-m", "benchmarks.e2e_pipeline", "--child-output", output,
+               "--workbook", workbook, "--log", os.path.join(workdir, "pipeline.log"), "--log-level", log_level]
+    completed = subprocess.run(command, cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+                               encoding="utf-8", errors="replace", check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"基准子进程失败:\n{completed.stderr[-4000:]}")
+    with open(output, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _base_env(workdir: str) -> Dict[str, str]:
+    """子进程公共环境变量：独立的缓存目录和ID映射表，避免基准之间互相影响"""
+    env = dict(os.environ)
+    env["MZZB_CACHE_DIR"] = os.path.join(workdir, "cache")
+    env["MZZB_ID_MAPPING_FILE"] = os.path.join(workdir, "id_mapping.json")
+    env.setdefault("MAL_CLIENT_ID", "benchmark")
+    env["PYTHONIOENCODING"] = "utf-8"
+    return env
+
+
+def run_benchmark(args) -> Dict:
+    """按配置运行所有行数的基准"""
+    sizes = [int(value) for value in args.rows.split(",") if value.strip()]
+    results = {"source": args.source, "python": sys.version.split()[0], "runs": {}}
+
+    server = None
+    if args.source == "mock":
+        from benchmarks.mock_server import FaultModel, MockCatalog, MockPlatformServer, parse_latency_specs
+
+        catalog = MockCatalog(size=args.catalog_size or max(sizes), seed=args.seed, year=args.year)
+        faults = FaultModel(latency=parse_latency_specs(args.latency), rate_limit=args.rate_limit,
+                            error_rate=args.error_rate, seed=args.seed)
+        server = MockPlatformServer(catalog, faults).start()
+        titles, year = catalog.titles(), args.year
+        results["mock"] = {"catalog_size": catalog.size, "latency": args.latency, "rate_limit": args.rate_limit,
+                           "error_rate": args.error_rate}
+    else:
+        titles = _read_titles(args.workbook)
+        if not titles:
+            raise SystemExit(f"表格 {args.workbook} 中没有可用的原名")
+        from openpyxl import load_workbook
+        wb = load_workbook(args.workbook, read_only=True)
+        year = int(str(wb.active["A1"].value)[:4])
+        wb.close()
+
+    try:
+        for size in sizes:
+            with tempfile.TemporaryDirectory(prefix=f"mzzb_e2e_{size}_") as workdir:
+                workbook = os.path.join(workdir, "bench.xlsx")
+                template = TEMPLATE_PATH if args.source == "mock" else args.workbook
+                build_workbook(titles, size, workbook, year, template=template)
+
+                env = _base_env(workdir)
+                if args.profile:
+                    env["MZZB_PROFILE"] = args.profile
+                    env["MZZB_PROFILE_OUTPUT"] = os.path.join(os.path.abspath(args.profile_dir), f"e2e_{size}")
+                if args.row_workers:
+                    env["MZZB_ROW_WORKERS"] = str(args.row_workers)
+                if server is not None:
+                    env.update(server.base_urls())
+                    server.reset_stats()
+                else:
+                    env["MZZB_HTTP_MODE"] = "replay"
+                    env["MZZB_CASSETTE_DIR"] = os.path.abspath(args.cassettes)
+                    env.setdefault("MZZB_REPLAY_LATENCY_MS", args.replay_latency)
+
+                print(f"运行 {size} 行 ...", flush=True)
+                raw = _run_child(workbook, workdir, env, args.log_level)
+
+                if server is not None:
+                    requests_total = server.stats()["total"]
+                else:
+                    stats = raw["replay_stats"]
+                    requests_total = stats.get("replayed", 0) + stats.get("missed", 0)
+                results["runs"][str(size)] = summarize_run(raw, requests_total)
+                if raw.get("profile_files"):
+                    print(f"剖析结果: {', '.join(raw['profile_files'])}", flush=True)
+    finally:
+        if server is not None:
+            server.stop()
+    return results
+
+
+def compare_with_baseline(result: Dict, baseline_path: str, max_regression: float) -> List[str]:
+    """
+    与基线结果比较
+    Returns:
+        list: 回归描述（为空表示未回归）
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for size, run in result["runs"].items():
+        base_run = baseline.get("runs", {}).get(size)
+        if not base_run:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            current, reference = run.get(metric), base_run.get(metric)
+            if current is None or not reference:
+                continue
+            if higher_is_better:
+                regressed = current < reference * (1 - max_regression)
+            else:
+                regressed = current > reference * (1 + max_regression)
+            if regressed:
+                regressions.append(f"{size} 行 {metric}: {current}（基线 {reference}，容差 {max_regression:.0%}）")
+    return regressions
+
+
+def print_report(result: Dict) -> None:
+    print("-" * 96)
+    print(f"{'行数':>6} {'行/秒':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'请求/行':>8} {'峰值内存(MB)':>12} {'保存(s)':>8}  各阶段(s)")
+    for size, run in result["runs"].items():
+        stages = " ".join(f"{name}={value:.2f}" for name, value in run["stages_s"].items())
+        print(f"{size:>6} {run['rows_per_sec'] or '-':>8} {run['row_latency_p50_ms'] or '-':>9} "
+              f"{run['row_latency_p95_ms'] or '-':>9} {run['requests_per_row'] or '-':>8} "
+              f"{run['peak_rss_mb'] or '-':>12} {run['save_s']:>8.3f}  {stages}")
+    print("-" * 96)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="端到端处理流程基准测试")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="逗号分隔的表格行数，如 50,500,5000")
+    parser.add_argument("--source", choices=("mock", "replay"), default="mock", help="流量来源：本地模拟服务器或录制的磁带")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    parser.add_argument("--baseline", help="基线JSON文件，用于回归比较")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许相对基线的最大回归比例")
+    parser.add_argument("--log-level", default="INFO", help="流程日志级别（日志写入临时目录）")
+    parser.add_argument("--profile", choices=("cprofile", "sample"), help="对每次运行进行性能剖析")
+    parser.add_argument("--profile-dir", default=".", help="剖析结果目录（文件名为 e2e_<行数>.*）")
+    parser.add_argument("--row-workers", type=int, help="同时处理的行数（默认读取 MZZB_ROW_WORKERS，即1行）")
+    mock_group = parser.add_argument_group("模拟服务器")
+    mock_group.add_argument("--catalog-size", type=int, help="虚构目录作品数（默认等于最大行数）")
+    mock_group.add_argument("--year", type=int, default=2025, help="目标年份")
+    mock_group.add_argument("--seed", type=int, default=0, help="随机种子")
+    mock_group.add_argument("--latency", action="append", default=[], help="延迟分布，格式同 mock_server --latency")
+    mock_group.add_argument("--rate-limit", type=float, default=0.0, help="每个平台每秒请求上限（0为不限）")
+    mock_group.add_argument("--error-rate", type=float, default=0.0, help="随机500的概率")
+    replay_group = parser.add_argument_group("磁带回放")
+    replay_group.add_argument("--workbook", default=TEMPLATE_PATH, help="录制时使用的表格（原名循环填满目标行数）")
+    replay_group.add_argument("--cassettes", default=os.path.join("mzzb_cache", "cassettes"), help="磁带目录")
+    replay_group.add_argument("--replay-latency", default="0", help="回放延迟，格式同 MZZB_REPLAY_LATENCY_MS")
+    # 内部参数：子进程模式
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    parser.add_argument("--log", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child_output:
+        return _child_main(args)
+
+    result = run_benchmark(args)
+    print_report(result)
+
+    exit_code = 0
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        regressions = compare_with_baseline(result, args.baseline, args.max_regression)
+        if regressions:
+            for regression in regressions:
+                print(f"❌ {regression}")
+            exit_code = 1
+        else:
+            print("✅ 未超过基线容差")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
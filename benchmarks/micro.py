@@ -0,0 +1,294 @@
+# benchmarks/micro.py
+# 微基准：使用 benchmarks/fixtures/ 下的固定样本，单独测量解析、标题匹配、评分转换、链接解析和Excel写入等CPU热点（不涉及网络）
+#
+# 用法：
+#   python -m benchmarks.micro
+#   python -m benchmarks.micro --filter filmarks --repeat 7
+#   python -m benchmarks.micro --json micro.json --baseline micro_baseline.json --max-regression 0.3
+#
+# 每个用例先自动确定循环次数（单轮约0.2秒），重复多轮后报告每次操作耗时的最小值和中位数。
+# 基准运行期间关闭日志输出，只测量计算本身。
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+# 允许直接以脚本方式运行
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+FIXTURES_DIR = os.path.join(ROOT_DIR, "benchmarks", "fixtures")
+TEMPLATE_PATH = os.path.join(ROOT_DIR, "mzzb.xlsx")
+
+
+def load_text(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_json(name: str):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _build_anime_rows(samples: dict) -> list:
+    """按样本构造 (行索引, Anime) 列表"""
+    from models import Anime
+
+    rows = []
+    for index, fields in enumerate(samples["anime_rows"]):
+        anime = Anime(fields["original_name"])
+        for key, value in fields.items():
+            setattr(anime, key, value)
+        rows.append((index, anime))
+    return rows
+
+
+def _load_filled_workbook(rows: list):
+    """加载表格模板并填入原名列（update_excel_data 按原名校验行）"""
+    from openpyxl import load_workbook
+
+    from utils import ExcelColumnHelper
+
+    wb = load_workbook(TEMPLATE_PATH)
+    ws = wb.active
+    for index, anime in rows:
+        ws.cell(row=index + 3, column=1, value=anime.original_name)
+    return ws, ExcelColumnHelper(ws)
+
+
+# ----------------------------------------------------------------------
+# 用例：每个构造函数完成准备工作，返回 (被测函数, 每次调用包含的操作数)
+# ----------------------------------------------------------------------
+
+def case_filmarks_parse_detail() -> Tuple[Callable, int]:
+    from src.parsers.filmarks_parser import FilmarksParser
+
+    parser, content = FilmarksParser(), load_text("filmarks_detail.html")
+    return (lambda: parser.parse(content)), 1
+
+
+def case_filmarks_parse_search() -> Tuple[Callable, int]:
+    from src.parsers.filmarks_parser import FilmarksParser
+
+    parser, content = FilmarksParser(), load_text("filmarks_search.html")
+    return (lambda: parser.parse(content)), 1
+
+
+def case_mal_extract_all_data() -> Tuple[Callable, int]:
+    from src.parsers.myanimelist_parser import MyAnimeListParser
+
+    nodes = load_json("mal_anime.json")
+
+    def run():
+        for node in nodes:
+            MyAnimeListParser.extract_all_data(node)
+    return run, len(nodes)
+
+
+def case_mal_date_parse() -> Tuple[Callable, int]:
+    from utils.date.date_processors import MyAnimeListDateProcessor
+
+    dates = load_json("samples.json")["mal_dates"]
+
+    def run():
+        for value in dates:
+            MyAnimeListDateProcessor.parse(value)
+    return run, len(dates)
+
+
+def case_filmarks_title_relevance() -> Tuple[Callable, int]:
+    from src.extractors.filmarks import FilmarksExtractor
+
+    extractor = FilmarksExtractor()
+    pairs = [(item["query"], item["candidate"]) for item in load_json("samples.json")["relevance"]]
+
+    def run():
+        for query, candidate in pairs:
+            extractor._calculate_title_relevance(query, candidate)
+    return run, len(pairs)
+
+
+def case_filmarks_title_relevance_cold() -> Tuple[Callable, int]:
+    """标题归一化缓存未命中时的开销（每轮先清空缓存）"""
+    from src.matching.title_matcher import clear_caches
+
+    run_warm, count = case_filmarks_title_relevance()
+
+    def run():
+        clear_caches()
+        run_warm()
+    return run, count
+
+
+def case_score_table_normalize() -> Tuple[Callable, int]:
+    from src.data_process.score_table import ScoreTable
+
+    rows = _build_anime_rows(load_json("samples.json"))
+    return (lambda: ScoreTable(rows).normalize()), len(rows)
+
+
+def case_score_table_platform_values() -> Tuple[Callable, int]:
+    """逐行取出写入Excel所需的评分和人数（normalize 之后）"""
+    from src.data_process.score_table import ScoreTable
+
+    table = ScoreTable(_build_anime_rows(load_json("samples.json")))
+    table.normalize()
+
+    def run():
+        for position in range(len(table)):
+            table.platform_values(position)
+    return run, len(table)
+
+
+def case_link_parser() -> Tuple[Callable, int]:
+    from src.parsers.link_parser import LinkParser
+
+    links = load_json("samples.json")["links"]
+    calls = (
+        [(LinkParser.extract_bangumi_id, url) for url in links["bangumi"]]
+        + [(LinkParser.extract_anilist_id, url) for url in links["anilist"]]
+        + [(LinkParser.extract_myanimelist_id, url) for url in links["myanimelist"]]
+        + [(LinkParser.extract_filmarks_info, url) for url in links["filmarks"]]
+    )
+
+    def run():
+        for func, url in calls:
+            func(url)
+    return run, len(calls)
+
+
+def case_update_excel_data() -> Tuple[Callable, int]:
+    """单行写入（update_excel_data，不含综合评分）：已加载的表格模板"""
+    from src.data_process.excel_handler import update_excel_data
+
+    rows = _build_anime_rows(load_json("samples.json"))
+    ws, col_helper = _load_filled_workbook(rows)
+    index, anime = rows[0]
+    return (lambda: update_excel_data(ws, index, anime, col_helper)), 1
+
+
+def case_update_excel_rows() -> Tuple[Callable, int]:
+    """批量写入（update_excel_rows）：50行，含综合评分计算"""
+    from src.data_process.excel_handler import update_excel_rows
+
+    rows = _build_anime_rows(load_json("samples.json"))
+    ws, col_helper = _load_filled_workbook(rows)
+    return (lambda: update_excel_rows(ws, rows, col_helper)), len(rows)
+
+
+CASES: Dict[str, Callable[[], Tuple[Callable, int]]] = {
+    "filmarks_parse_detail": case_filmarks_parse_detail,
+    "filmarks_parse_search": case_filmarks_parse_search,
+    "mal_extract_all_data": case_mal_extract_all_data,
+    "mal_date_parse": case_mal_date_parse,
+    "filmarks_title_relevance": case_filmarks_title_relevance,
+    "filmarks_title_relevance_cold": case_filmarks_title_relevance_cold,
+    "score_table_normalize": case_score_table_normalize,
+    "score_table_platform_values": case_score_table_platform_values,
+    "link_parser": case_link_parser,
+    "update_excel_data": case_update_excel_data,
+    "update_excel_rows": case_update_excel_rows,
+}
+
+
+def measure(func: Callable, ops: int, repeat: int) -> Dict:
+    """
+    测量被测函数每次操作的耗时
+    Args:
+        func: 被测函数
+        ops: 每次调用包含的操作数
+        repeat: 重复轮数
+    Returns:
+        dict: 每次操作耗时（微秒）的最小值和中位数，以及每轮循环次数
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # autorange 以0.2秒为目标，慢用例至少保证1次
+    samples = [t / (number * ops) * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "ops_per_call": ops,
+        "loops": number,
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+    }
+
+
+def run_cases(names: List[str], repeat: int) -> Dict:
+    results = {"python": sys.version.split()[0], "repeat": repeat, "cases": {}}
+    for name in names:
+        func, ops = CASES[name]()
+        func()  # 预热（导入、缓存）
+        results["cases"][name] = measure(func, ops, repeat)
+        case = results["cases"][name]
+        print(f"{name:<32} {case['median_us']:>12.2f} us/op  (min {case['min_us']:.2f}, {case['loops']} loops × {ops} ops)",
+              flush=True)
+    return results
+
+
+def compare_with_baseline(result: Dict, baseline_path: str, max_regression: float) -> List[str]:
+    """
+    与基线比较各用例的中位数耗时
+    Returns:
+        list: 回归描述（为空表示未回归）
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, case in result["cases"].items():
+        reference = baseline.get("cases", {}).get(name, {}).get("median_us")
+        if reference and case["median_us"] > reference * (1 + max_regression):
+            regressions.append(f"{name}: {case['median_us']}us（基线 {reference}us，容差 {max_regression:.0%}）")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CPU热点微基准")
+    parser.add_argument("--filter", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--list", action="store_true", help="列出所有用例")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    parser.add_argument("--baseline", help="基线JSON文件，用于回归比较")
+    parser.add_argument("--max-regression", type=float, default=0.3, help="允许相对基线的最大回归比例")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    names = [name for name in CASES if not args.filter or args.filter in name]
+    if not names:
+        print(f"没有匹配 {args.filter!r} 的用例")
+        return 1
+
+    logging.disable(logging.CRITICAL)
+    try:
+        result = run_cases(names, max(1, args.repeat))
+    finally:
+        logging.disable(logging.NOTSET)
+
+    exit_code = 0
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        regressions = compare_with_baseline(result, args.baseline, args.max_regression)
+        if regressions:
+            for regression in regressions:
+                print(f"❌ {regression}")
+            exit_code = 1
+        else:
+            print("✅ 未超过基线容差")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,671 @@
+# benchmarks/mock_server.py
+# 本地模拟平台服务器：在本机模拟 Bangumi / AniList / MyAnimeList / Filmarks 的接口，用于压测并发和限流参数
+#
+# 模拟的接口（同一端口，按路径前缀区分平台）：
+#   /bangumi/v0/search/subjects（POST）、/bangumi/v0/subjects/{id}、/bangumi/v0/subjects?year=&month=（按年月浏览）
+#   /anilist（GraphQL POST：搜索、按开播日期列出、基本信息、详细信息四种查询）
+#   /mal/v2/anime?q=、/mal/v2/anime/{id}，以及网页搜索 /mal-web/anime.php?q=
+#   /filmarks-api/v2/anime/seasons?q=、/filmarks-api/v2/anime/seasons/{id}，以及网页搜索 /filmarks-web/search/animes?q=
+#   /_stats（GET 请求统计）、/_reset（POST 清空统计）
+#
+# 数据来自按随机种子生成的虚构番剧目录；可模拟延迟分布、限流（429 + Retry-After）和周期性 5xx 故障。
+# GET 响应带 ETag，请求带匹配的 If-None-Match 时返回 304（用于验证持久化HTTP缓存）。
+#
+# 用法：
+#   python -m benchmarks.mock_server --size 2000 --port 8765
+#   python -m benchmarks.mock_server --latency 50-200 --latency filmarks=lognormal:300:0.5 --rate-limit 5
+#   python -m benchmarks.mock_server --error-rate 0.02 --burst-interval 30 --burst-duration 3
+# 启动后按提示设置 MZZB_*_BASE 环境变量，程序即会请求本地服务器（见 utils/network/endpoints.py）。
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# 允许直接以脚本方式运行
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.matching import TitleIndex  # noqa: E402
+
+PLATFORMS = ('bangumi', 'anilist', 'myanimelist', 'filmarks')
+
+# 路径前缀 -> 平台
+ROUTE_PREFIXES = {
+    '/bangumi': 'bangumi',
+    '/anilist': 'anilist',
+    '/mal-web': 'myanimelist',
+    '/mal': 'myanimelist',
+    '/filmarks-web': 'filmarks',
+    '/filmarks-api': 'filmarks',
+}
+
+# 基础地址环境变量 -> 路径前缀（与 utils/network/endpoints.py 对应）
+BASE_URL_PATHS = {
+    'MZZB_BANGUMI_API_BASE': '/bangumi/v0',
+    'MZZB_ANILIST_API_URL': '/anilist',
+    'MZZB_MAL_API_BASE': '/mal/v2',
+    'MZZB_MAL_WEB_BASE': '/mal-web',
+    'MZZB_FILMARKS_API_BASE': '/filmarks-api',
+    'MZZB_FILMARKS_WEB_BASE': '/filmarks-web',
+}
+
+# 各平台搜索接口默认返回的候选数（与线上接口的默认值相近）
+SEARCH_LIMITS = {'bangumi': 5, 'anilist': 5, 'myanimelist': 20, 'filmarks': 10}
+
+# 生成标题用的词表
+_TITLE_HEADS = ['魔法', '星空', '機動', '異世界', '放課後', '銀河', '終末', '蒼穹', '青春', '迷宮',
+                '探偵', '天使', '機械', '幻想', '深海', '桜花', '雷鳴', '黄昏', '白銀', '紅蓮']
+_TITLE_TAILS = ['少女', '戦記', '物語', '学園', '旅団', '食堂', '日和', '協奏曲', '帝国', '航路',
+                '奇譚', '騎士団', '観測者', 'ノート', 'ラジオ', 'カフェ', 'レコード', 'ガーデン', 'パレード', 'ブルース']
+_ROMAJI = {'魔法': 'Mahou', '星空': 'Hoshizora', '機動': 'Kidou', '異世界': 'Isekai', '放課後': 'Houkago',
+           '銀河': 'Ginga', '終末': 'Shuumatsu', '蒼穹': 'Soukyuu', '青春': 'Seishun', '迷宮': 'Meikyuu',
+           '探偵': 'Tantei', '天使': 'Tenshi', '機械': 'Kikai', '幻想': 'Gensou', '深海': 'Shinkai',
+           '桜花': 'Ouka', '雷鳴': 'Raimei', '黄昏': 'Tasogare', '白銀': 'Shirogane', '紅蓮': 'Guren'}
+_ENGLISH = ['Magic', 'Starry Sky', 'Mobile', 'Another World', 'After School', 'Galaxy', 'End Times', 'Azure',
+            'Youth', 'Labyrinth', 'Detective', 'Angel', 'Machine', 'Fantasy', 'Deep Sea', 'Cherry Blossom',
+            'Thunder', 'Twilight', 'Silver', 'Crimson']
+_SEASON_SUFFIXES = ['', '', '', ' 第2期', ' 第3期', ' Season 2', ' 2nd Season']
+
+
+class MockCatalog:
+    """虚构番剧目录：每部作品在四个平台都有条目，各平台ID互不相同"""
+
+    def __init__(self, size: int = 500, seed: int = 0, year: int = 2025):
+        """
+        Args:
+            size: 作品数
+            seed: 随机种子（相同参数生成完全相同的目录）
+            year: 目标年份，作品的开播日期分布在该年及前一年
+        """
+        self.size = size
+        self.year = year
+        rng = random.Random(seed)
+        self.entries: List[dict] = []
+        self.index = TitleIndex()
+        self._by_platform_id: Dict[str, Dict[int, dict]] = {p: {} for p in PLATFORMS}
+
+        seen = set()
+        for position in range(size):
+            head, tail = rng.randrange(len(_TITLE_HEADS)), rng.randrange(len(_TITLE_TAILS))
+            suffix = rng.choice(_SEASON_SUFFIXES)
+            native = f"{_TITLE_HEADS[head]}{_TITLE_TAILS[tail]}{suffix}"
+            if native in seen:
+                native = f"{native} {position}"
+            seen.add(native)
+
+            entry_year = year if rng.random() < 0.8 else year - 1
+            month = rng.randint(1, 12)
+            entry = {
+                'position': position,
+                'native': native,
+                'romaji': f"{_ROMAJI[_TITLE_HEADS[head]]} {_TITLE_TAILS[tail]}{suffix}",
+                'english': f"{_ENGLISH[head]} {_TITLE_TAILS[tail]}{suffix}",
+                'chinese': f"{_TITLE_HEADS[head]}{_TITLE_TAILS[tail]}{suffix}",
+                'date': f"{entry_year}-{month:02d}-{rng.randint(1, 28):02d}",
+                'quality': rng.gauss(0, 1),
+                'popularity': rng.lognormvariate(6, 1.2),
+                'ids': {
+                    'bangumi': 400000 + position,
+                    'anilist': 170000 + position,
+                    'myanimelist': 55000 + position,
+                    'filmarks': 90000 + position,
+                },
+                'filmarks_series_id': 5000 + position,
+            }
+            for platform, platform_id in entry['ids'].items():
+                self._by_platform_id[platform][platform_id] = entry
+            self.index.add(position, [entry['native'], entry['romaji'], entry['english']])
+            self.entries.append(entry)
+
+    def titles(self) -> List[str]:
+        """所有作品的原名（用于生成压测表格）"""
+        return [entry['native'] for entry in self.entries]
+
+    def get(self, platform: str, platform_id) -> Optional[dict]:
+        """按平台ID查找作品"""
+        try:
+            return self._by_platform_id[platform].get(int(platform_id))
+        except (TypeError, ValueError):
+            return None
+
+    def by_month(self, year: int, month: int) -> List[dict]:
+        """某年某月开播的作品（按开播日期排序）"""
+        prefix = f"{year}-{month:02d}-"
+        return sorted((e for e in self.entries if e['date'].startswith(prefix)), key=lambda e: e['date'])
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        """按标题检索作品（基于本地标题倒排索引）"""
+        return [self.entries[match.entry_id] for match in self.index.search(query or '', k=limit, min_score=0.2)]
+
+    # ------------------------------------------------------------------
+    # 各平台数据格式
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _votes(entry: dict, scale: float) -> int:
+        return max(0, int(entry['popularity'] * scale))
+
+    @staticmethod
+    def _score(entry: dict, mean: float, spread: float, low: float, high: float) -> float:
+        return min(high, max(low, mean + spread * entry['quality']))
+
+    def bangumi_subject(self, entry: dict) -> dict:
+        total = self._votes(entry, 1.0)
+        score = self._score(entry, 6.8, 0.8, 1, 10)
+        # 以评分为中心的1~10分分布，合计等于总人数
+        weights = [math.exp(-((s - score) ** 2) / 2) for s in range(1, 11)]
+        counts = {str(s): int(total * w / sum(weights)) for s, w in zip(range(1, 11), weights)}
+        counts[str(round(score))] += total - sum(counts.values())
+        return {
+            'id': entry['ids']['bangumi'],
+            'type': 2,
+            'name': entry['native'],
+            'name_cn': entry['chinese'],
+            'date': entry['date'],
+            'rating': {'total': total, 'count': counts, 'score': round(score, 1)},
+        }
+
+    def bangumi_search_item(self, entry: dict) -> dict:
+        return {'id': entry['ids']['bangumi'], 'type': 2, 'name': entry['native'],
+                'name_cn': entry['chinese'], 'date': entry['date']}
+
+    def anilist_media(self, entry: dict) -> dict:
+        year, month = int(entry['date'][:4]), int(entry['date'][5:7])
+        total = self._votes(entry, 2.0)
+        average = round(self._score(entry, 70, 8, 10, 100))
+        distribution = [{'score': s, 'amount': total // 10} for s in range(10, 101, 10)]
+        return {
+            'id': entry['ids']['anilist'],
+            'idMal': entry['ids']['myanimelist'],
+            'title': {'native': entry['native'], 'english': entry['english'], 'romaji': entry['romaji']},
+            'synonyms': [entry['chinese']],
+            'startDate': {'year': year, 'month': month},
+            'averageScore': average,
+            'stats': {'scoreDistribution': distribution},
+            'externalLinks': [],
+        }
+
+    def mal_node(self, entry: dict) -> dict:
+        return {
+            'id': entry['ids']['myanimelist'],
+            'title': entry['romaji'],
+            'alternative_titles': {'ja': entry['native'], 'en': entry['english'], 'synonyms': []},
+            'start_date': entry['date'],
+            'mean': round(self._score(entry, 7.2, 0.7, 1, 10), 2),
+            'num_scoring_users': self._votes(entry, 8.0),
+        }
+
+    def filmarks_season(self, entry: dict) -> dict:
+        return {
+            'id': entry['ids']['filmarks'],
+            'seriesId': entry['filmarks_series_id'],
+            'title': entry['native'],
+            'averageScore': round(self._score(entry, 3.6, 0.4, 0.1, 5), 1),
+            'markCount': self._votes(entry, 0.6),
+            'releaseDate': entry['date'],
+            'productionYear': int(entry['date'][:4]),
+        }
+
+
+class LatencyModel:
+    """
+    响应延迟分布
+    支持：固定值 "120"、均匀分布 "50-300"、对数正态 "lognormal:中位数:sigma"（毫秒）
+    """
+
+    def __init__(self, spec: str = '0'):
+        self.spec = spec
+        spec = (spec or '0').strip().lower()
+        if spec.startswith('lognormal:'):
+            _, median, sigma = spec.split(':')
+            self.kind, self.params = 'lognormal', (math.log(float(median)), float(sigma))
+        elif '-' in spec:
+            low, high = (float(part) for part in spec.split('-', 1))
+            self.kind, self.params = 'uniform', (min(low, high), max(low, high))
+        else:
+            self.kind, self.params = 'fixed', (float(spec),)
+
+    def sample(self, rng: random.Random) -> float:
+        """抽取一次延迟（秒）"""
+        if self.kind == 'lognormal':
+            return rng.lognormvariate(*self.params) / 1000
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params) / 1000
+        return self.params[0] / 1000
+
+
+class TokenBucket:
+    """令牌桶限流：每秒补充 rate 个令牌，桶容量 burst"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> Optional[int]:
+        """
+        尝试取一个令牌
+        Returns:
+            int or None: 成功时返回None，被限流时返回建议的 Retry-After 秒数
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return max(1, math.ceil((1 - self.tokens) / self.rate))
+
+
+class FaultModel:
+    """故障注入配置：延迟、限流、随机5xx和周期性5xx故障"""
+
+    def __init__(self, latency: Optional[Dict[str, LatencyModel]] = None, rate_limit: float = 0.0,
+                 error_rate: float = 0.0, burst_interval: float = 0.0, burst_duration: float = 0.0,
+                 seed: int = 0):
+        """
+        Args:
+            latency: 平台 -> 延迟分布，键 '*' 为默认值
+            rate_limit: 每个平台每秒允许的请求数，0 表示不限流
+            error_rate: 随机返回 503 的概率
+            burst_interval: 周期性故障的周期（秒），0 表示关闭
+            burst_duration: 每个周期开头持续返回 503 的时长（秒）
+            seed: 随机种子
+        """
+        self.latency = latency or {'*': LatencyModel('0')}
+        self.error_rate = error_rate
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.buckets = {p: TokenBucket(rate_limit) for p in PLATFORMS} if rate_limit > 0 else {}
+        self.started = time.monotonic()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def delay(self, platform: str) -> float:
+        model = self.latency.get(platform) or self.latency.get('*')
+        if model is None:
+            return 0.0
+        with self._rng_lock:
+            return model.sample(self._rng)
+
+    def fault(self, platform: str) -> Optional[Tuple[int, Dict[str, str]]]:
+        """
+        判断本次请求是否返回错误
+        Returns:
+            tuple or None: (状态码, 响应头)，正常时返回None
+        """
+        bucket = self.buckets.get(platform)
+        if bucket is not None:
+            retry_after = bucket.acquire()
+            if retry_after is not None:
+                return 429, {'Retry-After': str(retry_after)}
+
+        if self.burst_interval > 0 and self.burst_duration > 0:
+            if (time.monotonic() - self.started) % self.burst_interval < self.burst_duration:
+                return 503, {}
+
+        if self.error_rate > 0:
+            with self._rng_lock:
+                if self._rng.random() < self.error_rate:
+                    return 500, {}
+        return None
+
+
+class _RequestStats:
+    """请求统计（按平台和状态码计数）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def add(self, platform: str, status: int) -> None:
+        with self.lock:
+            platform_counts = self.counts.setdefault(platform, {})
+            platform_counts[str(status)] = platform_counts.get(str(status), 0) + 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            counts = {p: dict(c) for p, c in self.counts.items()}
+        return {'requests': counts, 'total': sum(sum(c.values()) for c in counts.values())}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counts.clear()
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """请求处理：server 上挂有 catalog、faults、stats"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method: str) -> None:
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        body = self._read_body()
+
+        if parsed.path == '/_stats':
+            return self._send(200, self.server.stats.snapshot())
+        if parsed.path == '/_reset' and method == 'POST':
+            self.server.stats.reset()
+            return self._send(200, {'ok': True})
+
+        platform, prefix = self._route(parsed.path)
+        if platform is None:
+            return self._send(404, {'error': 'not found'})
+
+        delay = self.server.faults.delay(platform)
+        if delay > 0:
+            time.sleep(delay)
+
+        fault = self.server.faults.fault(platform)
+        if fault is not None:
+            status, headers = fault
+            self.server.stats.add(platform, status)
+            return self._send(status, {'error': 'mock fault'}, headers)
+
+        try:
+            status, payload = self._dispatch(method, prefix, parsed.path[len(prefix):], query, body)
+        except Exception as e:  # 模拟服务器本身出错时返回500，便于发现问题
+            status, payload = 500, {'error': str(e)}
+        self.server.stats.add(platform, self._send(status, payload))
+
+    @staticmethod
+    def _route(path: str) -> Tuple[Optional[str], str]:
+        for prefix, platform in ROUTE_PREFIXES.items():
+            if path == prefix or path.startswith(prefix + '/'):
+                return platform, prefix
+        return None, ''
+
+    def _read_body(self) -> Optional[dict]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            return None
+
+    def _send(self, status: int, payload, headers: Optional[Dict[str, str]] = None) -> int:
+        if isinstance(payload, str):
+            data, content_type = payload.encode('utf-8'), 'text/html; charset=utf-8'
+        else:
+            data, content_type = json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json'
+        if status == 200 and self.command == 'GET':
+            # GET 响应带 ETag，支持条件请求（If-None-Match 匹配时返回304，不带响应体）
+            etag = '"%s"' % hashlib.sha1(data).hexdigest()[:16]
+            headers = {**(headers or {}), 'ETag': etag}
+            if self.headers.get('If-None-Match') == etag:
+                status, data = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        return status
+
+    def _dispatch(self, method: str, prefix: str, path: str, query: dict, body: Optional[dict]):
+        catalog: MockCatalog = self.server.catalog
+        parts = [part for part in path.split('/') if part]
+
+        if prefix == '/bangumi':
+            if method == 'POST' and parts == ['v0', 'search', 'subjects']:
+                keyword = (body or {}).get('keyword', '')
+                limit = int(query.get('limit', SEARCH_LIMITS['bangumi']))
+                items = [catalog.bangumi_search_item(e) for e in catalog.search(keyword, limit)]
+                return 200, {'data': items, 'total': len(items), 'limit': limit, 'offset': 0}
+            if method == 'GET' and parts == ['v0', 'subjects']:
+                # 按年月浏览：分页返回完整条目
+                limit, offset = int(query.get('limit', 30)), int(query.get('offset', 0))
+                entries = catalog.by_month(int(query.get('year', 0)), int(query.get('month', 0)))
+                items = [catalog.bangumi_subject(e) for e in entries[offset:offset + limit]]
+                return 200, {'data': items, 'total': len(entries), 'limit': limit, 'offset': offset}
+            if len(parts) == 3 and parts[:2] == ['v0', 'subjects']:
+                entry = catalog.get('bangumi', parts[2])
+                return (200, catalog.bangumi_subject(entry)) if entry else (404, {'title': 'Not Found'})
+
+        elif prefix == '/anilist' and method == 'POST':
+            return self._anilist(body or {})
+
+        elif prefix == '/mal':
+            if parts == ['v2', 'anime']:
+                limit = int(query.get('limit', SEARCH_LIMITS['myanimelist']))
+                nodes = [{'node': catalog.mal_node(e)} for e in catalog.search(query.get('q', ''), limit)]
+                return 200, {'data': nodes, 'paging': {}}
+            if len(parts) == 3 and parts[:2] == ['v2', 'anime']:
+                entry = catalog.get('myanimelist', parts[2])
+                return (200, catalog.mal_node(entry)) if entry else (404, {'error': 'not_found'})
+
+        elif prefix == '/mal-web' and parts == ['anime.php']:
+            return 200, self._mal_search_page(catalog.search(query.get('q', ''), SEARCH_LIMITS['myanimelist']))
+
+        elif prefix == '/filmarks-api':
+            if parts == ['v2', 'anime', 'seasons']:
+                entries = catalog.search(query.get('q', ''), SEARCH_LIMITS['filmarks'])
+                return 200, {'seasons': [catalog.filmarks_season(e) for e in entries]}
+            if len(parts) == 4 and parts[:3] == ['v2', 'anime', 'seasons']:
+                entry = catalog.get('filmarks', parts[3])
+                return (200, {'season': catalog.filmarks_season(entry)}) if entry else (404, {'error': 'not found'})
+
+        elif prefix == '/filmarks-web' and parts == ['search', 'animes']:
+            return 200, self._filmarks_search_page(catalog.search(query.get('q', ''), SEARCH_LIMITS['filmarks']))
+
+        return 404, {'error': 'not found'}
+
+    def _anilist(self, body: dict):
+        """按查询内容区分 AniList 的搜索、基本信息和详细信息查询"""
+        catalog: MockCatalog = self.server.catalog
+        query = body.get('query') or ''
+        variables = body.get('variables') or {}
+
+        if 'startDate_greater' in query:
+            # 按开播日期范围分页列出（季度目录预取）
+            page, per_page = int(variables.get('page', 1)), int(variables.get('perPage', 50))
+            low, high = str(variables.get('startGreater', 0)), str(variables.get('startLesser', 99999999))
+            entries = sorted((e for e in catalog.entries if low < e['date'].replace('-', '') < high),
+                             key=lambda e: e['date'])
+            chunk = entries[(page - 1) * per_page:page * per_page]
+            return 200, {'data': {'Page': {'pageInfo': {'hasNextPage': page * per_page < len(entries)},
+                                           'media': [catalog.anilist_media(e) for e in chunk]}}}
+
+        if 'Page' in query:
+            entries = catalog.search(variables.get('search', ''), SEARCH_LIMITS['anilist'])
+            return 200, {'data': {'Page': {'media': [catalog.anilist_media(e) for e in entries]}}}
+
+        entry = catalog.get('anilist', variables.get('id'))
+        if entry is None:
+            return 404, {'data': {'Media': None}, 'errors': [{'message': 'Not Found.', 'status': 404}]}
+        media = catalog.anilist_media(entry)
+        if 'averageScore' in query:
+            fields = ('averageScore', 'stats', 'externalLinks')
+        else:
+            fields = ('id', 'title', 'startDate')
+        return 200, {'data': {'Media': {key: media[key] for key in fields}}}
+
+    @staticmethod
+    def _mal_search_page(entries: List[dict]) -> str:
+        rows = ''.join(
+            f'<tr><td><div><a href="https://myanimelist.net/anime/{e["ids"]["myanimelist"]}/x">'
+            f'{escape(e["romaji"])}</a></div></td></tr>'
+            for e in entries
+        )
+        return ('<html><body><table border="0" cellpadding="0" cellspacing="0" width="100%">'
+                f'<tr><td>Title</td></tr>{rows}</table></body></html>')
+
+    @staticmethod
+    def _filmarks_search_page(entries: List[dict]) -> str:
+        cassettes = []
+        for e in entries:
+            mark = escape(json.dumps({'count': int(e['popularity'] * 0.6)}))
+            year, month = e['date'][:4], e['date'][5:7]
+            score = round(min(5, max(0.1, 3.6 + 0.4 * e['quality'])), 1)
+            cassettes.append(
+                '<div class="p-content-cassette js-cassette">'
+                f'<h3 class="p-content-cassette__title">{escape(e["native"])}</h3>'
+                f'<div class="c-rating__score">{score}</div>'
+                f'<div class="js-btn-mark" data-mark="{mark}"></div>'
+                f'<div class="p-content-cassette__other-info">{year}年{month}月</div>'
+                '</div>'
+            )
+        return f'<html><body>{"".join(cassettes)}</body></html>'
+
+
+class MockPlatformServer:
+    """本地模拟平台服务器（后台线程运行）"""
+
+    def __init__(self, catalog: Optional[MockCatalog] = None, faults: Optional[FaultModel] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            catalog: 番剧目录，为None时生成500部作品的默认目录
+            faults: 故障注入配置，为None时不注入
+            host: 监听地址
+            port: 监听端口，0 表示随机分配
+        """
+        self.catalog = catalog or MockCatalog()
+        self.faults = faults or FaultModel()
+        self.httpd = ThreadingHTTPServer((host, port), _MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.catalog = self.catalog
+        self.httpd.faults = self.faults
+        self.httpd.stats = _RequestStats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_urls(self) -> Dict[str, str]:
+        """各平台基础地址环境变量 -> 本服务器地址"""
+        return {env_name: self.url + path for env_name, path in BASE_URL_PATHS.items()}
+
+    def apply_env(self) -> Dict[str, Optional[str]]:
+        """
+        把基础地址环境变量指向本服务器
+        Returns:
+            dict: 原来的环境变量值（传给 restore_env 恢复）
+        """
+        previous = {name: os.environ.get(name) for name in BASE_URL_PATHS}
+        os.environ.update(self.base_urls())
+        return previous
+
+    @staticmethod
+    def restore_env(previous: Dict[str, Optional[str]]) -> None:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    def stats(self) -> dict:
+        return self.httpd.stats.snapshot()
+
+    def reset_stats(self) -> None:
+        self.httpd.stats.reset()
+
+    def start(self) -> 'MockPlatformServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock-platform-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> 'MockPlatformServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def parse_latency_specs(specs: List[str]) -> Dict[str, LatencyModel]:
+    """
+    解析 --latency 参数：不带平台前缀的为默认值，如 "50-200"、"filmarks=lognormal:300:0.5"
+    Args:
+        specs: 参数列表
+    Returns:
+        dict: 平台 -> 延迟分布（'*' 为默认值）
+    """
+    models = {'*': LatencyModel('0')}
+    for spec in specs or []:
+        platform, sep, value = spec.partition('=')
+        if sep:
+            if platform not in PLATFORMS:
+                raise ValueError(f"未知平台: {platform}")
+            models[platform] = LatencyModel(value)
+        else:
+            models['*'] = LatencyModel(spec)
+    return models
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="本地模拟平台服务器（压测用）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口（0为随机）")
+    parser.add_argument("--size", type=int, default=500, help="虚构目录的作品数")
+    parser.add_argument("--year", type=int, default=2025, help="目标年份")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--latency", action="append", default=[],
+                        help="延迟分布（毫秒）：120 / 50-300 / lognormal:120:0.5，可加平台前缀如 bangumi=80，可重复")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="每个平台每秒允许的请求数，超过返回429（0为不限）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回500的概率")
+    parser.add_argument("--burst-interval", type=float, default=0.0, help="周期性503故障的周期（秒）")
+    parser.add_argument("--burst-duration", type=float, default=0.0, help="每个周期内持续返回503的时长（秒）")
+    parser.add_argument("--dump-titles", help="把目录中的原名写入该文件（每行一个），用于生成压测表格")
+    args = parser.parse_args(argv)
+
+    catalog = MockCatalog(size=args.size, seed=args.seed, year=args.year)
+    faults = FaultModel(latency=parse_latency_specs(args.latency), rate_limit=args.rate_limit,
+                        error_rate=args.error_rate, burst_interval=args.burst_interval,
+                        burst_duration=args.burst_duration, seed=args.seed)
+    server = MockPlatformServer(catalog, faults, host=args.host, port=args.port)
+
+    if args.dump_titles:
+        with open(args.dump_titles, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(catalog.titles()) + '\n')
+
+    print(f"模拟平台服务器已启动: {server.url}（{catalog.size} 部作品，目标年份 {catalog.year}）")
+    print("设置以下环境变量后运行程序：")
+    for name, value in server.base_urls().items():
+        print(f"  {name}={value}")
+    print("  MAL_CLIENT_ID=mock（模拟服务器不校验）")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+# benchmarks/startup_importtime.py
+# 启动导入耗时基准：使用 `python -X importtime` 统计程序启动阶段（代理检测之前）导入模块的耗时
+# 子进程原样执行 main.py 中 start_proxy_setup_in_background() 之前的顶层导入语句（包括 from utils import ... 触发的延迟导入），
+# main.py 修改导入后无需同步维护模块列表；总耗时为这些语句导入的全部顶层模块的累计耗时之和（不含解释器自身启动的导入）
+#
+# 用法：
+#   python -m benchmarks.startup_importtime
+#   python -m benchmarks.startup_importtime --runs 5 --json bench_output.json
+#   python -m benchmarks.startup_importtime --baseline startup_baseline.json --max-regression 0.2
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Set
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAIN_PATH = os.path.join(ROOT_DIR, "main.py")
+# main.py 中启动后台代理检测的调用，之前的顶层导入语句即为启动阶段的导入
+PROXY_SETUP_CALL = "start_proxy_setup_in_background"
+
+# 启动阶段不应被导入的重量级依赖
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "openpyxl",
+    "lxml",
+    "Scweet",
+    "curl_cffi",
+    "fake_useragent",
+]
+
+
+def get_startup_imports(main_path: str = MAIN_PATH) -> List[str]:
+    """
+    读取 main.py 在代理检测之前的顶层导入语句
+    Args:
+        main_path: main.py 路径
+    Returns:
+        list: 按顺序排列的导入语句（单行形式）
+    """
+    with open(main_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=main_path)
+
+    statements = []
+    for node in tree.body:
+        if (isinstance(node, ast.Expr) and isinstance(node.value, ast.Call)
+                and getattr(node.value.func, "id", None) == PROXY_SETUP_CALL):
+            break
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            statements.append(ast.unparse(node))
+    return statements
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """
+    解析 -X importtime 的输出
+    Args:
+        stderr: 子进程的标准错误输出
+    Returns:
+        dict: {模块名: {"self_us": int, "cumulative_us": int, "top_level": bool}}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        if not self_us.strip().isdigit():
+            continue  # 表头行
+        modules[name.strip()] = {
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            # 顶层模块只有一个前导空格，被其他模块导入的逐层多缩进两格
+            "top_level": not name.startswith("  "),
+        }
+    return modules
+
+
+def run_once(statements: List[str]) -> Dict[str, Dict[str, int]]:
+    """在干净的子进程中执行启动阶段的导入语句并返回导入耗时（语句为空时只统计解释器自身启动的导入）"""
+    code = "\n".join(statements) or "pass"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入启动模块失败:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(samples: List[Dict[str, Dict[str, int]]], statements: List[str],
+              interpreter_modules: Set[str], top: int = 15) -> Dict:
+    """
+    汇总多次运行结果（每个模块取最小值，降低噪声）
+    Args:
+        samples: 每次运行的解析结果
+        statements: 启动阶段的导入语句
+        interpreter_modules: 解释器自身启动时导入的模块（不计入总耗时）
+        top: 输出累计耗时最高的前N个模块
+    Returns:
+        dict: 汇总结果
+    """
+    merged = {}
+    for sample in samples:
+        for name, timing in sample.items():
+            current = merged.get(name)
+            if current is None or timing["cumulative_us"] < current["cumulative_us"]:
+                merged[name] = timing
+
+    # 导入语句引入的顶层模块的累计耗时之和即为总耗时（已被先导入的模块不会重复计时）
+    startup_modules = [name for name, timing in merged.items()
+                       if timing["top_level"] and name not in interpreter_modules]
+    total_us = sum(merged[name]["cumulative_us"] for name in startup_modules)
+    slowest = sorted(merged.items(), key=lambda item: item[1]["self_us"], reverse=True)[:top]
+    heavy_loaded = [name for name in HEAVY_MODULES if name in merged]
+
+    return {
+        "python": sys.version.split()[0],
+        "runs": len(samples),
+        "startup_imports": statements,
+        "startup_modules": startup_modules,
+        "total_ms": round(total_us / 1000, 2),
+        "module_count": len(merged),
+        "heavy_modules_loaded": heavy_loaded,
+        "slowest_modules": [
+            {"module": name, "self_ms": round(t["self_us"] / 1000, 2), "cumulative_ms": round(t["cumulative_us"] / 1000, 2)}
+            for name, t in slowest
+        ],
+    }
+
+
+def compare_with_baseline(result: Dict, baseline_path: str, max_regression: float) -> Optional[str]:
+    """
+    与基线结果比较
+    Returns:
+        str or None: 回归描述，未回归时返回None
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    baseline_ms = baseline.get("total_ms")
+    if not baseline_ms:
+        return None
+
+    limit = baseline_ms * (1 + max_regression)
+    if result["total_ms"] > limit:
+        return f"启动导入耗时 {result['total_ms']}ms 超过基线 {baseline_ms}ms 的 {max_regression:.0%} 容差"
+    return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="统计程序启动阶段的模块导入耗时")
+    parser.add_argument("--runs", type=int, default=3, help="运行次数，取每个模块的最小值")
+    parser.add_argument("--top", type=int, default=15, help="列出自身耗时最高的前N个模块")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    parser.add_argument("--baseline", help="基线JSON文件，用于回归比较")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许相对基线的最大回归比例")
+    args = parser.parse_args(argv)
+
+    statements = get_startup_imports()
+    interpreter_modules = set(run_once([]))
+    samples = [run_once(statements) for _ in range(max(1, args.runs))]
+    result = summarize(samples, statements, interpreter_modules, top=args.top)
+
+    print(f"Python {result['python']}，运行 {result['runs']} 次")
+    print(f"启动阶段的顶层模块: {', '.join(result['startup_modules'])}")
+    print(f"启动模块导入总耗时: {result['total_ms']} ms（共 {result['module_count']} 个模块）")
+    print("-" * 60)
+    for item in result["slowest_modules"]:
+        print(f"{item['self_ms']:>10.2f} ms  {item['cumulative_ms']:>10.2f} ms  {item['module']}")
+    print("-" * 60)
+
+    exit_code = 0
+    if result["heavy_modules_loaded"]:
+        print(f"❌ 启动阶段导入了重量级依赖: {', '.join(result['heavy_modules_loaded'])}")
+        exit_code = 1
+    else:
+        print("✅ 启动阶段未导入任何重量级依赖")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        regression = compare_with_baseline(result, args.baseline, args.max_regression)
+        if regression:
+            print(f"❌ {regression}")
+            exit_code = 1
+        else:
+            print("✅ 未超过基线容差")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,108 +16,33 @@ os.environ['PYTHONIOENCODING'] = 'utf-8'
 # 表格模板格式，如果修改值要求使用者更新表格文件
 FORMAT_VERSION = 20260410
 
-import time
-from html import unescape
-
-import pandas as pd
-from openpyxl import load_workbook
-
 # 导入自定义模块
-from models import Anime
+# 注意：pandas / openpyxl / concurrent.futures 等较重的依赖推迟到代理检测之后再导入，
+# 以缩短程序（尤其是exe）的冷启动时间
 from utils import (
-    preprocess_name,
     setup_logger,
+    flush_logger,
     date_error,
-    UrlChecker,
     setup_twitter_config,
     setup_myanimelist_api_config,
 )
-from utils.core.global_variables import FILE_PATH, update_constants
-from utils.network import setup_proxy, get_proxy_status, is_twitter_accessible, check_update
-from src.extractors import (
-    extract_bangumi_data,
-    extract_myanimelist_data,
-    extract_anilist_data,
-    extract_filmarks_data
-)
-from src.data_process.excel_handler import update_excel_data
-from utils import ExcelColumnHelper
-import concurrent.futures
+from utils.core.global_variables import get_desired_year
+from utils.core.metrics import report_metrics
+from utils.core.profiling import get_profile_mode, start_profiling, stop_profiling
+from utils.network import start_proxy_setup_in_background, is_twitter_accessible, check_update_in_background
+from utils.network import get_http_mode, get_replay_stats
+from src.catalog import save_id_mapping, start_season_prefetch
 
 # 配置日志
 logging = setup_logger()
 
-MAL_NOT_FOUND_ERRORS = {"No acceptable subject found", "No results found"}
-ANILIST_NOT_FOUND_ERRORS = {"No acceptable subject found", "No AniList results"}
-INVALID_FALLBACK_TITLES = {"", "No name found", "未知名称", None}
-
-
-def _is_mal_not_found(anime):
-    """MAL是否处于可用交叉兜底重试的未找到状态"""
-    return anime.score_mal in MAL_NOT_FOUND_ERRORS
-
-
-def _is_anilist_not_found(anime):
-    """AniList是否处于可用交叉兜底重试的未找到状态"""
-    return anime.score_al in ANILIST_NOT_FOUND_ERRORS
-
-
-def _is_valid_fallback_title(title):
-    """检查交叉兜底标题是否值得尝试"""
-    return title not in INVALID_FALLBACK_TITLES and bool(str(title).strip())
-
-
-def _retry_myanimelist_with_anilist_titles(anime):
-    """MAL失败时，先用AniList日文标题兜底，再用AniList英文标题兜底"""
-    fallback_titles = [
-        ("日文标题", getattr(anime, "anilist_japanese_name", "") or anime.anilist_name),
-        ("英文标题", getattr(anime, "anilist_english_name", "")),
-    ]
-
-    for title_type, title in fallback_titles:
-        if not _is_mal_not_found(anime):
-            break
-        if not _is_valid_fallback_title(title):
-            continue
-
-        logging.info(f"MAL候选未找到，尝试使用 AniList 返回的{title_type}重新搜索 MAL: {title}")
-        new_processed_name = preprocess_name(title)
-        extract_myanimelist_data(anime, new_processed_name)
-
-
-def _retry_anilist_with_myanimelist_titles(anime):
-    """AniList失败时，先用MAL日文标题兜底，再用MAL英文标题兜底"""
-    fallback_titles = [
-        ("日文标题", getattr(anime, "myanimelist_japanese_name", "") or anime.myanimelist_name),
-        ("英文标题", getattr(anime, "myanimelist_english_name", "")),
-    ]
-
-    for title_type, title in fallback_titles:
-        if not _is_anilist_not_found(anime):
-            break
-        if not _is_valid_fallback_title(title):
-            continue
-
-        logging.info(f"AniList候选未找到，尝试使用 MAL 返回的{title_type}重新搜索 AniList: {title}")
-        new_processed_name = unescape(preprocess_name(title))
-        extract_anilist_data(anime, new_processed_name)
-
-# 第一步：代理检测和配置（程序运行的第一步）
-try:
-    proxy_config = setup_proxy()
-    if proxy_config:
-        logging.info(f"✅ 代理配置完成 - {get_proxy_status()}")
-    else:
-        logging.info(f"📡 网络配置完成 - {get_proxy_status()}")
-except Exception as e:
-    logging.error(f"代理配置过程中出现错误: {e}")
-    logging.info("程序将使用直连模式继续运行")
-
-# 检查更新（仅在exe环境下）
-check_update()
+# 第一步：在后台启动代理检测和配置（程序运行的第一步）
+# 代理检测和更新检查都包含多秒级的网络超时，这里不再串行等待，
+# 而是与Excel加载并行执行；第一次需要代理配置或Twitter可用性时才会等待检测结果
+start_proxy_setup_in_background()
 
-# 输出分隔线，明确标识代理配置完成
-logging.info("=" * 50)
+# 检查更新（仅在exe环境下，后台执行）
+check_update_in_background()
 
 # 强制清空日期错误列表，确保每次运行都是干净的开始
 date_error.clear()
@@ -126,7 +51,19 @@ date_error.clear()
 if __name__ != "__main__":
     exit()
 
-wb = None  # 初始化wb变量
+# 可选的性能剖析（--profile / --profile=sample 或 MZZB_PROFILE），覆盖从加载表格到保存的整个流程
+profile_mode = get_profile_mode()
+if profile_mode:
+    start_profiling(profile_mode)
+
+# 延迟导入：只有真正开始处理表格时才需要
+from src.pipeline import get_row_workers
+from src.targets import get_target_paths, load_targets, merge_pending_rows, process_targets, save_targets, write_targets
+
+# 目标表格（默认 mzzb.xlsx；--targets / MZZB_TARGETS 可同时填写多张表格，每部作品只提取一次）
+target_paths = get_target_paths()
+targets = []  # 已加载的表格
+results = {}  # 已完成数据提取的 原名 -> Anime对象，统一在保存前写入各表格
 
 try:
     logging.info("程序开始运行...")
@@ -135,11 +72,27 @@ try:
     mal_config_success = setup_myanimelist_api_config()
     if not mal_config_success:
         logging.warning("MyAnimeList API未完成配置，MAL评分获取功能将不可用")
-    
+
+    # 读取Excel文件（与后台代理检测并行），检查模板版本并按主表设置目标放送年份
+    targets = load_targets(target_paths, FORMAT_VERSION)
+
+    # 清空日期错误列表，避免重复累积
+    date_error.clear()
+
+    # 预先整理待处理的行（多张表格时按原名合并）
+    pending_rows = merge_pending_rows(targets)
+    if len(targets) > 1:
+        logging.info(f"{len(targets)} 张表格共 {len(pending_rows)} 个动画条目待处理（已合并同名作品）")
+    else:
+        logging.info(f"共 {len(pending_rows)} 个动画条目待处理")
+
+    # 行数较多时在后台预取目标年份的季度目录（与Twitter配置并行），各行优先在本地匹配
+    start_season_prefetch(len(pending_rows))
+
     # 配置Twitter粉丝数获取功能
     twitter_config_success = False
-    
-    # 检查Twitter是否可用
+
+    # 检查Twitter是否可用（此处会等待后台代理检测完成）
     if not is_twitter_accessible():
         logging.warning("Twitter网络不可用，跳过Twitter粉丝数获取功能配置")
         twitter_config_success = False
@@ -152,149 +105,63 @@ try:
             logging.error(f"Twitter配置过程中出现错误: {e}")
             logging.info("程序将继续运行其他功能")
             twitter_config_success = False
-    
-    # 输出分隔线，明确标识Twitter配置完成
-    logging.info("📋 开始处理动画数据...")
-    
-    # 读取Excel文件
-    try:
-        wb = load_workbook(FILE_PATH)
-        logging.info(f"成功加载Excel文件: {FILE_PATH}")
-    except Exception as e:
-        logging.error(f"无法加载Excel文件 {FILE_PATH}: {e}")
-        logging.error("请检查Excel文件是否存在且格式正确")
-        raise
-    ws = wb.active
-
-    # 检查表格格式版本
-    excel_version = ws['M1'].value
-    if excel_version != FORMAT_VERSION:
-        logging.error(f"表格模板版本不匹配！当前代码要求表格文件模板版本为 {FORMAT_VERSION}，但表格模板版本为 {excel_version}。请更新表格模板后重试。")
-        logging.error("请访问: https://github.com/kisekinoumi/mzzbscore/releases 下载最新版本的表格模板。")
-        raise SystemExit(1)
 
-    # 更新全局常量
-    update_constants(str(ws['A1'].value)[:4])  # 读取表格设置目标放送年份
-
-    df = pd.read_excel(FILE_PATH, skiprows=1)
-    
-    # 清空日期错误列表，避免重复累积
-    date_error.clear()
-    
-    # 创建Excel列助手（只创建一次，避免重复输出映射日志）
-    col_helper = ExcelColumnHelper(ws)
-    
-    # 遍历DataFrame中的每一行数据
-    for index, row in df.iterrows():
-        if pd.isna(row['原名']):
-            logging.warning(f"Skipping row {index} because the original name is NaN.")
-            continue  # 跳过这一行
-        
-        anime = Anime(original_name=row['原名'])  # 获取每行的"原名"列作为原始名称
-        logging.info(str(anime))
-        
-        # 获取当前行的Excel行对象用于链接检查
-        excel_row = ws[index + 3]  # DataFrame从0开始，Excel从1开始，且有表头，所以+3
-        
-        # 检查当前行是否已有链接数据
-        existing_urls = UrlChecker.check_row_urls(excel_row, col_helper)
-        
-        # 如果找到链接，预先设置到anime对象中
-        if existing_urls['bangumi']:
-            anime.bangumi_url = existing_urls['bangumi']
-        if existing_urls['anilist']:
-            anime.anilist_url = existing_urls['anilist']
-        if existing_urls['myanimelist']:
-            anime.myanimelist_url = existing_urls['myanimelist']
-        if existing_urls['filmarks']:
-            anime.filmarks_url = existing_urls['filmarks']
-        
-        # 判断是否有任何现有链接
-        has_existing_links = UrlChecker.has_any_url(existing_urls)
-        available_platforms = UrlChecker.get_available_platforms(existing_urls)
-        
-        if has_existing_links:
-            logging.info(f"发现已有链接的平台: {', '.join(available_platforms)}")
-        else:
-            logging.info("未发现已有链接，将进行搜索模式")
-        
-        # 预处理名称（仍然需要，用于没有链接的平台）
-        processed_name = preprocess_name(anime.original_name)
-
-        # 提取数据 - 并发执行
-        # 原始的串行执行代码（注释掉）
-        # extract_bangumi_data(anime, processed_name)
-        # extract_myanimelist_data(anime, processed_name)
-        # extract_anilist_data(anime, processed_name)
-        # extract_filmarks_data(anime, processed_name)
-        
-        # 创建线程池执行器
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            # 提交所有任务到线程池
-            future_to_extractor = {
-                executor.submit(extract_bangumi_data, anime, processed_name): "bangumi",
-                executor.submit(extract_myanimelist_data, anime, processed_name): "myanimelist",
-                executor.submit(extract_anilist_data, anime, processed_name): "anilist",
-                executor.submit(extract_filmarks_data, anime, processed_name): "filmarks"
-            }
-            
-            # 等待所有任务完成
-            for future in concurrent.futures.as_completed(future_to_extractor):
-                extractor_name = future_to_extractor[future]
-                try:
-                    result = future.result()
-                    logging.info(f"{extractor_name} extractor completed")
-                except Exception as exc:
-                    logging.error(f"{extractor_name} extractor generated an exception: {exc}")
-
-        # MAL/AniList交叉兜底：先用日文标题重试，仍未找到再用英文标题重试
-        if _is_mal_not_found(anime):
-            _retry_myanimelist_with_anilist_titles(anime)
-        if _is_anilist_not_found(anime):
-            _retry_anilist_with_myanimelist_titles(anime)
-
-
-        # 获取Twitter粉丝数（如果找到了Twitter账号且配置成功且网络可用）
-        if hasattr(anime, 'twitter_username') and anime.twitter_username:
-            if not is_twitter_accessible():
-                logging.info(f"发现Twitter账号 @{anime.twitter_username}，但Twitter网络不可用，跳过粉丝数获取")
-                anime.twitter_followers = "网络不可用"
-            elif twitter_config_success:
-                try:
-                    from src.extractors import TwitterFollowersHelper
-                    followers_count = TwitterFollowersHelper.get_followers_count(anime.twitter_username)
-                    if followers_count is not None:
-                        anime.twitter_followers = followers_count
-                    else:
-                        logging.warning(f"无法获取 @{anime.twitter_username} 的粉丝数")
-                        anime.twitter_followers = "获取失败"
-                except Exception as e:
-                    logging.error(f"获取Twitter粉丝数时出错: {e}")
-                    anime.twitter_followers = "获取出错"
-            else:
-                logging.info(f"发现Twitter账号 @{anime.twitter_username}，但Twitter配置未成功，跳过粉丝数获取")
-                anime.twitter_followers = "配置未成功"
-
-        # 更新Excel数据
-        update_excel_data(ws, index, anime, col_helper)
+    # 输出分隔线，明确标识网络与Twitter配置完成
+    logging.info("=" * 50)
+    logging.info("📋 开始处理动画数据...")
 
-        # 延时以避免频繁请求被拒绝
-        time.sleep(0.1)
+    # 遍历待处理的每一行数据：并发提取四个平台数据、交叉兜底、获取Twitter粉丝数
+    # MZZB_ROW_WORKERS 大于1时多行同时处理，各站点请求并发由自适应并发窗口控制
+    row_workers = get_row_workers()
+    if row_workers > 1:
+        logging.info(f"同时处理 {row_workers} 行")
+    for original_name, anime, _ in process_targets(pending_rows, twitter_config_success, workers=row_workers):
+        # 记录结果，所有行处理完后统一标准化并写入各表格
+        results[original_name] = anime
 
 except Exception as e:
     logging.error(f"发生错误: {e}")
 
 finally:
-    # 保存Excel文件
-    if wb is not None:
+    # 统一写入所有已处理作品的数据（中途出错时也会写入已完成的部分），并追加各表格的评分快照
+    if targets and results:
+        try:
+            write_targets(targets, results, get_desired_year())
+        except Exception as e:
+            logging.error(f"写入Excel数据时发生错误: {e}")
+
+    # 保存跨平台ID映射表（供下次运行及其他表格直接按链接提取）
+    try:
+        save_id_mapping()
+    except Exception as e:
+        logging.error(f"保存ID映射表时发生错误: {e}")
+
+    # 保存Excel文件（多张表格时并行保存）
+    if targets:
         try:
-            wb.save(FILE_PATH)
-            logging.info("Excel表格已成功更新。")
+            save_targets(targets)
         except Exception as e:
             logging.error(f"保存Excel文件时发生错误: {e}")
     else:
         logging.warning("Excel文件未成功加载，跳过保存操作")
     
+    # 录制/回放模式下输出磁带命中统计
+    if get_http_mode() != 'off':
+        logging.info(f"HTTP {get_http_mode()} 统计: {get_replay_stats()}")
+
+    # 停止性能剖析并写出结果
+    if profile_mode:
+        try:
+            stop_profiling()
+        except Exception as e:
+            logging.error(f"写出性能剖析结果时发生错误: {e}")
+
+    # 输出请求与各阶段耗时汇总（设置 MZZB_METRICS_EXPORT 时同时导出）
+    try:
+        report_metrics(logging)
+    except Exception as e:
+        logging.error(f"输出运行指标时发生错误: {e}")
+
     # 输出日期错误信息
     try:
         if date_error:
@@ -322,7 +189,8 @@ finally:
     except Exception as e:
         logging.warning(f"查找或清理 Scweet 临时文件时发生错误: {e}，失败")
         
-    # 等待用户输入退出
+    # 等待用户输入退出（先写出队列中的日志，避免与输入提示交错）
+    flush_logger()
     try:
         while True:
             user_input = input("输入 'exit' 退出程序: ")
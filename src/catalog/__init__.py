@@ -0,0 +1,17 @@
+# src/catalog/__init__.py
+# 本地番剧目录模块：跨平台ID映射、本地番剧目录库等跨运行复用的条目数据，以及按目标年份预取的季度目录
+
+from .id_mapping import IdMappingStore, get_id_mapping_store, save_id_mapping
+from .local_catalog import LocalCatalog, get_local_catalog
+from .season import SeasonCatalog, get_season_catalog, start_season_prefetch
+
+__all__ = [
+    'IdMappingStore',
+    'get_id_mapping_store',
+    'save_id_mapping',
+    'LocalCatalog',
+    'get_local_catalog',
+    'SeasonCatalog',
+    'get_season_catalog',
+    'start_season_prefetch',
+]
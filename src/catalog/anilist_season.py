@@ -0,0 +1,113 @@
+# src/catalog/anilist_season.py
+# AniList季度目录：分页GraphQL查询目标年份内开播的全部动画（每页50条），
+# 一次拿到日文、英文、罗马音标题和别名、开播日期、平均分、评分分布和外部链接（Twitter）。
+# 本地命中的行不再发送搜索、基本信息和详细信息请求，交叉兜底所需的日文、英文标题也已就绪。
+#
+# 按开播日期范围（startDate_greater / startDate_lesser）而不是 season / seasonYear 查询：
+# 剧场版、网络动画等常常没有季度字段，按季度查询会漏掉。
+
+import logging
+from typing import Any, Dict, List
+
+from utils.network.endpoints import get_base_url
+from .season import SeasonCatalog
+
+PAGE_SIZE = 50
+# 最多翻页数（两年内的动画条目通常在40页以内）
+MAX_PAGES = 100
+
+SEASON_QUERY = '''
+query ($page: Int, $perPage: Int, $startGreater: FuzzyDateInt, $startLesser: FuzzyDateInt) {
+  Page (page: $page, perPage: $perPage) {
+    pageInfo {
+      hasNextPage
+    }
+    media (startDate_greater: $startGreater, startDate_lesser: $startLesser, type: ANIME, sort: START_DATE) {
+      id
+      idMal
+      title {
+        native
+        english
+        romaji
+      }
+      synonyms
+      startDate {
+        year
+        month
+      }
+      averageScore
+      stats {
+        scoreDistribution {
+          score
+          amount
+        }
+      }
+      externalLinks {
+        id
+        url
+        site
+        type
+      }
+    }
+  }
+}
+'''
+
+
+class AniListSeasonCatalog(SeasonCatalog):
+    """AniList季度目录"""
+
+    platform = 'anilist'
+
+    def __init__(self):
+        super().__init__()
+        from src.extractors.anilist import AniListExtractor
+
+        self.api_url = get_base_url('MZZB_ANILIST_API_URL')
+        self.extractor = AniListExtractor()
+
+    def load(self, years: List[str]) -> None:
+        from utils import fetch_data_with_retry
+
+        allowed = {int(year) for year in years}
+        variables = {
+            'perPage': PAGE_SIZE,
+            # FuzzyDateInt 为 YYYYMMDD，两端不含
+            'startGreater': min(allowed) * 10000,
+            'startLesser': (max(allowed) + 1) * 10000,
+        }
+        # 是否还有下一页取决于上一页的 hasNextPage，顺序翻页
+        for page in range(1, MAX_PAGES + 1):
+            response = fetch_data_with_retry(
+                self.api_url,
+                method='POST',
+                data={'query': SEASON_QUERY, 'variables': {**variables, 'page': page}},
+            )
+            if not response:
+                if page == 1:
+                    raise RuntimeError("AniList条目列表请求失败")
+                logging.warning("AniList条目列表第 %s 页请求失败，之后的条目将走逐行搜索", page)
+                return
+            try:
+                page_data = (response.json().get('data') or {}).get('Page') or {}
+            except ValueError:
+                raise RuntimeError(f"AniList条目列表第 {page} 页JSON解析失败")
+
+            for media in page_data.get('media') or []:
+                self._add_media(media, allowed)
+            if not (page_data.get('pageInfo') or {}).get('hasNextPage'):
+                return
+        logging.warning("AniList条目列表超过 %s 页，只取前 %s 条", MAX_PAGES, MAX_PAGES * PAGE_SIZE)
+
+    def apply_entry(self, anime, entry_id: Any, data: Any) -> None:
+        self.extractor._set_basic_info(anime, entry_id, data)
+        self.extractor._set_detail_info(anime, data)
+
+    def _add_media(self, media: Dict[str, Any], allowed_years: set) -> None:
+        start_year = (media.get('startDate') or {}).get('year')
+        if 'id' not in media or start_year not in allowed_years:
+            return
+        title_info = media.get('title') or {}
+        titles = [title_info.get(key) for key in ('native', 'english', 'romaji')]
+        titles.extend(media.get('synonyms') or [])
+        self.add(media['id'], [title for title in titles if title], media)
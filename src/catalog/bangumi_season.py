@@ -0,0 +1,93 @@
+# src/catalog/bangumi_season.py
+# Bangumi季度目录：按年、月分页浏览动画条目（GET /v0/subjects?type=2&year=&month=），
+# 一次拿到目标年份全部条目的原名、中文名、别名、开播日期和评分分布。
+# 本地命中的行直接使用列表中的条目数据，不再发送搜索和详情请求。
+
+import concurrent.futures
+import logging
+from typing import Any, Dict, List
+
+from utils.network.endpoints import get_base_url
+from .season import SeasonCatalog
+
+# 每页条目数（API上限50）
+PAGE_LIMIT = 50
+# 每个月最多翻页数（防止接口返回异常的 total 时无限翻页）
+MAX_PAGES_PER_MONTH = 20
+# 同时拉取的月份数
+MONTH_WORKERS = 4
+
+
+class BangumiSeasonCatalog(SeasonCatalog):
+    """Bangumi季度目录"""
+
+    platform = 'bangumi'
+
+    def __init__(self):
+        super().__init__()
+        from src.extractors.bangumi import BangumiExtractor
+
+        self.api_base = get_base_url('MZZB_BANGUMI_API_BASE')
+        self.extractor = BangumiExtractor()
+        self.headers = self.extractor.headers
+
+    def load(self, years: List[str]) -> None:
+        months = [(int(year), month) for year in years for month in range(1, 13)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MONTH_WORKERS, thread_name_prefix="prefetch") as executor:
+            failures = sum(1 for ok in executor.map(lambda args: self._load_month(*args), months) if not ok)
+        if failures == len(months):
+            raise RuntimeError("所有月份的条目列表请求都失败了")
+        if failures:
+            logging.warning("Bangumi季度目录有 %s 个月份拉取失败，这些月份的条目将走逐行搜索", failures)
+
+    def apply_entry(self, anime, entry_id: Any, data: Any) -> None:
+        self.extractor._set_subject_data(anime, entry_id, data)
+
+    def _load_month(self, year: int, month: int) -> bool:
+        """分页拉取某个月开播的全部动画条目，返回是否成功"""
+        from utils import fetch_data_with_retry
+
+        offset = 0
+        for _ in range(MAX_PAGES_PER_MONTH):
+            response = fetch_data_with_retry(
+                url=f"{self.api_base}/subjects",
+                params={"type": 2, "year": year, "month": month, "limit": PAGE_LIMIT, "offset": offset},
+                headers=self.headers,
+                use_cache=False,
+            )
+            if not response:
+                return False
+            try:
+                page = response.json()
+            except ValueError:
+                logging.error("Bangumi条目列表JSON解析失败: %s-%02d", year, month)
+                return False
+
+            subjects = page.get('data') or []
+            for subject in subjects:
+                self._add_subject(subject)
+            offset += len(subjects)
+            if not subjects or offset >= (page.get('total') or 0):
+                return True
+        logging.warning("Bangumi条目列表 %s-%02d 超过 %s 页，只取前 %s 条", year, month, MAX_PAGES_PER_MONTH, offset)
+        return True
+
+    def _add_subject(self, subject: Dict[str, Any]) -> None:
+        if 'id' not in subject:
+            return
+        titles = [subject.get('name'), subject.get('name_cn'), *self._infobox_aliases(subject)]
+        self.add(subject['id'], [title for title in titles if title], subject)
+
+    @staticmethod
+    def _infobox_aliases(subject: Dict[str, Any]) -> List[str]:
+        """infobox 中的“别名”（值为字符串或 [{"v": ...}] 列表）"""
+        aliases = []
+        for item in subject.get('infobox') or []:
+            if not isinstance(item, dict) or item.get('key') != '别名':
+                continue
+            value = item.get('value')
+            if isinstance(value, str):
+                aliases.append(value)
+            elif isinstance(value, list):
+                aliases.extend(v.get('v') for v in value if isinstance(v, dict) and v.get('v'))
+        return aliases
@@ -0,0 +1,373 @@
+# src/catalog/id_mapping.py
+# 跨平台ID映射表：按“原名”记录各平台已确认的条目链接，后续运行（以及其他表格）直接按链接提取，无需再搜索
+# 链接同时记录条目的放送年份，目标年份变化后（如同名的新作、重制版）不再使用年份不符的条目，回退到搜索
+#
+# 映射表保存在 mzzb_cache/id_mapping.json，可通过环境变量调整：
+#   MZZB_ID_MAPPING=0        关闭映射表（不读取也不记录）
+#   MZZB_ID_MAPPING_FILE     映射表文件路径
+#
+# 命令行：
+#   python -m src.catalog.id_mapping import <dump.json> [--sheet mzzb.xlsx] [--all]
+#       导入离线映射数据：anime-offline-database（manami-project）格式，或本映射表导出的格式
+#   python -m src.catalog.id_mapping stats
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.matching import normalize_title
+from utils.core.global_variables import get_cache_path
+
+ID_MAPPING_FILE = 'id_mapping.json'
+ID_MAPPING_VERSION = 1
+
+PLATFORMS = ('bangumi', 'anilist', 'myanimelist', 'filmarks')
+
+# 链接特征 -> 平台（用于解析离线数据中的 sources 链接）
+PLATFORM_URL_MARKERS = {
+    'bangumi': ('bgm.tv/subject/', 'bangumi.tv/subject/'),
+    'anilist': ('anilist.co/anime/',),
+    'myanimelist': ('myanimelist.net/anime/',),
+    'filmarks': ('filmarks.com/animes/',),
+}
+
+# 记录来源：search（搜索选中）、link（表格中已有链接）、import（离线导入）
+SOURCE_SEARCH = 'search'
+SOURCE_LINK = 'link'
+SOURCE_IMPORT = 'import'
+
+
+def detect_platform(url: str) -> Optional[str]:
+    """
+    根据链接判断所属平台
+    Args:
+        url: 条目链接
+    Returns:
+        str or None: 平台键，无法识别时返回None
+    """
+    if not url:
+        return None
+    for platform, markers in PLATFORM_URL_MARKERS.items():
+        if any(marker in url for marker in markers):
+            return platform
+    return None
+
+
+class IdMappingStore:
+    """跨平台ID映射表（线程安全，四个平台的提取器会并发读写）"""
+
+    def __init__(self, path: str, enabled: bool = True):
+        """
+        Args:
+            path: 映射表文件路径
+            enabled: 是否启用
+        """
+        self.path = path
+        self.enabled = enabled
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+
+    def _ensure_loaded(self) -> None:
+        """首次使用时从文件加载"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                if payload.get('version') == ID_MAPPING_VERSION:
+                    self._entries = payload.get('entries', {})
+                    logging.info(f"已加载ID映射表: {len(self._entries)} 个条目")
+                else:
+                    logging.warning(f"ID映射表版本不匹配，忽略: {self.path}")
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logging.warning(f"ID映射表读取失败，将重新记录: {e}")
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._entries)
+
+    def lookup(self, original_name: str, platform: str, allowed_years: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        查询某部作品在指定平台的条目链接
+        Args:
+            original_name: 表格中的原名
+            platform: 平台键（bangumi / anilist / myanimelist / filmarks）
+            allowed_years: 目标放送年份；记录的年份不在其中时视为没有映射（未记录年份的条目由调用方提取后再检查）
+        Returns:
+            str or None: 条目链接
+        """
+        if not self.enabled:
+            return None
+        key = normalize_title(original_name)
+        if not key:
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(key) or {}
+            url = entry.get('urls', {}).get(platform)
+            year = entry.get('years', {}).get(platform)
+        if url and year and allowed_years is not None and year not in allowed_years:
+            logging.info(f"ID映射表中 {original_name} 的 {platform} 条目放送年份 {year} 不符合要求，忽略: {url}")
+            return None
+        return url
+
+    def platform_counts(self) -> Dict[str, int]:
+        """各平台已记录的链接数"""
+        self._ensure_loaded()
+        with self._lock:
+            counts = {platform: 0 for platform in PLATFORMS}
+            for entry in self._entries.values():
+                for platform in entry.get('urls', {}):
+                    if platform in counts:
+                        counts[platform] += 1
+            return counts
+
+    def record(self, original_name: str, platform: str, url: str, source: str = SOURCE_SEARCH,
+               overwrite: bool = True, date: Any = '') -> bool:
+        """
+        记录作品在某平台的条目链接
+        Args:
+            original_name: 表格中的原名
+            platform: 平台键
+            url: 条目链接
+            source: 记录来源
+            overwrite: 已有不同链接时是否覆盖
+            date: 条目开播日期（YYYYMM 或年份，只记录年份）
+        Returns:
+            bool: 映射表是否发生变化
+        """
+        if not self.enabled or not url or platform not in PLATFORMS:
+            return False
+        key = normalize_title(original_name)
+        if not key:
+            return False
+        year = str(date or '')[:4]
+        year = year if year.isdigit() and len(year) == 4 else ''
+
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.setdefault(key, {'name': str(original_name), 'urls': {}, 'sources': {}})
+            current = entry['urls'].get(platform)
+            if current == url:
+                # 补充旧记录缺少的放送年份
+                if year and entry.get('years', {}).get(platform) != year:
+                    entry.setdefault('years', {})[platform] = year
+                    self._dirty = True
+                    return True
+                return False
+            if current and not overwrite:
+                return False
+
+            entry['urls'][platform] = url
+            entry.setdefault('sources', {})[platform] = source
+            if year:
+                entry.setdefault('years', {})[platform] = year
+            else:
+                entry.get('years', {}).pop(platform, None)
+            entry['updated_at'] = int(time.time())
+            self._dirty = True
+            if current:
+                logging.info(f"ID映射表更新 {original_name} 的 {platform} 条目: {current} -> {url}")
+            return True
+
+    def save(self, force: bool = False) -> bool:
+        """
+        保存映射表（没有变化时跳过）；先写临时文件再替换，避免中断时损坏
+        Args:
+            force: 没有变化时也写入
+        Returns:
+            bool: 是否写入了文件
+        """
+        if not self.enabled or (not self._dirty and not force):
+            return False
+
+        with self._lock:
+            payload = {'version': ID_MAPPING_VERSION, 'entries': self._entries}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False, indent=1)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.error(f"保存ID映射表失败: {e}")
+                return False
+            self._dirty = False
+        logging.info(f"ID映射表已保存: {self.path}（{len(self._entries)} 个条目）")
+        return True
+
+    def import_entries(self, items: Iterable[dict], names: Optional[Iterable[str]] = None,
+                       include_synonyms: bool = False) -> int:
+        """
+        导入离线映射数据（不会覆盖已有的链接）
+        支持两种条目格式：
+          - anime-offline-database: {"title": ..., "synonyms": [...], "sources": [链接, ...]}
+          - 本映射表格式: {"name": ..., "urls": {平台: 链接}, "years": {平台: 放送年份}}
+        Args:
+            items: 条目序列
+            names: 只导入与这些原名匹配的条目（如表格中的原名列）；为None时全部导入
+            include_synonyms: 未指定names时，是否也以别名作为键导入（数据量会显著增大）
+        Returns:
+            int: 新增的平台链接数
+        """
+        wanted = None
+        if names is not None:
+            wanted = {normalize_title(name): str(name) for name in names if normalize_title(name)}
+
+        # 原名键 -> 平台链接；同一个键对应多个不同条目时视为歧义，不导入
+        resolved: Dict[str, Dict[str, str]] = {}
+        years: Dict[str, Dict[str, Any]] = {}
+        display_names: Dict[str, str] = {}
+        ambiguous = set()
+
+        for item in items:
+            urls = self._item_urls(item)
+            if not urls:
+                continue
+
+            titles = [item.get('name') or item.get('title')]
+            if wanted is not None or include_synonyms:
+                titles.extend(item.get('synonyms') or [])
+
+            for title in titles:
+                key = normalize_title(title)
+                if not key or (wanted is not None and key not in wanted):
+                    continue
+                if key in resolved and resolved[key] != urls:
+                    ambiguous.add(key)
+                    continue
+                resolved[key] = urls
+                years[key] = self._item_years(item, urls)
+                display_names[key] = wanted[key] if wanted is not None else str(title)
+
+        added = 0
+        for key, urls in resolved.items():
+            if key in ambiguous:
+                logging.warning(f"离线数据中 {display_names[key]} 对应多个条目，跳过导入")
+                continue
+            for platform, url in urls.items():
+                if self.record(display_names[key], platform, url, source=SOURCE_IMPORT, overwrite=False,
+                               date=years[key].get(platform)):
+                    added += 1
+        logging.info(f"从离线数据导入 {added} 个平台链接（{len(resolved) - len(ambiguous)} 部作品）")
+        return added
+
+    @staticmethod
+    def _item_years(item: dict, urls: Dict[str, str]) -> Dict[str, Any]:
+        """提取离线条目中各平台条目的放送年份（anime-offline-database 的 animeSeason.year 对所有平台通用）"""
+        if isinstance(item.get('years'), dict):
+            return item['years']
+        year = (item.get('animeSeason') or {}).get('year')
+        return {platform: year for platform in urls} if year else {}
+
+    @staticmethod
+    def _item_urls(item: dict) -> Dict[str, str]:
+        """提取离线条目中的各平台链接"""
+        if isinstance(item.get('urls'), dict):
+            return {p: u for p, u in item['urls'].items() if p in PLATFORMS and u}
+
+        urls = {}
+        for url in item.get('sources') or []:
+            platform = detect_platform(url)
+            if platform and platform not in urls:
+                urls[platform] = url
+        return urls
+
+
+_store: Optional[IdMappingStore] = None
+_store_lock = threading.Lock()
+
+
+def get_id_mapping_store() -> IdMappingStore:
+    """获取全局ID映射表实例（单例）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                enabled = os.environ.get('MZZB_ID_MAPPING', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+                path = os.environ.get('MZZB_ID_MAPPING_FILE') or get_cache_path(ID_MAPPING_FILE)
+                _store = IdMappingStore(path, enabled=enabled)
+    return _store
+
+
+def save_id_mapping() -> bool:
+    """保存全局ID映射表（未使用过时不会创建文件）"""
+    return _store.save() if _store is not None else False
+
+
+def _load_dump_items(path: str) -> List[dict]:
+    """读取离线映射数据文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload.get('data'), list):  # anime-offline-database
+        return payload['data']
+    if isinstance(payload.get('entries'), dict):  # 本映射表格式
+        return list(payload['entries'].values())
+    raise ValueError("无法识别的离线映射数据格式")
+
+
+def _read_sheet_names(sheet_path: str) -> List[str]:
+    """读取表格“原名”列（第3行起）"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(sheet_path, read_only=True)
+    try:
+        ws = wb.active
+        return [row[0] for row in ws.iter_rows(min_row=3, max_col=1, values_only=True) if row[0]]
+    finally:
+        wb.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="跨平台ID映射表工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="导入离线映射数据")
+    import_parser.add_argument('dump', help="离线数据JSON文件（anime-offline-database 或本映射表格式）")
+    import_parser.add_argument('--sheet', help="只导入该表格“原名”列中的作品（默认 mzzb.xlsx，存在时）")
+    import_parser.add_argument('--all', action='store_true', help="导入全部条目（不按表格过滤）")
+    import_parser.add_argument('--synonyms', action='store_true', help="配合 --all 使用：别名也作为键导入")
+
+    subparsers.add_parser('stats', help="显示映射表统计")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    store = get_id_mapping_store()
+
+    if args.command == 'import':
+        names = None
+        if not args.all:
+            from utils.core.global_variables import FILE_PATH
+            sheet = args.sheet or (FILE_PATH if os.path.exists(FILE_PATH) else None)
+            if sheet:
+                names = _read_sheet_names(sheet)
+                logging.info(f"按表格 {sheet} 的 {len(names)} 个原名导入")
+        store.import_entries(_load_dump_items(args.dump), names=names, include_synonyms=args.synonyms)
+        store.save()
+    elif args.command == 'stats':
+        print(f"映射表: {store.path}")
+        print(f"作品数: {len(store)}")
+        for platform, count in store.platform_counts().items():
+            print(f"  {platform}: {count}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,504 @@
+# src/catalog/local_catalog.py
+# 本地番剧目录库（SQLite）：保存提取器抓取过或季度目录预取过的四个平台条目，
+# 包括标题与别名（FTS5 trigram 全文索引）、开播日期、评分、评分人数、外部链接（Twitter）和抓取时间。
+#
+# 提取器联网前先查询本地目录（见 BaseExtractor.extract_data）：
+#   - 已知条目ID（表格链接、ID映射表）且评分仍在有效期内：直接使用本地数据，不发送请求
+#   - 按标题在本地找到唯一且足够相关的条目：评分有效时直接使用，过期时按ID刷新（省去搜索请求）
+#     （已预取季度目录的平台跳过这一步，由季度目录匹配；预取到的条目连同评分一起写入本地目录）
+#   - 其余情况照常联网；联网提取成功后写回本地目录
+# 表格越来越大、运行次数越来越多时，大部分查询都在本地完成；评分可用 sync 命令提前增量刷新。
+#
+# 数据库默认保存在 mzzb_cache/catalog.sqlite3，可通过环境变量调整：
+#   MZZB_LOCAL_CATALOG=0            关闭本地目录（不读取也不记录）
+#   MZZB_LOCAL_CATALOG_FILE         数据库文件路径
+#   MZZB_LOCAL_CATALOG_MAX_AGE      评分有效期（小时），默认 24；0 表示总是联网刷新评分
+#
+# 命令行：
+#   python -m src.catalog.local_catalog sync [--year 2025] [--platform bangumi] [--max-age 24] [--limit N] [--workers 4]
+#       只刷新评分已过期（或从未抓取过评分）的条目，默认只处理目标年份及前一年开播的条目
+#   python -m src.catalog.local_catalog stats
+#   python -m src.catalog.local_catalog search <标题> [--platform anilist]
+
+import argparse
+import concurrent.futures
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.matching import normalize_title, relevance_score
+from utils.core.global_variables import get_cache_path
+from utils.core.metrics import get_metrics
+
+LOCAL_CATALOG_ENV = 'MZZB_LOCAL_CATALOG'
+LOCAL_CATALOG_FILE_ENV = 'MZZB_LOCAL_CATALOG_FILE'
+LOCAL_CATALOG_MAX_AGE_ENV = 'MZZB_LOCAL_CATALOG_MAX_AGE'
+
+LOCAL_CATALOG_FILE = 'catalog.sqlite3'
+SCHEMA_VERSION = 1
+DEFAULT_MAX_AGE_HOURS = 24.0
+
+# 各平台写入Anime对象的字段：(名称, 评分, 评分人数, 开播日期) 以及全部需要保存/恢复的属性
+PLATFORM_COLUMNS = {
+    'bangumi': ('bangumi_name', 'score_bgm', 'bangumi_total', 'bangumi_subject_Date'),
+    'anilist': ('anilist_name', 'score_al', 'anilist_total', 'anilist_subject_Date'),
+    'myanimelist': ('myanimelist_name', 'score_mal', 'myanimelist_total', 'myanimelist_subject_Date'),
+    'filmarks': ('filmarks_name', 'score_fm', 'filmarks_total', 'filmarks_subject_Date'),
+}
+ENTITY_ATTRS = {
+    'bangumi': ('bangumi_url', 'bangumi_name', 'score_bgm', 'bangumi_total', 'bangumi_subject_Date'),
+    'anilist': ('anilist_url', 'anilist_name', 'anilist_japanese_name', 'anilist_english_name',
+                'score_al', 'anilist_total', 'anilist_subject_Date', 'twitter_username', 'twitter_url'),
+    'myanimelist': ('myanimelist_url', 'myanimelist_name', 'myanimelist_japanese_name', 'myanimelist_english_name',
+                    'score_mal', 'myanimelist_total', 'myanimelist_subject_Date'),
+    'filmarks': ('filmarks_url', 'filmarks_name', 'score_fm', 'filmarks_total', 'filmarks_subject_Date'),
+}
+# 作为可检索标题的属性（提取器的占位名称不作为标题）
+TITLE_ATTRS = ('name', 'japanese_name', 'english_name')
+PLACEHOLDER_NAMES = {'No name found', '未知名称'}
+
+# 平台 -> 提取器（sync 命令刷新评分时使用，延迟导入）
+PLATFORM_EXTRACTORS = {
+    'bangumi': 'src.extractors.bangumi.BangumiExtractor',
+    'anilist': 'src.extractors.anilist.AniListExtractor',
+    'myanimelist': 'src.extractors.myanimelist.MyAnimeListExtractor',
+    'filmarks': 'src.extractors.filmarks.FilmarksExtractor',
+}
+
+# 标题检索：FTS 初筛的标题数、查询最多使用的三元组数、本地匹配的最低相关性得分
+SHORTLIST_SIZE = 40
+MAX_QUERY_TRIGRAMS = 16
+LOCAL_MATCH_MIN_SCORE = 85
+
+# 记录来源：fetch（联网提取）、prefetch（季度目录预取的列表数据，字段与联网提取相同）
+SOURCE_FETCH = 'fetch'
+SOURCE_PREFETCH = 'prefetch'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    platform TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    url TEXT,
+    name TEXT,
+    start_date TEXT,
+    score,
+    total,
+    fields TEXT,
+    source TEXT,
+    first_seen_at REAL,
+    fetched_at REAL,
+    PRIMARY KEY (platform, entity_id)
+);
+CREATE INDEX IF NOT EXISTS entities_fetched ON entities (platform, fetched_at);
+CREATE TABLE IF NOT EXISTS titles (
+    id INTEGER PRIMARY KEY,
+    platform TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    norm TEXT NOT NULL,
+    UNIQUE (platform, entity_id, norm)
+);
+CREATE INDEX IF NOT EXISTS titles_norm ON titles (platform, norm);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS title_fts USING fts5(
+    norm, platform UNINDEXED, content='titles', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS titles_ai AFTER INSERT ON titles BEGIN
+    INSERT INTO title_fts (rowid, norm, platform) VALUES (new.id, new.norm, new.platform);
+END;
+CREATE TRIGGER IF NOT EXISTS titles_ad AFTER DELETE ON titles BEGIN
+    INSERT INTO title_fts (title_fts, rowid, norm, platform) VALUES ('delete', old.id, old.norm, old.platform);
+END;
+"""
+
+
+def _query_trigrams(normalized: str) -> List[str]:
+    """查询标题的三元组（去重，过长时均匀抽取 MAX_QUERY_TRIGRAMS 个）"""
+    grams = list(dict.fromkeys(normalized[i:i + 3] for i in range(len(normalized) - 2)))
+    if len(grams) > MAX_QUERY_TRIGRAMS:
+        step = len(grams) / MAX_QUERY_TRIGRAMS
+        grams = [grams[int(i * step)] for i in range(MAX_QUERY_TRIGRAMS)]
+    return grams
+
+
+class LocalCatalog:
+    """本地番剧目录库（线程安全，四个平台的提取器会并发读写）"""
+
+    def __init__(self, path: str, max_age_hours: float = DEFAULT_MAX_AGE_HOURS):
+        """
+        Args:
+            path: 数据库文件路径
+            max_age_hours: 评分有效期（小时）
+        """
+        self.path = path
+        self.max_age = max_age_hours * 3600
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.fts = False
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """首次使用时打开数据库并建表（调用方持有锁）"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.executescript(SCHEMA)
+                try:
+                    conn.executescript(FTS_SCHEMA)
+                    self.fts = True
+                except sqlite3.OperationalError as e:
+                    # SQLite 3.34 之前没有 trigram 分词器，标题检索退化为归一化标题完全相等
+                    logging.warning(f"SQLite不支持FTS5 trigram，本地目录只按完整标题检索: {e}")
+                conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _count(self, platform: str, key: str) -> None:
+        counters = self._counters.setdefault(platform, {'hits': 0, 'title_hits': 0, 'stale': 0, 'records': 0})
+        counters[key] += 1
+
+    def is_fresh(self, fetched_at: Optional[float]) -> bool:
+        """评分是否仍在有效期内"""
+        return bool(fetched_at) and self.max_age > 0 and time.time() - fetched_at < self.max_age
+
+    def record(self, platform: str, entity_id: str, anime, titles: Iterable[Any] = ()) -> bool:
+        """
+        记录联网提取成功的条目（覆盖评分等字段，标题只增不减）
+        Args:
+            platform: 平台键
+            entity_id: 条目标识（提取器的 extract_identifier_from_url 结果）
+            anime: 已写入该平台数据的Anime对象
+            titles: 额外的可检索标题（如表格中的原名）
+        Returns:
+            bool: 是否已记录
+        """
+        if platform not in ENTITY_ATTRS or not entity_id:
+            return False
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._upsert(conn, platform, str(entity_id), anime, titles, SOURCE_FETCH, time.time())
+            self._count(platform, 'records')
+        return True
+
+    def record_many(self, platform: str, entries: Iterable[Tuple[Any, Any, Iterable[Any]]],
+                    source: str = SOURCE_PREFETCH) -> int:
+        """
+        在一个事务中批量记录条目（季度目录预取的列表数据同样带有评分，记录后在有效期内可直接使用）
+        Args:
+            platform: 平台键
+            entries: (条目标识, 已写入该平台数据的Anime对象, 额外标题序列) 序列
+            source: 记录来源
+        Returns:
+            int: 记录的条目数
+        """
+        if platform not in ENTITY_ATTRS:
+            return 0
+        now = time.time()
+        count = 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for entity_id, anime, titles in entries:
+                    if entity_id:
+                        self._upsert(conn, platform, str(entity_id), anime, titles, source, now)
+                        count += 1
+        return count
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, platform: str, entity_id: str, anime, titles: Iterable[Any],
+                source: str, now: float) -> None:
+        fields = {attr: getattr(anime, attr, '') for attr in ENTITY_ATTRS[platform]}
+        name_attr, score_attr, total_attr, date_attr = PLATFORM_COLUMNS[platform]
+        prefix = f"{platform}_"
+        all_titles = [fields.get(prefix + attr) for attr in TITLE_ATTRS] + list(titles)
+        all_titles = [title for title in all_titles if title not in PLACEHOLDER_NAMES]
+        conn.execute(
+            "INSERT INTO entities (platform, entity_id, url, name, start_date, score, total, fields, source,"
+            " first_seen_at, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (platform, entity_id) DO UPDATE SET url=excluded.url, name=excluded.name,"
+            " start_date=excluded.start_date, score=excluded.score, total=excluded.total,"
+            " fields=excluded.fields, source=excluded.source, fetched_at=excluded.fetched_at",
+            (platform, entity_id, fields.get(f"{platform}_url"), fields.get(name_attr),
+             str(fields.get(date_attr) or ''), fields.get(score_attr), fields.get(total_attr),
+             json.dumps(fields, ensure_ascii=False, default=str), source, now, now),
+        )
+        LocalCatalog._insert_titles(conn, platform, entity_id, all_titles)
+
+    @staticmethod
+    def _insert_titles(conn: sqlite3.Connection, platform: str, entity_id: str, titles: Iterable[Any]) -> None:
+        rows = []
+        for title in titles:
+            normalized = normalize_title(title)
+            if normalized:
+                rows.append((platform, entity_id, str(title), normalized))
+        conn.executemany("INSERT OR IGNORE INTO titles (platform, entity_id, title, norm) VALUES (?, ?, ?, ?)", rows)
+
+    def apply(self, anime, platform: str, entity_id: str) -> bool:
+        """
+        评分仍在有效期内时，把本地保存的条目数据写入Anime对象
+        Args:
+            anime: Anime对象
+            platform: 平台键
+            entity_id: 条目标识
+        Returns:
+            bool: 是否已使用本地数据（条目不存在、没有评分或评分过期时返回False）
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT fields, fetched_at FROM entities WHERE platform = ? AND entity_id = ?",
+                (platform, str(entity_id)),
+            ).fetchone()
+            if not row or not row[0] or not self.is_fresh(row[1]):
+                if row and row[0]:
+                    self._count(platform, 'stale')
+                return False
+            self._count(platform, 'hits')
+
+        for attr, value in json.loads(row[0]).items():
+            # 空值不覆盖（例如 AniList 条目没有 Twitter 链接时保留表格中已有的账号）
+            if value not in ('', None):
+                setattr(anime, attr, value)
+        return True
+
+    def find(self, platform: str, query: Any, allowed_years: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        按标题在本地目录中查找条目
+        Args:
+            platform: 平台键
+            query: 预处理后的名称
+            allowed_years: 只接受这些年份开播的条目（开播日期未知时也不接受）
+        Returns:
+            str or None: 唯一且足够相关的条目标识
+        """
+        normalized = normalize_title(query)
+        if not normalized:
+            return None
+        years = set(allowed_years) if allowed_years else None
+
+        with self._lock:
+            conn = self._connect()
+            if self.fts and len(normalized) >= 3:
+                expression = ' OR '.join('"{}"'.format(gram.replace('"', '""')) for gram in _query_trigrams(normalized))
+                rows = conn.execute(
+                    "SELECT t.entity_id FROM title_fts JOIN titles t ON t.id = title_fts.rowid"
+                    " WHERE title_fts MATCH ? AND title_fts.platform = ? ORDER BY rank LIMIT ?",
+                    (expression, platform, SHORTLIST_SIZE),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT entity_id FROM titles WHERE platform = ? AND norm = ?", (platform, normalized),
+                ).fetchall()
+            entity_ids = list(dict.fromkeys(row[0] for row in rows))
+            if not entity_ids:
+                return None
+
+            placeholders = ','.join('?' * len(entity_ids))
+            titles: Dict[str, List[str]] = {}
+            for entity_id, title in conn.execute(
+                    f"SELECT entity_id, title FROM titles WHERE platform = ? AND entity_id IN ({placeholders})",
+                    (platform, *entity_ids)):
+                titles.setdefault(entity_id, []).append(title)
+            dates = dict(conn.execute(
+                f"SELECT entity_id, start_date FROM entities WHERE platform = ? AND entity_id IN ({placeholders})",
+                (platform, *entity_ids)).fetchall())
+
+        best_score, best = 0.0, []
+        for entity_id in entity_ids:
+            if years is not None and str(dates.get(entity_id) or '')[:4] not in years:
+                continue
+            score = relevance_score(query, titles.get(entity_id, []))
+            if score > best_score:
+                best_score, best = score, [entity_id]
+            elif score == best_score and score > 0:
+                best.append(entity_id)
+
+        if best_score >= LOCAL_MATCH_MIN_SCORE and len(best) == 1:
+            with self._lock:
+                self._count(platform, 'title_hits')
+            return best[0]
+        return None
+
+    def stale_entities(self, platforms: Optional[Iterable[str]] = None, years: Optional[Iterable[str]] = None,
+                       limit: Optional[int] = None) -> List[Tuple[str, str, str]]:
+        """
+        评分已过期（或从未抓取过评分）的条目，最久未刷新的在前
+        Args:
+            platforms: 只返回这些平台的条目
+            years: 只返回这些年份开播的条目
+            limit: 最多返回条数
+        Returns:
+            list: (平台键, 条目标识, 名称)
+        """
+        cutoff = time.time() - self.max_age
+        sql = "SELECT platform, entity_id, name, start_date FROM entities WHERE (fetched_at IS NULL OR fetched_at < ?)"
+        params: List[Any] = [cutoff]
+        if platforms:
+            platforms = list(platforms)
+            sql += f" AND platform IN ({','.join('?' * len(platforms))})"
+            params.extend(platforms)
+        sql += " ORDER BY COALESCE(fetched_at, 0)"
+        year_set = set(years) if years else None
+
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        result = [(platform, entity_id, name or entity_id) for platform, entity_id, name, start_date in rows
+                  if year_set is None or str(start_date or '')[:4] in year_set]
+        return result[:limit] if limit else result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各平台条目数、评分有效条目数和标题数"""
+        cutoff = time.time() - self.max_age
+        result = {platform: {'entities': 0, 'fresh': 0, 'titles': 0} for platform in ENTITY_ATTRS}
+        with self._lock:
+            conn = self._connect()
+            for platform, entities, fresh in conn.execute(
+                    "SELECT platform, COUNT(*), SUM(fetched_at >= ?) FROM entities GROUP BY platform", (cutoff,)):
+                result.setdefault(platform, {'entities': 0, 'fresh': 0, 'titles': 0})
+                result[platform].update(entities=entities, fresh=fresh or 0)
+            for platform, count in conn.execute("SELECT platform, COUNT(*) FROM titles GROUP BY platform"):
+                result.setdefault(platform, {'entities': 0, 'fresh': 0, 'titles': 0})['titles'] = count
+        return result
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {platform: dict(counters) for platform, counters in self._counters.items()}
+
+
+_catalog: Optional[LocalCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def _read_max_age() -> float:
+    value = os.environ.get(LOCAL_CATALOG_MAX_AGE_ENV, '').strip()
+    if not value:
+        return DEFAULT_MAX_AGE_HOURS
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        logging.warning(f"{LOCAL_CATALOG_MAX_AGE_ENV} 不是有效的数字，使用默认值 {DEFAULT_MAX_AGE_HOURS}")
+        return DEFAULT_MAX_AGE_HOURS
+
+
+def get_local_catalog() -> Optional[LocalCatalog]:
+    """获取全局本地目录（单例），已关闭时返回None"""
+    global _catalog
+    if os.environ.get(LOCAL_CATALOG_ENV, '1').strip().lower() in ('0', 'false', 'no', 'off'):
+        return None
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                path = os.environ.get(LOCAL_CATALOG_FILE_ENV) or get_cache_path(LOCAL_CATALOG_FILE)
+                _catalog = LocalCatalog(path, _read_max_age())
+                get_metrics().register_collector('local_catalog', _catalog.snapshot)
+    return _catalog
+
+
+def _create_extractor(platform: str):
+    module_name, class_name = PLATFORM_EXTRACTORS[platform].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def sync(catalog: LocalCatalog, platforms: Optional[Iterable[str]] = None, years: Optional[Iterable[str]] = None,
+         limit: Optional[int] = None, workers: int = 4) -> Dict[str, int]:
+    """
+    增量刷新：只按ID重新抓取评分已过期的条目
+    Args:
+        catalog: 本地目录
+        platforms: 只刷新这些平台
+        years: 只刷新这些年份开播的条目
+        limit: 最多刷新条数
+        workers: 同时刷新的条目数（各站点的实际并发仍由自适应并发窗口控制）
+    Returns:
+        dict: {'refreshed': 成功数, 'failed': 失败数}
+    """
+    from models import Anime
+
+    stale = catalog.stale_entities(platforms, years, limit)
+    logging.info(f"共 {len(stale)} 个条目的评分需要刷新")
+    extractors = {platform: _create_extractor(platform) for platform in {platform for platform, _, _ in stale}}
+
+    def refresh(item) -> bool:
+        platform, entity_id, name = item
+        anime = Anime(original_name=name)
+        try:
+            if extractors[platform].extract_by_identifier(anime, entity_id):
+                return catalog.record(platform, entity_id, anime)
+        except Exception as e:
+            logging.warning(f"刷新 {platform} 条目 {entity_id} 失败: {e}")
+        return False
+
+    result = {'refreshed': 0, 'failed': 0}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="sync") as executor:
+        for ok in executor.map(refresh, stale):
+            result['refreshed' if ok else 'failed'] += 1
+    logging.info(f"刷新完成: 成功 {result['refreshed']}，失败 {result['failed']}")
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="本地番剧目录库工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser('sync', help="增量刷新评分已过期的条目")
+    sync_parser.add_argument('--year', help="目标年份（刷新该年及前一年开播的条目），默认当前年份")
+    sync_parser.add_argument('--all-years', action='store_true', help="刷新所有年份的条目")
+    sync_parser.add_argument('--platform', action='append', choices=sorted(ENTITY_ATTRS), help="只刷新指定平台（可重复）")
+    sync_parser.add_argument('--max-age', type=float, help="评分有效期（小时），默认读取 MZZB_LOCAL_CATALOG_MAX_AGE")
+    sync_parser.add_argument('--limit', type=int, help="最多刷新条数")
+    sync_parser.add_argument('--workers', type=int, default=4, help="同时刷新的条目数")
+
+    subparsers.add_parser('stats', help="显示本地目录统计")
+
+    search_parser = subparsers.add_parser('search', help="按标题检索本地目录")
+    search_parser.add_argument('title')
+    search_parser.add_argument('--platform', choices=sorted(ENTITY_ATTRS))
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    catalog = get_local_catalog()
+    if catalog is None:
+        print(f"本地目录已关闭（{LOCAL_CATALOG_ENV}=0）")
+        return 1
+
+    if args.command == 'sync':
+        if args.max_age is not None:
+            catalog.max_age = max(args.max_age, 0.0) * 3600
+        years = None
+        if not args.all_years:
+            from utils.core.global_variables import get_allowed_years, update_constants
+            update_constants(args.year or time.strftime('%Y'))
+            years = get_allowed_years()
+        result = sync(catalog, args.platform, years, args.limit, args.workers)
+        return 0 if not result['failed'] else 1
+    if args.command == 'stats':
+        print(f"本地目录: {catalog.path}")
+        for platform, counts in catalog.stats().items():
+            print(f"  {platform}: {counts['entities']} 个条目（评分有效 {counts['fresh']}），{counts['titles']} 个标题")
+    elif args.command == 'search':
+        for platform in [args.platform] if args.platform else ENTITY_ATTRS:
+            entity_id = catalog.find(platform, args.title)
+            print(f"  {platform}: {entity_id or '-'}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
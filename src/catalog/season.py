@@ -0,0 +1,242 @@
+# src/catalog/season.py
+# 季度目录预取：按目标年份一次性批量拉取某个平台的番剧条目，建立本地候选集（标题倒排索引），
+# 各行先在本地匹配，只有本地没有把握时才走原来的逐行搜索。
+#
+# 预取在后台线程中进行（与Twitter配置、其他平台的提取并行），提取器第一次查询时才等待其完成。
+# 表格行数较少时逐行搜索更省请求，默认只有待处理行数达到 MIN_ROWS_FOR_PREFETCH 时才预取。
+#
+# 环境变量：
+#   MZZB_SEASON_PREFETCH     auto（默认，按行数决定） / 1（总是预取） / 0（关闭）
+#
+# 各平台的实现见 SEASON_CATALOGS；命中、未命中和预取耗时会作为 season_catalog 表出现在运行指标中。
+# 预取到的条目按提取器的字段（链接、标题、开播日期、评分）整条写入本地目录库（local_catalog.py），
+# 有效期内之后的运行即使不预取也能直接使用；预取进行中时提取器不再查本地目录（由季度目录负责匹配）。
+
+import importlib
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.matching import TitleIndex, relevance_score
+from utils.core.metrics import get_metrics
+from utils.network.budget import time_remaining
+
+SEASON_PREFETCH_ENV = 'MZZB_SEASON_PREFETCH'
+
+# 平台 -> 季度目录实现（延迟导入）
+SEASON_CATALOGS = {
+    'bangumi': 'src.catalog.bangumi_season.BangumiSeasonCatalog',
+    'anilist': 'src.catalog.anilist_season.AniListSeasonCatalog',
+}
+
+# auto 模式下开始预取的最少待处理行数
+MIN_ROWS_FOR_PREFETCH = 20
+
+# 本地匹配的最低相关性得分（relevance_score，100为完全相等）；低于该值时回退到逐行搜索
+LOCAL_MATCH_MIN_SCORE = 85
+# 倒排索引初筛的候选数和最低得分
+SHORTLIST_SIZE = 8
+SHORTLIST_MIN_SCORE = 0.3
+
+# 查询时等待预取完成的最长时间（秒），同时不超过当前行的剩余时间
+PREFETCH_WAIT_TIMEOUT = 60.0
+
+
+class SeasonCatalog(ABC):
+    """单个平台的季度目录（子类实现 load 和 apply_entry）"""
+
+    platform = ''
+
+    def __init__(self):
+        self.index = TitleIndex()
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self.failed = False
+        self.load_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def load(self, years: List[str]) -> None:
+        """拉取目标年份的全部条目，通过 add() 加入目录"""
+        pass
+
+    @abstractmethod
+    def apply_entry(self, anime, entry_id: Any, data: Any) -> None:
+        """
+        把条目数据写入Anime对象（与提取器命中季度目录时写入的字段相同）
+        Args:
+            anime: Anime对象
+            entry_id: 平台条目ID
+            data: 条目数据
+        """
+        pass
+
+    def add(self, entry_id: Any, titles: Iterable[Any], data: Any) -> None:
+        """
+        加入一个条目
+        Args:
+            entry_id: 平台条目ID
+            titles: 可比对的标题（原名、译名、别名等）
+            data: 条目数据（提取器直接使用）
+        """
+        with self._lock:
+            self.index.add(entry_id, titles, data)
+
+    def run(self, years: List[str]) -> None:
+        """执行预取（在后台线程中调用），无论成功与否最后都会标记完成"""
+        start = time.perf_counter()
+        try:
+            with get_metrics().stage(f"prefetch.{self.platform}"):
+                self.load(years)
+                self._persist()
+            logging.info("%s季度目录预取完成: %s 个条目，用时 %.1f 秒",
+                         self.platform, len(self.index), time.perf_counter() - start)
+        except Exception as e:
+            self.failed = True
+            logging.error("%s季度目录预取失败，回退到逐行搜索: %s", self.platform, e)
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self._ready.set()
+
+    def _persist(self) -> None:
+        """把预取到的条目（含评分）写入本地目录库，有效期内之后的运行可以直接使用"""
+        from models import Anime
+        from utils.core.logger import quiet_logs
+        from .local_catalog import get_local_catalog
+
+        catalog = get_local_catalog()
+        if catalog is None:
+            return
+        with self._lock:
+            listing = list(self.index.entries())
+        entries = []
+        # 提取器的字段设置函数会逐条输出开播日期、缺少评分分布等日志，批量转换时只保留错误
+        with quiet_logs(logging.ERROR):
+            for entry_id, titles, data in listing:
+                anime = Anime(original_name='')
+                self.apply_entry(anime, entry_id, data)
+                entries.append((entry_id, anime, titles))
+        catalog.record_many(self.platform, entries)
+
+    def wait(self) -> bool:
+        """
+        等待预取完成
+        Returns:
+            bool: 预取已完成且可用时返回True
+        """
+        if not self._ready.is_set():
+            timeout = PREFETCH_WAIT_TIMEOUT
+            remaining = time_remaining()
+            if remaining is not None:
+                timeout = max(0.0, min(timeout, remaining))
+            self._ready.wait(timeout)
+        return self._ready.is_set() and not self.failed
+
+    def match(self, query: Any) -> Optional[Any]:
+        """
+        在本地目录中匹配条目
+        Args:
+            query: 预处理后的名称
+        Returns:
+            条目数据；目录不可用、没有足够相关的条目，或有多个同样相关的条目时返回None
+        """
+        if not self.wait():
+            return None
+
+        best_score, best = 0.0, []
+        for match in self.index.search(query, k=SHORTLIST_SIZE, min_score=SHORTLIST_MIN_SCORE):
+            score = relevance_score(query, self.index.titles_of(match.entry_id))
+            if score > best_score:
+                best_score, best = score, [match]
+            elif score == best_score and score > 0:
+                best.append(match)
+
+        with self._lock:
+            if best_score >= LOCAL_MATCH_MIN_SCORE and len(best) == 1:
+                self.hits += 1
+                return best[0].data
+            self.misses += 1
+        if len(best) > 1 and best_score >= LOCAL_MATCH_MIN_SCORE:
+            logging.info("%s季度目录中有 %s 个同样相关的条目，改用搜索: %s", self.platform, len(best), query)
+        return None
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self.index),
+                'hits': self.hits,
+                'misses': self.misses,
+                'load_s': round(self.load_seconds, 2),
+                'failed': int(self.failed),
+            }
+
+
+_catalogs: Dict[str, SeasonCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def _create_catalog(platform: str) -> SeasonCatalog:
+    module_name, class_name = SEASON_CATALOGS[platform].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def should_prefetch(row_count: int) -> bool:
+    """
+    是否预取季度目录
+    Args:
+        row_count: 待处理行数
+    """
+    mode = os.environ.get(SEASON_PREFETCH_ENV, 'auto').strip().lower()
+    if mode in ('0', 'off', 'false'):
+        return False
+    if mode in ('1', 'on', 'true'):
+        return True
+    return row_count >= MIN_ROWS_FOR_PREFETCH
+
+
+def start_season_prefetch(row_count: int, platforms: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    在后台开始预取季度目录
+    Args:
+        row_count: 待处理行数（auto 模式下据此决定是否预取）
+        platforms: 要预取的平台，默认全部
+    Returns:
+        list: 已开始预取的平台
+    """
+    if not should_prefetch(row_count):
+        return []
+
+    from utils.core.global_variables import get_allowed_years
+    years = list(get_allowed_years())
+    if not years:
+        logging.warning("目标年份尚未设置，跳过季度目录预取")
+        return []
+
+    started = []
+    with _catalogs_lock:
+        for platform in platforms or SEASON_CATALOGS:
+            if platform in _catalogs:
+                continue
+            catalog = _catalogs[platform] = _create_catalog(platform)
+            threading.Thread(target=catalog.run, args=(years,), name=f"prefetch-{platform}", daemon=True).start()
+            started.append(platform)
+        if started:
+            get_metrics().register_collector('season_catalog', _snapshot)
+    if started:
+        logging.info("后台预取季度目录: %s（年份 %s）", ", ".join(started), ", ".join(years))
+    return started
+
+
+def get_season_catalog(platform: str) -> Optional[SeasonCatalog]:
+    """获取已开始预取的季度目录，没有预取时返回None"""
+    return _catalogs.get(platform)
+
+
+def _snapshot() -> Dict[str, Dict]:
+    with _catalogs_lock:
+        catalogs = dict(_catalogs)
+    return {platform: catalog.snapshot() for platform, catalog in catalogs.items()}
@@ -0,0 +1,258 @@
+# src/data_process/comprehensive_score.py
+# 综合评分与排名计算：基于 ScoreTable 的标准化评分向量化聚合，结果直接写入“综合评分”“排名”列
+#
+# 配置（环境变量）：
+#   MZZB_COMPREHENSIVE_SCORE   设为 0 时不计算，保留表格中的Excel公式
+#   MZZB_SCORE_WEIGHTS         平台权重，如 "bangumi=0.5,anilist=0.2,myanimelist=0.1,filmarks=0.2"
+#   MZZB_SCORE_WEIGHTING       fixed（固定权重，默认） / votes（权重再乘以 log(1+评分人数)）
+#   MZZB_SCORE_SHRINKAGE       贝叶斯收缩强度m（按“m个虚拟评分”向该平台本期均分收缩），默认0不收缩
+#   MZZB_SCORE_MIN_VOTES       参与综合评分的最少评分人数，默认50（与低票数屏蔽一致）
+#   MZZB_SCORE_MIN_PLATFORMS   至少需要几个平台有效评分才计算综合评分，默认2
+#   MZZB_RANK_METHOD           dense（1,2,2,3） / competition（1,2,2,4，默认）
+#
+# 排名覆盖表格中的所有条目：本次未处理的行（提取失败、超时、多表格时只在其他表格出现等）
+# 使用表格中已有的综合评分参与排名；这些行的综合评分仍是Excel公式时无法排名，保留“排名”列的公式。
+
+import logging
+import math
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import ExcelColumns
+
+# 与表格模板中的公式 =Bangumi*0.5+Anilist*0.2+MyAnimelist*0.1+Filmarks*0.2 保持一致
+DEFAULT_WEIGHTS = {
+    'bangumi': 0.5,
+    'anilist': 0.2,
+    'myanimelist': 0.1,
+    'filmarks': 0.2,
+}
+
+# 平台 -> ScoreTable 中参与计算的10分制评分列
+PLATFORM_SCORE_COLUMNS = {
+    'bangumi': 'bangumi_score',
+    'anilist': 'anilist_score',
+    'myanimelist': 'myanimelist_score',
+    'filmarks': 'filmarks_doubled_score',
+}
+
+WEIGHTING_MODES = ('fixed', 'votes')
+RANK_METHODS = {'dense': 'dense', 'competition': 'min'}
+
+COMPREHENSIVE_SCORE_FORMAT = "0.00"
+
+
+class ComprehensiveScoreConfig:
+    """综合评分计算配置"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, weighting: str = 'fixed',
+                 shrinkage: float = 0.0, min_votes: int = 50, min_platforms: int = 2,
+                 rank_method: str = 'competition', enabled: bool = True):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.weighting = weighting if weighting in WEIGHTING_MODES else 'fixed'
+        self.shrinkage = max(0.0, shrinkage)
+        self.min_votes = max(0, min_votes)
+        self.min_platforms = max(1, min_platforms)
+        self.rank_method = rank_method if rank_method in RANK_METHODS else 'competition'
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> 'ComprehensiveScoreConfig':
+        """从环境变量读取配置，非法值回退到默认值"""
+        return cls(
+            weights=_parse_weights(os.environ.get('MZZB_SCORE_WEIGHTS')),
+            weighting=os.environ.get('MZZB_SCORE_WEIGHTING', 'fixed').strip().lower(),
+            shrinkage=_env_number('MZZB_SCORE_SHRINKAGE', 0.0),
+            min_votes=int(_env_number('MZZB_SCORE_MIN_VOTES', 50)),
+            min_platforms=int(_env_number('MZZB_SCORE_MIN_PLATFORMS', 2)),
+            rank_method=os.environ.get('MZZB_RANK_METHOD', 'competition').strip().lower(),
+            enabled=os.environ.get('MZZB_COMPREHENSIVE_SCORE', '1').strip().lower() not in ('0', 'false', 'no', 'off'),
+        )
+
+
+def _env_number(name: str, default: float) -> float:
+    """读取数值型环境变量"""
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = float(raw)
+        return value if math.isfinite(value) else default
+    except ValueError:
+        logging.warning(f"环境变量 {name}={raw!r} 不是有效数字，使用默认值 {default}")
+        return default
+
+
+def _parse_weights(raw: Optional[str]) -> Dict[str, float]:
+    """
+    解析 "platform=weight,..." 格式的权重配置，未出现的平台沿用默认权重
+    Args:
+        raw: 环境变量原始值
+    Returns:
+        dict: 平台权重
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    if not raw:
+        return weights
+
+    for item in raw.split(','):
+        if not item.strip():
+            continue
+        key, _, value = item.partition('=')
+        key = key.strip().lower()
+        if key not in weights:
+            logging.warning(f"未知的评分平台权重: {key}")
+            continue
+        try:
+            weights[key] = max(0.0, float(value))
+        except ValueError:
+            logging.warning(f"无效的评分权重: {item}")
+    return weights
+
+
+def compute_comprehensive_scores(frame: pd.DataFrame, config: Optional[ComprehensiveScoreConfig] = None) -> pd.DataFrame:
+    """
+    计算综合评分和排名
+    Args:
+        frame: ScoreTable.normalize() 之后的结果表
+        config: 计算配置，为None时从环境变量读取
+    Returns:
+        pd.DataFrame: 与frame同索引，包含 comprehensive_score（float，无法计算时为NaN）
+                      和 ranking（Int64，无综合评分时为缺失）两列
+    """
+    if config is None:
+        config = ComprehensiveScoreConfig.from_env()
+
+    platforms = [p for p, w in config.weights.items() if w > 0]
+    scores = pd.DataFrame({p: frame[PLATFORM_SCORE_COLUMNS[p]] for p in platforms}, index=frame.index)
+    totals = pd.DataFrame({p: frame[f'{p}_total'] for p in platforms}, index=frame.index)
+
+    # 评分人数不足（或未知）的平台不参与计算
+    scores = scores.where(totals >= config.min_votes)
+    available = scores.notna()
+
+    if config.shrinkage > 0:
+        # 贝叶斯收缩：(v*R + m*C) / (v + m)，C为该平台本期所有作品的平均分
+        platform_mean = scores.mean(axis=0)
+        scores = (totals * scores + config.shrinkage * platform_mean) / (totals + config.shrinkage)
+
+    weights = pd.DataFrame(np.broadcast_to([config.weights[p] for p in platforms], scores.shape),
+                           index=frame.index, columns=platforms)
+    if config.weighting == 'votes':
+        weights = weights * np.log1p(totals.clip(lower=0))
+    weights = weights.where(available, 0.0)
+
+    weight_sum = weights.sum(axis=1)
+    # 按有效平台的权重重新归一化，缺失的平台不再按0分计入
+    comprehensive = (scores.fillna(0.0) * weights).sum(axis=1) / weight_sum.where(weight_sum > 0)
+    comprehensive = comprehensive.where(available.sum(axis=1) >= config.min_platforms).round(2)
+
+    return pd.DataFrame({'comprehensive_score': comprehensive, 'ranking': rank_scores(comprehensive, config)})
+
+
+def rank_scores(scores: pd.Series, config: ComprehensiveScoreConfig) -> pd.Series:
+    """
+    按综合评分从高到低排名
+    Args:
+        scores: 综合评分（缺失为NaN）
+        config: 计算配置（排名方式）
+    Returns:
+        pd.Series: 排名（Int64，无综合评分时为缺失）
+    """
+    return scores.rank(method=RANK_METHODS[config.rank_method], ascending=False).astype('Int64')
+
+
+def _existing_scores(ws, score_col: Optional[int], skip_rows: set):
+    """
+    读取本次未处理的条目行中已有的综合评分
+    Args:
+        ws: Excel工作表对象
+        score_col: 综合评分列索引（None表示表格中没有该列）
+        skip_rows: 本次已处理的Excel行号
+    Returns:
+        tuple: (Excel行号 -> 综合评分（无评分时为NaN）, 是否所有行的评分都可读取)
+    """
+    scores = {}
+    readable = True
+    max_col = (score_col or 0) + 1
+    for row_number, values in enumerate(ws.iter_rows(min_row=3, max_col=max_col, values_only=True), start=3):
+        if row_number in skip_rows or values[0] is None or str(values[0]).strip() == '':
+            continue
+        value = values[score_col] if score_col is not None else None
+        if score_col is None or (isinstance(value, str) and value.startswith('=')):
+            readable = False
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            scores[row_number] = float(value)
+        else:
+            scores[row_number] = math.nan
+    return scores, readable
+
+
+def write_comprehensive_scores(ws, table, col_helper, config: Optional[ComprehensiveScoreConfig] = None):
+    """
+    计算并写入综合评分和排名（覆盖表格中的公式）
+    Args:
+        ws: Excel工作表对象
+        table: 已标准化的 ScoreTable
+        col_helper: Excel列助手
+        config: 计算配置，为None时从环境变量读取
+    Returns:
+        pd.DataFrame or None: 计算结果，未计算时返回None
+    """
+    if config is None:
+        config = ComprehensiveScoreConfig.from_env()
+    if not config.enabled:
+        logging.info("综合评分计算已关闭，保留表格中的公式")
+        return None
+
+    score_col = col_helper.get_col_index(ExcelColumns.COMPREHENSIVE_SCORE)
+    rank_col = col_helper.get_col_index(ExcelColumns.RANKING)
+    if score_col is None and rank_col is None:
+        logging.info("表格中没有综合评分/排名列，跳过综合评分计算")
+        return None
+
+    if not table.normalized:
+        table.normalize()
+    results = compute_comprehensive_scores(table.frame, config)
+
+    # 排名覆盖表格中的所有条目：未处理的行使用表格中已有的综合评分
+    row_numbers = [index + 3 for index, _ in table.rows]
+    others, readable = _existing_scores(ws, score_col, set(row_numbers))
+    if not readable:
+        logging.info("部分条目本次未处理且综合评分无法读取（Excel公式），保留表格中的排名公式")
+        rank_col = None
+    all_scores = pd.concat([pd.Series(results['comprehensive_score'].to_numpy(), index=row_numbers),
+                            pd.Series(others, dtype=float)])
+    ranking = rank_scores(all_scores, config)
+    results['ranking'] = ranking.iloc[:len(row_numbers)].to_numpy()
+
+    for (index, anime), score, rank in zip(table.rows, results['comprehensive_score'], results['ranking']):
+        row = ws[index + 3]
+        if row[0].value != anime.original_name:
+            continue
+        try:
+            if score_col is not None:
+                col_helper.write_cell(row[score_col], ExcelColumns.COMPREHENSIVE_SCORE,
+                                      None if pd.isna(score) else float(score), COMPREHENSIVE_SCORE_FORMAT)
+            if rank_col is not None:
+                col_helper.write_cell(row[rank_col], ExcelColumns.RANKING, None if pd.isna(rank) else int(rank))
+        except Exception as e:
+            logging.error(f"写入 {str(anime.original_name)[:50]} 的综合评分时出错: {e}")
+
+    # 未处理条目的排名随本次结果变化
+    if rank_col is not None:
+        for row_number in others:
+            rank = ranking.loc[row_number]
+            try:
+                col_helper.write_cell(ws[row_number][rank_col], ExcelColumns.RANKING,
+                                      None if pd.isna(rank) else int(rank))
+            except Exception as e:
+                logging.error(f"写入第 {row_number} 行的排名时出错: {e}")
+
+    scored = int(results['comprehensive_score'].notna().sum())
+    logging.info(f"已计算 {scored}/{len(results)} 个条目的综合评分（权重模式: {config.weighting}，"
+                 f"排名方式: {config.rank_method}）")
+    return results
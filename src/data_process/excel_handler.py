@@ -4,9 +4,9 @@
 import logging
 import math
 from utils import ExcelColumnHelper, is_valid_value, is_valid_name, safe_float, ColumnMappings, ExcelColumns, TwitterParser
-from src.data_process.score_transformers import ScoreTransformer, TotalCountTransformer
 from src.data_process.date_validator import DateValidator
 from src.extractors.twitter import TwitterFollowersHelper
+from utils.core.profiling import traced
 
 SCORE_NUMBER_FORMATS = {
     ExcelColumns.BANGUMI_SCORE: "0.00",
@@ -16,76 +16,97 @@ SCORE_NUMBER_FORMATS = {
     ExcelColumns.FILMARKS_SCORE: "0.0",
 }
 
+# 平台名称 -> ScoreTable 中的平台键
+PLATFORM_KEY_MAPPING = {
+    "Bangumi": "bangumi",
+    "AniList": "anilist",
+    "MyAnimeList": "myanimelist",
+    "Filmarks": "filmarks"
+}
+
 
+@traced("update_excel_data")
 def update_excel_data(ws, index, anime, col_helper=None):
     """
-    更新Excel表格中的数据，使用列名定位和模块化的数据处理。
-    每次写入单元格时都进行try-except，以防止单个操作出错导致整个程序停止。
-    
+    更新Excel表格中单行的数据（update_excel_rows 的单行形式）。
+    单行无法排名，评分收缩也没有可参照的均分，因此不计算综合评分，保留表格中原有的值或公式。
     Args:
         ws: Excel工作表对象
         index: 行索引
         anime: 动画对象
         col_helper: Excel列助手，如果为None则创建新实例
     """
+    update_excel_rows(ws, [(index, anime)], col_helper, comprehensive=False)
+
+
+@traced("update_excel_rows")
+def update_excel_rows(ws, rows, col_helper=None, comprehensive=True):
+    """
+    批量更新Excel表格数据：先把所有行收集到列式评分表中统一完成标准化和低票数屏蔽，
+    再逐行写入单元格，最后计算综合评分和排名。每次写入单元格时都进行try-except，以防止单个操作出错导致整个程序停止。
+
+    Args:
+        ws: Excel工作表对象
+        rows: (DataFrame行索引, Anime对象) 序列
+        col_helper: Excel列助手，如果为None则创建新实例
+        comprehensive: 是否计算综合评分和排名
+    Returns:
+        ScoreTable: 标准化后的评分表（供综合评分等后续步骤使用）
+    """
+    # 评分表依赖pandas，推迟到真正写入时才导入，避免拖慢程序启动
+    from src.data_process.score_table import ScoreTable
+    from src.data_process.comprehensive_score import write_comprehensive_scores
+
     # 如果没有传入列助手，则创建新实例
     if col_helper is None:
         col_helper = ExcelColumnHelper(ws)
-    
+
+    table = ScoreTable(rows)
+    table.normalize()
+
+    for position, (index, anime) in enumerate(table.rows):
+        try:
+            _write_row(ws, col_helper, index, anime, table.platform_values(position))
+        except Exception as e:
+            logging.error(f"写入 {str(anime.original_name)[:50]} 的数据时出错: {e}")
+
+    # ---------------------综合评分和排名---------------------
+    if not comprehensive:
+        return table
+    try:
+        write_comprehensive_scores(ws, table, col_helper)
+    except Exception as e:
+        logging.error(f"计算综合评分时出错: {e}")
+
+    return table
+
+
+def _write_row(ws, col_helper, index, anime, values):
+    """
+    写入单行数据
+    Args:
+        ws: Excel工作表对象
+        col_helper: Excel列助手
+        index: 行索引
+        anime: 动画对象
+        values: ScoreTable.platform_values 返回的评分和人数
+    """
     # 计算实际行号（DataFrame从0开始，Excel从1开始，且有表头）
     row_num = index + 3
     current_row = ws[row_num]
-    
+
     # 匹配原始名称
     if current_row[0].value != anime.original_name:
         logging.warning(f"行 {row_num} 的原始名称不匹配，跳过更新")
         return
-    
-    # 获取转换后的评分和人数
-    transformed_scores = ScoreTransformer.get_transformed_scores(anime)
-    transformed_totals = TotalCountTransformer.get_transformed_totals(anime)
 
-    # ---------------------检查评分人数并设置NaN---------------------
-    # 检查各平台的评分人数，如果小于50则将对应的评分和人数都设置为"NaN"
-    MIN_TOTAL_COUNT = 50
-    
-    # 检查Bangumi
-    if transformed_totals['bangumi'] is not None and transformed_totals['bangumi'] < MIN_TOTAL_COUNT:
-        logging.info(f"Bangumi评分人数({transformed_totals['bangumi']})小于{MIN_TOTAL_COUNT}，设置为NaN")
-        transformed_scores['bangumi'] = "NaN"
-        transformed_totals['bangumi'] = "NaN"
-    
-    # 检查AniList
-    if transformed_totals['anilist'] is not None and transformed_totals['anilist'] < MIN_TOTAL_COUNT:
-        logging.info(f"AniList评分人数({transformed_totals['anilist']})小于{MIN_TOTAL_COUNT}，设置为NaN")
-        transformed_scores['anilist'] = "NaN"
-        transformed_totals['anilist'] = "NaN"
-    
-    # 检查MyAnimeList
-    if transformed_totals['myanimelist'] is not None and transformed_totals['myanimelist'] < MIN_TOTAL_COUNT:
-        logging.info(f"MyAnimeList评分人数({transformed_totals['myanimelist']})小于{MIN_TOTAL_COUNT}，设置为NaN")
-        transformed_scores['myanimelist'] = "NaN"
-        transformed_totals['myanimelist'] = "NaN"
-    
-    # 检查Filmarks
-    if transformed_totals['filmarks'] is not None and transformed_totals['filmarks'] < MIN_TOTAL_COUNT:
-        logging.info(f"Filmarks评分人数({transformed_totals['filmarks']})小于{MIN_TOTAL_COUNT}，设置为NaN")
-        transformed_scores['filmarks'] = "NaN"
-        transformed_scores['filmarks_doubled'] = "NaN"
-        transformed_totals['filmarks'] = "NaN"
+    transformed_scores = values['scores']
+    transformed_totals = values['totals']
 
     # ---------------------各平台数据写入---------------------
-    # 平台名称映射
-    platform_key_mapping = {
-        "Bangumi": "bangumi",
-        "AniList": "anilist", 
-        "MyAnimeList": "myanimelist",
-        "Filmarks": "filmarks"
-    }
-    
     for platform_name, mapping in ColumnMappings.SCORE_MAPPINGS.items():
-        platform_key = platform_key_mapping[platform_name]
-        
+        platform_key = PLATFORM_KEY_MAPPING[platform_name]
+
         if platform_name == "Filmarks":
             data_mapping = {
                 "original_score": (mapping["original_score"], transformed_scores[platform_key]),
@@ -97,7 +118,7 @@ def update_excel_data(ws, index, anime, col_helper=None):
                 "score": (mapping["score"], transformed_scores[platform_key]),
                 "total": (mapping["total"], transformed_totals[platform_key])
             }
-        
+
         _write_platform_data(col_helper, current_row, anime, platform_name, data_mapping)
 
     # ---------------------平台链接、名称写入---------------------
@@ -121,6 +142,10 @@ def _write_platform_data(col_helper, current_row, anime, platform_name, data_map
         data_mapping: 数据映射字典，格式为 {"field_name": ("column_name", value)}
     """
     for field_name, (column_name, value) in data_mapping.items():
+        # 不同模板的列不完全相同（如首月评分表没有“Filmarks原始评分”），模板中没有的列直接跳过
+        if not col_helper.has_column(column_name):
+            logging.debug(f"表格中没有列 '{column_name}'，跳过 {platform_name} {field_name}")
+            continue
         success = _write_platform_value(col_helper, current_row, column_name, value)
         if not success:
             logging.error(f"Error writing {platform_name} {field_name} for {anime.original_name[:50]}")
@@ -142,9 +167,7 @@ def _write_platform_value(col_helper, current_row, column_name, value):
         return False
 
     try:
-        cell = current_row[col_idx]
-        cell.value = numeric_value
-        cell.number_format = number_format
+        col_helper.write_cell(current_row[col_idx], column_name, numeric_value, number_format)
         return True
     except Exception as e:
         logging.error(f"写入列 '{column_name}' 时出错: {e}")
@@ -254,7 +277,7 @@ def _process_release_date_validation(col_helper, row_num, anime):
         if not success:
             # 如果找不到错误列，尝试使用固定列号作为备选方案
             try:
-                col_helper.ws.cell(row=row_num, column=18).value = error_message
+                col_helper.write_cell(col_helper.ws.cell(row=row_num, column=18), ExcelColumns.DATE_ERROR, error_message)
             except Exception as e:
                 logging.error(f"无法写入日期错误信息: {e}")
         
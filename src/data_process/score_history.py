@@ -0,0 +1,315 @@
+# src/data_process/score_history.py
+# 评分历史：每次运行把各作品各平台的评分和评分人数追加保存到 SQLite（只追加，不覆盖），
+# 之后无需保留旧的xlsx副本，直接按运行对比评分变化（如首月评分 vs 完结评分）。
+#
+# 表结构：runs（每次运行一行：时间、表格文件名、目标年份）和 snapshots（运行, 平台, 原名, 评分, 人数），
+# snapshots 按 (运行, 平台, 原名) 聚簇存储，两次运行的对比只读取这两次运行的连续数据，与历史总行数无关。
+# 评分统一为10分制（AniList /10、Filmarks ×2，与综合评分一致），低票数屏蔽前的原始值也会保存。
+#
+# 数据库默认保存在 mzzb_cache/score_history.sqlite3，可通过环境变量调整：
+#   MZZB_SCORE_HISTORY=0          不记录评分历史
+#   MZZB_SCORE_HISTORY_FILE       数据库文件路径
+#
+# 命令行：
+#   python -m src.data_process.score_history runs [--limit 20]
+#   python -m src.data_process.score_history delta [--from 运行ID或表格文件名] [--to 运行ID或表格文件名]
+#                                                  [--platform bangumi] [--min-change 0.1] [--csv out.csv]
+#       默认对比最近一次运行与同一表格的上一次运行；指定表格文件名时取该表格最近一次运行
+#   python -m src.data_process.score_history title <原名>
+
+import argparse
+import csv
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+from utils.core.global_variables import get_cache_path
+
+SCORE_HISTORY_ENV = 'MZZB_SCORE_HISTORY'
+SCORE_HISTORY_FILE_ENV = 'MZZB_SCORE_HISTORY_FILE'
+SCORE_HISTORY_FILE = 'score_history.sqlite3'
+
+# 平台 -> ScoreTable 中的10分制评分列
+HISTORY_SCORE_COLUMNS = {
+    'bangumi': 'bangumi_score',
+    'anilist': 'anilist_score',
+    'myanimelist': 'myanimelist_score',
+    'filmarks': 'filmarks_doubled_score',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    workbook TEXT,
+    year TEXT,
+    rows INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_workbook ON runs (workbook, id);
+CREATE TABLE IF NOT EXISTS snapshots (
+    run_id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    title TEXT NOT NULL,
+    score REAL,
+    total INTEGER,
+    PRIMARY KEY (run_id, platform, title)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshots_title ON snapshots (title, platform);
+CREATE VIEW IF NOT EXISTS snapshot_rows AS
+    SELECT s.title, s.platform, s.score, s.total, r.recorded_at, r.workbook, s.run_id
+    FROM snapshots s JOIN runs r ON r.id = s.run_id;
+"""
+
+DELTA_COLUMNS = ['title', 'platform', 'old_score', 'new_score', 'score_delta', 'old_total', 'new_total', 'total_delta']
+
+
+def _optional(value, cast):
+    return None if pd.isna(value) else cast(value)
+
+
+class ScoreHistory:
+    """评分历史库"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 数据库文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """首次使用时打开数据库并建表（调用方持有锁）"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def record_run(self, table, workbook: str = '', year: str = '') -> Optional[int]:
+        """
+        追加一次运行的评分快照
+        Args:
+            table: 已标准化的 ScoreTable
+            workbook: 表格文件路径（只保存文件名）
+            year: 目标年份
+        Returns:
+            int or None: 运行ID，没有任何有效评分时不记录并返回None
+        """
+        if not table.normalized:
+            table.normalize()
+        frame = table.frame
+        rows = []
+        for platform, score_column in HISTORY_SCORE_COLUMNS.items():
+            columns = frame[['original_name', score_column, f'{platform}_total']]
+            for title, score, total in columns.itertuples(index=False):
+                if pd.isna(score) and pd.isna(total):
+                    continue
+                rows.append((platform, str(title), _optional(score, float), _optional(total, int)))
+        if not rows:
+            return None
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                run_id = conn.execute(
+                    "INSERT INTO runs (recorded_at, workbook, year, rows) VALUES (?, ?, ?, ?)",
+                    (time.time(), os.path.basename(workbook or ''), str(year or ''), len(table)),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT OR REPLACE INTO snapshots (run_id, platform, title, score, total) VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, *row) for row in rows],
+                )
+        logging.info(f"评分历史已记录: 运行 {run_id}，{len(rows)} 条评分")
+        return run_id
+
+    def runs(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """最近的运行（新的在前）"""
+        sql = ("SELECT r.id, r.recorded_at, r.workbook, r.year, r.rows, COUNT(s.title) FROM runs r"
+               " LEFT JOIN snapshots s ON s.run_id = r.id GROUP BY r.id ORDER BY r.id DESC")
+        params = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        keys = ('id', 'recorded_at', 'workbook', 'year', 'rows', 'snapshots')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def resolve_run(self, ref: Union[int, str, None] = None, before: Optional[int] = None) -> Optional[int]:
+        """
+        解析运行引用
+        Args:
+            ref: 运行ID、表格文件名（取该表格最近一次运行）或None（最近一次运行）
+            before: 只在该运行ID之前查找
+        Returns:
+            int or None: 运行ID
+        """
+        sql, params = "SELECT id FROM runs WHERE 1=1", []
+        if ref is not None and str(ref).isdigit():
+            sql += " AND id = ?"
+            params.append(int(ref))
+        elif ref:
+            sql += " AND workbook = ?"
+            params.append(os.path.basename(str(ref)))
+        if before is not None:
+            sql += " AND id < ?"
+            params.append(before)
+        sql += " ORDER BY id DESC LIMIT 1"
+        with self._lock:
+            row = self._connect().execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def previous_run(self, run_id: int) -> Optional[int]:
+        """同一表格在该运行之前的最近一次运行"""
+        with self._lock:
+            row = self._connect().execute("SELECT workbook FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self.resolve_run(row[0], before=run_id) if row else None
+
+    def delta(self, old_run: int, new_run: int, platform: Optional[str] = None,
+              min_change: float = 0.0) -> pd.DataFrame:
+        """
+        两次运行之间的评分和人数变化（以新运行中的作品为准，旧运行中没有的作品变化为空）
+        Args:
+            old_run: 旧运行ID
+            new_run: 新运行ID
+            platform: 只对比该平台
+            min_change: 只保留评分变化绝对值不小于该值的行（大于0时不含新增作品）
+        Returns:
+            pd.DataFrame: DELTA_COLUMNS 列，按评分变化绝对值从大到小排列
+        """
+        sql = ("SELECT n.title, n.platform, o.score, n.score, n.score - o.score, o.total, n.total, n.total - o.total"
+               " FROM snapshots n LEFT JOIN snapshots o"
+               " ON o.run_id = ? AND o.platform = n.platform AND o.title = n.title"
+               " WHERE n.run_id = ?")
+        params: List[Any] = [old_run, new_run]
+        if platform:
+            sql += " AND n.platform = ?"
+            params.append(platform)
+        if min_change > 0:
+            sql += " AND ABS(n.score - o.score) >= ?"
+            params.append(min_change)
+        sql += " ORDER BY (n.score - o.score) IS NULL, ABS(n.score - o.score) DESC, n.title, n.platform"
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=DELTA_COLUMNS)
+
+    def title_history(self, title: str) -> pd.DataFrame:
+        """某部作品在各次运行中的评分和人数"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT run_id, recorded_at, workbook, platform, score, total FROM snapshot_rows"
+                " WHERE title = ? ORDER BY platform, run_id", (title,),
+            ).fetchall()
+        return pd.DataFrame(rows, columns=['run_id', 'recorded_at', 'workbook', 'platform', 'score', 'total'])
+
+
+_history: Optional[ScoreHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_score_history() -> Optional[ScoreHistory]:
+    """获取全局评分历史库（单例），已关闭时返回None"""
+    global _history
+    if os.environ.get(SCORE_HISTORY_ENV, '1').strip().lower() in ('0', 'false', 'no', 'off'):
+        return None
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = ScoreHistory(os.environ.get(SCORE_HISTORY_FILE_ENV) or get_cache_path(SCORE_HISTORY_FILE))
+    return _history
+
+
+def record_score_snapshot(table, workbook: str = '', year: str = '') -> Optional[int]:
+    """
+    把本次运行的评分追加到评分历史（已关闭时跳过）
+    Args:
+        table: 已标准化的 ScoreTable
+        workbook: 表格文件路径
+        year: 目标年份
+    Returns:
+        int or None: 运行ID
+    """
+    history = get_score_history()
+    return history.record_run(table, workbook, year) if history is not None else None
+
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="评分历史工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    runs_parser = subparsers.add_parser('runs', help="列出最近的运行")
+    runs_parser.add_argument('--limit', type=int, default=20)
+
+    delta_parser = subparsers.add_parser('delta', help="对比两次运行的评分变化")
+    delta_parser.add_argument('--from', dest='old', help="旧运行：运行ID或表格文件名，默认为新运行所属表格的上一次运行")
+    delta_parser.add_argument('--to', dest='new', help="新运行：运行ID或表格文件名，默认为最近一次运行")
+    delta_parser.add_argument('--platform', choices=sorted(HISTORY_SCORE_COLUMNS))
+    delta_parser.add_argument('--min-change', type=float, default=0.0, help="只显示评分变化不小于该值的作品")
+    delta_parser.add_argument('--limit', type=int, default=50, help="最多显示行数（--csv 时导出全部）")
+    delta_parser.add_argument('--csv', help="导出为CSV文件")
+
+    title_parser = subparsers.add_parser('title', help="显示某部作品的评分历史")
+    title_parser.add_argument('title')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    history = get_score_history()
+    if history is None:
+        print(f"评分历史已关闭（{SCORE_HISTORY_ENV}=0）")
+        return 1
+
+    if args.command == 'runs':
+        for run in history.runs(args.limit):
+            print(f"{run['id']:>5}  {_format_time(run['recorded_at'])}  {run['workbook']}  "
+                  f"{run['year']}  {run['rows']} 行 / {run['snapshots']} 条评分")
+    elif args.command == 'delta':
+        new_run = history.resolve_run(args.new)
+        if new_run is None:
+            print("没有找到新运行")
+            return 1
+        old_run = history.resolve_run(args.old, before=new_run) if args.old else history.previous_run(new_run)
+        if old_run is None:
+            print("没有找到可对比的旧运行")
+            return 1
+        frame = history.delta(old_run, new_run, args.platform, args.min_change)
+        print(f"运行 {old_run} -> {new_run}: {len(frame)} 条")
+        if args.csv:
+            frame.to_csv(args.csv, index=False, encoding='utf-8-sig', quoting=csv.QUOTE_MINIMAL)
+            print(f"已导出: {args.csv}")
+        else:
+            with pd.option_context('display.max_rows', None, 'display.width', 200):
+                print(frame.head(args.limit).to_string(index=False))
+    elif args.command == 'title':
+        frame = history.title_history(args.title)
+        if frame.empty:
+            print("没有该作品的评分历史")
+            return 1
+        frame['recorded_at'] = frame['recorded_at'].map(_format_time)
+        print(frame.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+# src/data_process/score_table.py
+# 列式评分结果表：把所有行的各平台评分、人数、日期收集到一张DataFrame中，一次性向量化完成标准化
+
+import logging
+import math
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.validators.data_validators import ROW_TIMEOUT_CODE, UNAVAILABLE_VALUES
+
+# 评分人数低于该值时，评分和人数都写为 "NaN"
+MIN_TOTAL_COUNT = 50
+
+# 平台键 -> (评分属性, 人数属性, 日期属性, 日志显示名)
+PLATFORM_FIELDS = {
+    'bangumi': ('score_bgm', 'bangumi_total', 'bangumi_subject_Date', 'Bangumi'),
+    'anilist': ('score_al', 'anilist_total', 'anilist_subject_Date', 'AniList'),
+    'myanimelist': ('score_mal', 'myanimelist_total', 'myanimelist_subject_Date', 'MyAnimeList'),
+    'filmarks': ('score_fm', 'filmarks_total', 'filmarks_subject_Date', 'Filmarks'),
+}
+
+# 标准化后的评分列 -> (来源平台, 缩放系数, 保留小数位)
+# AniList 100分制/10，Filmarks 原始分与乘2后的10分制分数
+SCORE_COLUMNS = {
+    'bangumi': ('bangumi', 1.0, 2),
+    'anilist': ('anilist', 0.1, 1),
+    'myanimelist': ('myanimelist', 1.0, 2),
+    'filmarks': ('filmarks', 1.0, 1),
+    'filmarks_doubled': ('filmarks', 2.0, 1),
+}
+
+# 低票数时写入的占位值
+LOW_VOTES_PLACEHOLDER = "NaN"
+
+
+def _to_numeric(values: pd.Series, strip_separators: bool = False) -> pd.Series:
+    """
+    把原始值列转换为float列，不可用值和无法解析的值为NaN
+    Args:
+        values: 原始值列（object类型）
+        strip_separators: 是否去除千分位逗号和空格（评分人数使用）
+    Returns:
+        pd.Series: float64列
+    """
+    unavailable = values.isin([v for v in UNAVAILABLE_VALUES if v is not None]) | values.isna()
+    cleaned = values.mask(unavailable)
+    if strip_separators:
+        is_str = cleaned.map(lambda v: isinstance(v, str))
+        if is_str.any():
+            cleaned = cleaned.where(~is_str, cleaned[is_str].str.replace(r'[,\s]', '', regex=True))
+    numeric = pd.to_numeric(cleaned, errors='coerce').astype('float64')
+    # inf 等非有限值视为无效
+    return numeric.where(np.isfinite(numeric))
+
+
+class ScoreTable:
+    """
+    列式评分结果表
+
+    每行对应Excel中的一部动画，列包含各平台的原始评分、评分人数、开播日期，
+    以及 normalize() 之后的标准化评分和低票数标记。
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, object]] = ()):
+        """
+        Args:
+            rows: (DataFrame行索引, Anime对象) 序列
+        """
+        self.rows: List[Tuple[int, object]] = list(rows)
+        self.frame = self._collect(self.rows)
+        self.normalized = False
+        # normalize() 之后按列转换为Python列表，逐行取值时不再经过DataFrame
+        self._columns: Dict[str, list] = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    @staticmethod
+    def _collect(rows) -> pd.DataFrame:
+        """把Anime对象的各平台字段收集为列"""
+        data = {
+            'row_index': [index for index, _ in rows],
+            'original_name': [anime.original_name for _, anime in rows],
+        }
+        for platform, (score_attr, total_attr, date_attr, _) in PLATFORM_FIELDS.items():
+            data[f'{platform}_raw_score'] = pd.Series([getattr(anime, score_attr, None) for _, anime in rows], dtype=object)
+            data[f'{platform}_raw_total'] = pd.Series([getattr(anime, total_attr, None) for _, anime in rows], dtype=object)
+            data[f'{platform}_date'] = pd.Series([getattr(anime, date_attr, None) for _, anime in rows], dtype=object)
+        return pd.DataFrame(data)
+
+    def normalize(self, min_total_count: int = MIN_TOTAL_COUNT) -> pd.DataFrame:
+        """
+        一次性完成所有行的评分换算、取整和低票数屏蔽
+        Args:
+            min_total_count: 评分人数阈值，低于该值的平台评分和人数都会被屏蔽
+        Returns:
+            pd.DataFrame: 增加了 {platform}_total、{score_col}_score、{platform}_low_votes 和 {platform}_timed_out 列的结果表
+        """
+        frame = self.frame
+
+        for platform in PLATFORM_FIELDS:
+            # 去除千分位后按整数截断
+            frame[f'{platform}_total'] = np.trunc(_to_numeric(frame[f'{platform}_raw_total'], strip_separators=True))
+            frame[f'{platform}_low_votes'] = frame[f'{platform}_total'] < min_total_count
+            frame[f'{platform}_timed_out'] = frame[f'{platform}_raw_score'].eq(ROW_TIMEOUT_CODE)
+
+        raw_scores = {platform: _to_numeric(frame[f'{platform}_raw_score']) for platform in PLATFORM_FIELDS}
+        for column, (platform, factor, decimals) in SCORE_COLUMNS.items():
+            frame[f'{column}_score'] = (raw_scores[platform] * factor).round(decimals)
+
+        self._log_low_votes(min_total_count)
+        self._columns = {column: frame[column].tolist() for column in self._row_columns()}
+        self.normalized = True
+        return frame
+
+    @staticmethod
+    def _row_columns() -> List[str]:
+        """platform_values 用到的列"""
+        columns = []
+        for platform in PLATFORM_FIELDS:
+            columns += [f'{platform}_total', f'{platform}_low_votes', f'{platform}_timed_out']
+        columns += [f'{column}_score' for column in SCORE_COLUMNS]
+        return columns
+
+    def _log_low_votes(self, min_total_count: int) -> None:
+        """输出被低票数规则屏蔽的平台"""
+        for platform, (_, _, _, display_name) in PLATFORM_FIELDS.items():
+            masked = self.frame.loc[self.frame[f'{platform}_low_votes'], ['original_name', f'{platform}_total']]
+            for name, total in masked.itertuples(index=False):
+                logging.info(f"{display_name}评分人数({int(total)})小于{min_total_count}，设置为NaN: {str(name)[:50]}")
+
+    def platform_values(self, position: int) -> dict:
+        """
+        获取某一行写入Excel所需的评分和人数
+        Args:
+            position: 行在表中的位置（0开始）
+        Returns:
+            dict: {'scores': {score_col: 值}, 'totals': {platform: 值}}，
+                  无效值为None，低票数平台为 "NaN"，超过单行截止时间的平台评分为 TIMEOUT
+        """
+        if not self.normalized:
+            self.normalize()
+
+        columns = self._columns
+        scores, totals = {}, {}
+        for platform in PLATFORM_FIELDS:
+            if columns[f'{platform}_low_votes'][position]:
+                totals[platform] = LOW_VOTES_PLACEHOLDER
+            else:
+                total = columns[f'{platform}_total'][position]
+                totals[platform] = None if math.isnan(total) else int(total)
+
+        for column, (platform, _, _) in SCORE_COLUMNS.items():
+            if columns[f'{platform}_timed_out'][position]:
+                scores[column] = ROW_TIMEOUT_CODE
+            elif columns[f'{platform}_low_votes'][position]:
+                scores[column] = LOW_VOTES_PLACEHOLDER
+            else:
+                score = columns[f'{column}_score'][position]
+                scores[column] = None if math.isnan(score) else score
+
+        return {'scores': scores, 'totals': totals}
@@ -1,14 +1,9 @@
 # extractors/__init__.py
 # 使extractors成为一个Python包
+#
+# 各平台提取器（以及Scweet等较重的依赖）在首次访问时才导入，避免拖慢程序启动。
 
-from .bangumi import extract_bangumi_data
-from .myanimelist import extract_myanimelist_data
-from .anilist import extract_anilist_data
-from .filmarks import extract_filmarks_data
-from .twitter import TwitterFollowersHelper
-
-# 导入基础提取器组件
-from .base_extractor import BaseExtractor, CandidateValidator, ExtractorErrorHandler, ExtractorLogger
+import importlib
 
 __all__ = [
     'extract_bangumi_data',
@@ -20,4 +15,33 @@ __all__ = [
     'CandidateValidator',
     'ExtractorErrorHandler',
     'ExtractorLogger'
-]
\ No newline at end of file
+]
+
+# 名称 -> 所在子模块（相对于当前包）
+_LAZY_IMPORTS = {
+    'extract_bangumi_data': '.bangumi',
+    'extract_myanimelist_data': '.myanimelist',
+    'extract_anilist_data': '.anilist',
+    'extract_filmarks_data': '.filmarks',
+    'TwitterFollowersHelper': '.twitter',
+    # 基础提取器组件
+    'BaseExtractor': '.base_extractor',
+    'CandidateValidator': '.base_extractor',
+    'ExtractorErrorHandler': '.base_extractor',
+    'ExtractorLogger': '.base_extractor',
+}
+
+
+def __getattr__(name):
+    """首次访问导出名称时导入对应子模块，并缓存到包命名空间"""
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,6 +4,9 @@
 import logging
 from typing import Optional, Dict, Any
 from utils import fetch_data_with_retry, LinkParser, TwitterParser
+from utils.network.endpoints import get_base_url
+from src.catalog.season import get_season_catalog
+from src.matching import rank_candidates
 from .base_extractor import BaseExtractor, CandidateValidator, ExtractorErrorHandler, ExtractorLogger, DateExtractor
 
 
@@ -12,7 +15,7 @@ class AniListExtractor(BaseExtractor):
     
     def __init__(self):
         super().__init__("AniList")
-        self.api_url = 'https://graphql.anilist.co'
+        self.api_url = get_base_url('MZZB_ANILIST_API_URL')
     
     def extract_identifier_from_url(self, url: str) -> Optional[str]:
         """从AniList URL中提取anime ID"""
@@ -46,11 +49,24 @@ class AniListExtractor(BaseExtractor):
         return True
     
     def extract_by_search(self, anime, processed_name: str) -> bool:
-        """通过搜索从AniList API提取数据"""
+        """通过搜索从AniList API提取数据（已预取季度目录时先在本地匹配）"""
+        season_catalog = get_season_catalog('anilist')
+        media = season_catalog.match(processed_name) if season_catalog else None
+        if media:
+            logging.info("在AniList季度目录中找到条目 %s，无需搜索", media['id'])
+            self._set_basic_info(anime, media['id'], media)
+            self._set_detail_info(anime, media)
+            ExtractorLogger.log_extraction_result(anime, self.platform_name, "al")
+            ExtractorLogger.log_twitter_info(anime)
+            return True
+
         # 搜索候选条目
         candidates = self._search_candidates(processed_name)
         if not candidates:
             return ExtractorErrorHandler.handle_no_results_error(anime, "al", "No AniList results")
+
+        # 按标题相关性排序（同分保持AniList搜索顺序）
+        candidates = rank_candidates(processed_name, candidates, self._candidate_title_values)
         
         # 验证候选条目
         selected_candidate = CandidateValidator.validate_candidates(
@@ -115,7 +131,7 @@ class AniListExtractor(BaseExtractor):
             data = response.json()
             return data.get('data', {}).get('Media')
         except Exception:
-            logging.error(f"AniList条目 {anime_id} JSON解析失败")
+            logging.error("AniList条目 %s JSON解析失败", anime_id)
             return None
     
     def _fetch_detail_info(self, anime_id: int) -> Optional[Dict[str, Any]]:
@@ -167,7 +183,9 @@ class AniListExtractor(BaseExtractor):
               title {
                 native
                 english
+                romaji
               }
+              synonyms
               startDate {
                 year
                 month
@@ -194,6 +212,14 @@ class AniListExtractor(BaseExtractor):
             logging.error("AniList搜索结果JSON解析失败")
             return None
     
+    @staticmethod
+    def _candidate_title_values(candidate: Dict[str, Any]) -> list:
+        """获取搜索候选的可比对标题（日文、英文、罗马音标题和别名）"""
+        title_info = candidate.get('title') or {}
+        titles = [title_info.get(key) for key in ('native', 'english', 'romaji')]
+        titles.extend(candidate.get('synonyms') or [])
+        return [value for value in titles if value]
+
     def _extract_candidate_info(self, candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """提取候选条目信息"""
         try:
@@ -241,7 +267,7 @@ class AniListExtractor(BaseExtractor):
                 anime.anilist_subject_Date = f"{year}{month:02d}"
             else:
                 anime.anilist_subject_Date = year
-            logging.info(f"AniList开播日期: {anime.anilist_subject_Date}")
+            logging.info("AniList开播日期: %s", anime.anilist_subject_Date)
     
     def _set_detail_info(self, anime, detail_info: Dict[str, Any]):
         """设置详细信息（评分、评分人数、Twitter）"""
@@ -6,6 +6,9 @@ import logging
 import requests
 from typing import Optional, Dict, Any
 from utils import fetch_data_with_retry, LinkParser
+from utils.network.endpoints import get_base_url
+from src.catalog.season import get_season_catalog
+from src.matching import rank_candidates
 from .base_extractor import BaseExtractor, CandidateValidator, ExtractorErrorHandler, ExtractorLogger
 
 
@@ -14,7 +17,7 @@ class BangumiExtractor(BaseExtractor):
     
     def __init__(self):
         super().__init__("Bangumi")
-        self.api_base = "https://api.bgm.tv/v0"
+        self.api_base = get_base_url('MZZB_BANGUMI_API_BASE')
         self.headers = {
             'Accept': 'application/json',
             'Content-Type': 'application/json',
@@ -45,11 +48,22 @@ class BangumiExtractor(BaseExtractor):
         return True
     
     def extract_by_search(self, anime, processed_name: str) -> bool:
-        """通过搜索从Bangumi API提取数据"""
+        """通过搜索从Bangumi API提取数据（已预取季度目录时先在本地匹配）"""
+        season_catalog = get_season_catalog('bangumi')
+        subject_data = season_catalog.match(processed_name) if season_catalog else None
+        if subject_data:
+            logging.info("在Bangumi季度目录中找到条目 %s，无需搜索", subject_data['id'])
+            self._set_subject_data(anime, subject_data['id'], subject_data)
+            ExtractorLogger.log_extraction_result(anime, self.platform_name, "bgm")
+            return True
+
         # 搜索候选条目
         candidates = self._search_candidates(processed_name)
         if not candidates:
             return ExtractorErrorHandler.handle_no_results_error(anime, "bgm", "No results found")
+
+        # 按标题相关性排序，减少逐个请求条目详情的次数
+        candidates = rank_candidates(processed_name, candidates, self._candidate_title_values)
         
         # 验证候选条目
         selected_candidate = CandidateValidator.validate_candidates(
@@ -77,16 +91,16 @@ class BangumiExtractor(BaseExtractor):
     def _fetch_subject_data(self, subject_id: int) -> Optional[Dict[str, Any]]:
         """获取条目详情"""
         subject_url = f"{self.api_base}/subjects/{subject_id}"
-        response = fetch_data_with_retry(url=subject_url, headers=self.headers)
+        response = fetch_data_with_retry(url=subject_url, headers=self.headers, revalidate=True)
         
         if not response:
-            logging.error(f"Bangumi条目 {subject_id} 请求失败")
+            logging.error("Bangumi条目 %s 请求失败", subject_id)
             return None
         
         try:
             return response.json()
         except requests.exceptions.JSONDecodeError:
-            logging.error(f"Bangumi条目 {subject_id} JSON解析失败")
+            logging.error("Bangumi条目 %s JSON解析失败", subject_id)
             return None
     
     def _search_candidates(self, processed_name: str) -> Optional[list]:
@@ -115,6 +129,11 @@ class BangumiExtractor(BaseExtractor):
             logging.error("Bangumi搜索结果JSON解析失败")
             return None
     
+    @staticmethod
+    def _candidate_title_values(candidate: Dict[str, Any]) -> list:
+        """获取搜索候选的可比对标题（原名、中文名）"""
+        return [value for value in (candidate.get('name'), candidate.get('name_cn')) if value]
+
     def _extract_candidate_info(self, candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """提取候选条目信息"""
         try:
@@ -149,7 +168,7 @@ class BangumiExtractor(BaseExtractor):
         
         date_str = subject_data["date"]
         if not re.match(r"^\d{4}-\d{2}-\d{2}$", date_str):
-            logging.warning(f"Bangumi日期格式不正确: {date_str}")
+            logging.warning("Bangumi日期格式不正确: %s", date_str)
             return None
         
         year = date_str[:4]
@@ -171,7 +190,7 @@ class BangumiExtractor(BaseExtractor):
         date_info = self._extract_date_info(subject_data)
         if date_info:
             anime.bangumi_subject_Date = date_info['date']
-            logging.info(f"Bangumi开播日期: {anime.bangumi_subject_Date}")
+            logging.info("Bangumi开播日期: %s", anime.bangumi_subject_Date)
         
         # 处理评分信息
         self._set_rating_data(anime, subject_data)
@@ -193,8 +212,8 @@ class BangumiExtractor(BaseExtractor):
             anime.score_bgm = f"{calculated_score:.2f}"
             anime.bangumi_total = str(total)
             
-            logging.info(f"Bangumi评分: {anime.score_bgm}")
-            logging.info(f"Bangumi评分人数: {anime.bangumi_total}")
+            logging.info("Bangumi评分: %s", anime.score_bgm)
+            logging.info("Bangumi评分人数: %s", anime.bangumi_total)
         else:
             anime.score_bgm = 'No score available'
             logging.warning("Bangumi条目无评分信息")
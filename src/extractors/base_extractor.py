@@ -1,10 +1,16 @@
 # biz/extractors/base_extractor.py
 # 基础数据提取器，包含各平台通用的提取逻辑
 
+import copy
 import logging
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any, List, Callable
 
+from src.catalog.id_mapping import get_id_mapping_store, SOURCE_LINK, SOURCE_SEARCH
+from src.catalog.local_catalog import get_local_catalog
+from src.catalog.season import get_season_catalog
+from utils.core.profiling import span, traced
+
 
 class BaseExtractor(ABC):
     """基础数据提取器抽象类"""
@@ -15,13 +21,19 @@ class BaseExtractor(ABC):
     
     def extract_data(self, anime, processed_name: str) -> bool:
         """
-        统一的数据提取入口
+        统一的数据提取入口：已有链接 → ID映射表 → 本地目录标题匹配 → 搜索
+        （已知条目时先查本地目录，评分仍有效则不联网）
         Args:
             anime: Anime对象
             processed_name: 预处理后的名称
         Returns:
             bool: 是否成功提取数据
         """
+        with span(f"extract_data.{self.platform_key}"):
+            return self._extract_data(anime, processed_name)
+
+    def _extract_data(self, anime, processed_name: str) -> bool:
+        """extract_data 的实现（外层记录追踪区间）"""
         # 检查是否已有URL
         url_attr = f"{self.platform_key}_url"
         existing_url = getattr(anime, url_attr, None)
@@ -29,13 +41,119 @@ class BaseExtractor(ABC):
         if existing_url:
             identifier = self.extract_identifier_from_url(existing_url)
             if identifier:
-                logging.info(f"使用已有{self.platform_name}链接提取数据: {existing_url}")
-                return self.extract_by_identifier(anime, identifier)
+                logging.info("使用已有%s链接提取数据: %s", self.platform_name, existing_url)
+                success = self._extract_known(anime, identifier)
+                if success:
+                    self._record_mapping(anime, SOURCE_LINK)
+                return success
+
+        # 之前的运行（或其他表格）已确认过条目时，直接按链接提取（放送年份不符的条目不使用）
+        from utils.core.global_variables import get_allowed_years
+        mapping_store = get_id_mapping_store()
+        mapped_url = mapping_store.lookup(anime.original_name, self.platform_key, get_allowed_years())
+        if mapped_url:
+            identifier = self.extract_identifier_from_url(mapped_url)
+            if identifier:
+                logging.info("使用ID映射表中的%s条目提取数据: %s", self.platform_name, mapped_url)
+                if self._extract_mapped(anime, identifier):
+                    self._record_mapping(anime, SOURCE_SEARCH)
+                    return True
+                logging.warning("ID映射表中的%s条目不可用，回退到搜索: %s", self.platform_name, mapped_url)
+
+        # 本地目录中按标题找到唯一条目时，按条目提取（评分有效时不联网），省去搜索；
+        # 已预取季度目录时由季度目录匹配（列表数据带评分），不再查本地目录
+        catalog = get_local_catalog()
+        if catalog is not None and get_season_catalog(self.platform_key) is None:
+            identifier = catalog.find(self.platform_key, processed_name, get_allowed_years())
+            if identifier:
+                logging.info("在本地目录中找到%s条目: %s", self.platform_name, identifier)
+                if self._extract_known(anime, identifier):
+                    self._record_mapping(anime, SOURCE_SEARCH)
+                    return True
         
         # 如果没有链接，则进行搜索
-        logging.info(f"通过搜索获取{self.platform_name}数据: {processed_name}")
-        return self.extract_by_search(anime, processed_name)
+        logging.info("通过搜索获取%s数据: %s", self.platform_name, processed_name)
+        success = self.extract_by_search(anime, processed_name)
+        if success:
+            self._record_mapping(anime, SOURCE_SEARCH)
+            self._record_catalog(anime)
+        return success
+
+    def _extract_known(self, anime, identifier: str) -> bool:
+        """按条目标识提取：本地目录中评分仍有效时直接使用，否则联网并写回本地目录"""
+        catalog = get_local_catalog()
+        if catalog is not None and catalog.apply(anime, self.platform_key, identifier):
+            logging.info("使用本地目录中的%s条目数据: %s", self.platform_name, identifier)
+            return True
+        success = self.extract_by_identifier(anime, identifier)
+        if success:
+            self._record_catalog(anime)
+        return success
+
+    def _extract_mapped(self, anime, identifier: str) -> bool:
+        """
+        按ID映射表中的条目提取，并像搜索候选一样检查放送年份（映射表只按原名记录，同名的新作、重制版会指向旧条目）。
+        先提取到副本中，年份符合要求时才写回，不符合时anime保持不变、由调用方回退到搜索
+        Args:
+            anime: Anime对象
+            identifier: 条目标识
+        Returns:
+            bool: 是否提取成功且放送年份符合要求
+        """
+        from utils.core.global_variables import get_allowed_years
+
+        probe = copy.copy(anime)
+        before = dict(probe.__dict__)
+        if not self._extract_known(probe, identifier):
+            return False
+
+        year = str(getattr(probe, f"{self.platform_key}_subject_Date", '') or '')[:4]
+        if year and year not in get_allowed_years():
+            logging.warning("ID映射表中的%s条目 %s 放送年份 %s 不符合要求", self.platform_name, identifier, year)
+            return False
+
+        # 只写回本次提取修改的字段（其他平台可能在并发写入同一个Anime对象）
+        for attr, value in probe.__dict__.items():
+            if attr not in before or before[attr] is not value:
+                setattr(anime, attr, value)
+        return True
+
+    def mapping_url(self, anime) -> Optional[str]:
+        """
+        提取成功后写入ID映射表的条目链接（子类可覆盖以排除搜索链接等无法直接提取的链接）
+        Args:
+            anime: Anime对象
+        Returns:
+            str or None: 条目链接
+        """
+        url = getattr(anime, f"{self.platform_key}_url", None)
+        if url and self.extract_identifier_from_url(url):
+            return url
+        return None
+
+    def _record_mapping(self, anime, source: str) -> None:
+        """把成功提取的条目链接记录到ID映射表"""
+        try:
+            url = self.mapping_url(anime)
+            if url:
+                get_id_mapping_store().record(anime.original_name, self.platform_key, url, source=source,
+                                              date=getattr(anime, f"{self.platform_key}_subject_Date", ''))
+        except Exception as e:
+            logging.warning("记录%s ID映射失败: %s", self.platform_name, e)
     
+    def _record_catalog(self, anime) -> None:
+        """把联网提取成功的条目写入本地目录（表格原名作为额外的可检索标题）"""
+        catalog = get_local_catalog()
+        if catalog is None:
+            return
+        try:
+            url = self.mapping_url(anime)
+            identifier = self.extract_identifier_from_url(url) if url else None
+            if identifier:
+                catalog.record(self.platform_key, identifier, anime, titles=[anime.original_name])
+        except Exception as e:
+            logging.warning("记录%s本地目录条目失败: %s", self.platform_name, e)
+
     @abstractmethod
     def extract_identifier_from_url(self, url: str) -> Optional[str]:
         """从URL中提取标识符（ID等）"""
@@ -56,6 +174,7 @@ class CandidateValidator:
     """候选条目验证器，处理年份验证逻辑"""
     
     @staticmethod
+    @traced("validate_candidates")
     def validate_candidates(candidates: List[Any], 
                           extract_candidate_info: Callable,
                           platform_name: str,
@@ -94,17 +213,17 @@ class CandidateValidator:
                 if candidate_year and candidate_year in allowed_years:
                     candidate_found = True
                     selected_candidate = candidate_info
-                    logging.info(f"选中{platform_name}候选条目名称为 {candidate_name}，选中{platform_name}候选条目 {candidate_id}，放送年份: {candidate_year}")
+                    logging.info("选中%s候选条目名称为 %s，选中%s候选条目 %s，放送年份: %s", platform_name, candidate_name, platform_name, candidate_id, candidate_year)
                     break
                 else:
-                    logging.info(f"选中{platform_name}候选条目名称为 {candidate_name}，{platform_name}候选条目的放送年份 {candidate_year} 不符合要求")
+                    logging.info("选中%s候选条目名称为 %s，%s候选条目的放送年份 %s 不符合要求", platform_name, candidate_name, platform_name, candidate_year)
                     
             except Exception as e:
-                logging.warning(f"{platform_name}候选条目 {attempts} 处理失败: {e}")
+                logging.warning("%s候选条目 %s 处理失败: %s", platform_name, attempts, e)
                 continue
         
         if not candidate_found:
-            logging.error(f"尝试{max_attempts}次后，没有找到放送年份符合要求的 {platform_name} 候选条目")
+            logging.error("尝试%s次后，没有找到放送年份符合要求的 %s 候选条目", max_attempts, platform_name)
             return None
         
         return selected_candidate
@@ -152,25 +271,25 @@ class ExtractorLogger:
         total_attr = f"{platform_lower}_total"
         date_attr = f"{platform_lower}_subject_Date"
         
-        logging.info(f"{platform_name}链接: {getattr(anime, url_attr, 'N/A')}")
-        logging.info(f"{platform_name}名称: {getattr(anime, name_attr, 'N/A')}")
-        logging.info(f"{platform_name}评分: {getattr(anime, score_attr, 'N/A')}")
+        logging.info("%s链接: %s", platform_name, getattr(anime, url_attr, 'N/A'))
+        logging.info("%s名称: %s", platform_name, getattr(anime, name_attr, 'N/A'))
+        logging.info("%s评分: %s", platform_name, getattr(anime, score_attr, 'N/A'))
         
         # 记录评分人数（如果存在）
         total_value = getattr(anime, total_attr, None)
         if total_value:
-            logging.info(f"{platform_name}评分人数: {total_value}")
+            logging.info("%s评分人数: %s", platform_name, total_value)
         
         # 记录开播日期（如果存在）
         date_value = getattr(anime, date_attr, None)
         if date_value:
-            logging.info(f"{platform_name}开播日期: {date_value}")
+            logging.info("%s开播日期: %s", platform_name, date_value)
     
     @staticmethod
     def log_twitter_info(anime):
         """记录Twitter信息"""
         if hasattr(anime, 'twitter_username') and anime.twitter_username:
-            logging.info(f"Twitter账号: @{anime.twitter_username} ({getattr(anime, 'twitter_url', 'N/A')})")
+            logging.info("Twitter账号: @%s (%s)", anime.twitter_username, getattr(anime, 'twitter_url', 'N/A'))
 
 
 class DateExtractor:
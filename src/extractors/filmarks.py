@@ -2,21 +2,23 @@
 # 存放Filmarks数据提取逻辑
 
 import logging
-import unicodedata
-from difflib import SequenceMatcher
 from urllib.parse import quote, parse_qs, urlparse
 from typing import Optional, Dict, Any
 
 from .base_extractor import BaseExtractor, ExtractorErrorHandler
 from src.parsers.filmarks_parser import FilmarksParser, FilmarksApiParser, FilmarksDataSetter
 from src.parsers.link_parser import LinkParser
+from src.matching import normalize_title, relevance_score
 from utils.network.network import fetch_data_with_retry
 from utils.network.headers import FILMARKS_API_HEADERS, FILMARKS_HEADERS
 from utils.core.global_variables import get_allowed_years, get_desired_year
+from utils.core.profiling import traced
+from utils.network.endpoints import get_base_url
 
 
-FILMARKS_API_BASE_URL = "https://api.filmarks.com"
+# 条目链接始终使用线上地址；网页搜索地址可单独指向本地模拟服务器
 FILMARKS_WEB_BASE_URL = "https://filmarks.com"
+FILMARKS_SEARCH_PATH = "/search/animes"
 MAX_API_SEARCH_CANDIDATES = 10
 
 
@@ -27,6 +29,8 @@ class FilmarksExtractor(BaseExtractor):
         super().__init__("Filmarks")
         self.parser = FilmarksParser()
         self.api_parser = FilmarksApiParser()
+        self.api_base = get_base_url('MZZB_FILMARKS_API_BASE')
+        self.web_search_url = get_base_url('MZZB_FILMARKS_WEB_BASE') + FILMARKS_SEARCH_PATH
     
     def extract_identifier_from_url(self, url: str) -> Optional[str]:
         """从Filmarks URL中提取标识符"""
@@ -37,12 +41,19 @@ class FilmarksExtractor(BaseExtractor):
             return url
         return None
     
+    def mapping_url(self, anime) -> Optional[str]:
+        """Filmarks搜索链接不能直接定位条目，不写入ID映射表"""
+        url = super().mapping_url(anime)
+        if url and self._is_filmarks_search_url(url):
+            return None
+        return url
+
     def extract_by_identifier(self, anime, identifier: str) -> bool:
         """通过URL或season ID直接提取数据"""
         if self._is_filmarks_search_url(identifier):
             query = self._extract_query_from_search_url(identifier)
             if query:
-                logging.info(f"从Filmarks搜索链接提取搜索词: {query}")
+                logging.info("从Filmarks搜索链接提取搜索词: %s", query)
                 return self.extract_by_search(anime, query)
 
             logging.warning("Filmarks搜索链接缺少q参数，回退到网页解析")
@@ -56,7 +67,7 @@ class FilmarksExtractor(BaseExtractor):
             logging.warning("Filmarks API详情提取失败，回退到网页详情解析")
             return self._extract_by_web_url(anime, identifier)
 
-        logging.error(f"无法从Filmarks标识符提取season ID: {identifier}")
+        logging.error("无法从Filmarks标识符提取season ID: %s", identifier)
         return ExtractorErrorHandler.handle_request_error(anime, self.platform_key, "Request failed")
     
     def extract_by_search(self, anime, processed_name: str) -> bool:
@@ -80,7 +91,7 @@ class FilmarksExtractor(BaseExtractor):
     def _extract_by_api_search(self, anime, processed_name: str) -> bool:
         """通过Filmarks API搜索并提取详情数据"""
         search_data = self._fetch_api_json(
-            f"{FILMARKS_API_BASE_URL}/v2/anime/seasons",
+            f"{self.api_base}/v2/anime/seasons",
             params={'q': processed_name}
         )
         if not search_data:
@@ -99,37 +110,40 @@ class FilmarksExtractor(BaseExtractor):
         FilmarksDataSetter.set_parsed_data(anime, url, selected_candidate)
         return True
 
-    def _fetch_api_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
-        """请求Filmarks API并解析JSON"""
+    def _fetch_api_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                        revalidate: bool = False) -> Optional[Dict[str, Any]]:
+        """请求Filmarks API并解析JSON（revalidate：详情接口使用条件请求）"""
         response = fetch_data_with_retry(
             url,
             params=params,
             headers=FILMARKS_API_HEADERS.copy(),
-            use_cache=True
+            use_cache=True,
+            revalidate=revalidate
         )
         if not response or response.status_code != 200:
-            logging.error(f"Filmarks API请求失败: {url}")
+            logging.error("Filmarks API请求失败: %s", url)
             return None
 
         try:
             return response.json()
         except ValueError as e:
-            logging.error(f"Filmarks API JSON解析失败: {e}")
+            logging.error("Filmarks API JSON解析失败: %s", e)
             return None
 
     def _fetch_api_detail_data(self, season_id: str) -> Optional[Dict[str, Any]]:
         """获取并解析Filmarks API详情数据"""
-        data = self._fetch_api_json(f"{FILMARKS_API_BASE_URL}/v2/anime/seasons/{season_id}")
+        data = self._fetch_api_json(f"{self.api_base}/v2/anime/seasons/{season_id}", revalidate=True)
         if not data:
             return None
 
         parsed_data = self.api_parser.parse_detail(data)
         if not parsed_data:
-            logging.error(f"Filmarks API详情数据为空: {season_id}")
+            logging.error("Filmarks API详情数据为空: %s", season_id)
             return None
 
         return parsed_data
 
+    @traced("validate_candidates.filmarks")
     def _select_api_candidate(self, candidates: list, query: str) -> Optional[Dict[str, Any]]:
         """按年份和标题相关性选择Filmarks API候选条目"""
         allowed_years = get_allowed_years()
@@ -148,7 +162,7 @@ class FilmarksExtractor(BaseExtractor):
             candidate_id = candidate_info.get('id')
 
             if allowed_years and candidate_year not in allowed_years:
-                logging.info(f"跳过Filmarks候选条目名称为 {candidate_name}，Filmarks候选条目的放送年份 {candidate_year} 不符合要求")
+                logging.info("跳过Filmarks候选条目名称为 %s，Filmarks候选条目的放送年份 %s 不符合要求", candidate_name, candidate_year)
                 continue
 
             relevance_score = self._calculate_title_relevance(query, candidate)
@@ -170,7 +184,7 @@ class FilmarksExtractor(BaseExtractor):
                     best_candidate = candidate_info
             elif fallback_candidate is None:
                 fallback_candidate = candidate_info
-                logging.info(f"Filmarks候选条目名称为 {candidate_name}，标题未精确匹配，暂存为候选")
+                logging.info("Filmarks候选条目名称为 %s，标题未精确匹配，暂存为候选", candidate_name)
 
         selected_candidate = best_candidate or fallback_candidate
         if selected_candidate:
@@ -181,37 +195,14 @@ class FilmarksExtractor(BaseExtractor):
             )
             return selected_candidate
 
-        logging.error(f"尝试{MAX_API_SEARCH_CANDIDATES}次后，没有找到放送年份符合要求的 Filmarks 候选条目")
+        logging.error("尝试%s次后，没有找到放送年份符合要求的 Filmarks 候选条目", MAX_API_SEARCH_CANDIDATES)
         return None
 
     def _calculate_title_relevance(self, query: str, candidate: Dict[str, Any]) -> float:
         """计算搜索词与候选标题的相关性"""
-        normalized_query = self._normalize_title(query)
-        if not normalized_query:
+        if not normalize_title(query):
             return 1
-
-        best_score = 0
-        for title in self._candidate_title_values(candidate):
-            normalized_title = self._normalize_title(title)
-            if not normalized_title:
-                continue
-
-            length_diff = abs(len(normalized_title) - len(normalized_query))
-            if normalized_title == normalized_query:
-                score = 100
-            elif normalized_title.startswith(normalized_query):
-                score = max(60, 85 - min(length_diff, 25))
-            elif normalized_query in normalized_title:
-                score = max(45, 70 - min(length_diff, 25))
-            elif normalized_query.startswith(normalized_title):
-                score = max(35, 60 - min(length_diff, 25))
-            else:
-                similarity = SequenceMatcher(None, normalized_query, normalized_title).ratio()
-                score = similarity * 100 if similarity >= 0.85 else 0
-
-            best_score = max(best_score, score)
-
-        return best_score
+        return relevance_score(query, self._candidate_title_values(candidate))
 
     @staticmethod
     def _is_high_confidence_candidate(relevance_score: float, candidate_year: Optional[str]) -> bool:
@@ -230,15 +221,6 @@ class FilmarksExtractor(BaseExtractor):
         ]
         return [value for value in values if value]
 
-    @staticmethod
-    def _normalize_title(title: Any) -> str:
-        """归一化标题，降低标点和全半角差异带来的影响"""
-        if title is None:
-            return ""
-
-        normalized = unicodedata.normalize('NFKC', str(title)).lower()
-        return ''.join(char for char in normalized if char.isalnum())
-
     @staticmethod
     def _build_web_url(parsed_data: Dict[str, Any]) -> str:
         """根据API数据构造Filmarks网页URL"""
@@ -274,7 +256,11 @@ class FilmarksExtractor(BaseExtractor):
             return False
 
         parsed_url = urlparse(str(identifier))
-        return parsed_url.netloc == "filmarks.com" and parsed_url.path == "/search/animes"
+        if parsed_url.netloc == "filmarks.com" and parsed_url.path == FILMARKS_SEARCH_PATH:
+            return True
+        # 指向本地模拟服务器的网页搜索地址
+        search_url = urlparse(get_base_url('MZZB_FILMARKS_WEB_BASE') + FILMARKS_SEARCH_PATH)
+        return parsed_url.netloc == search_url.netloc and parsed_url.path == search_url.path
 
     @staticmethod
     def _extract_query_from_search_url(url: str) -> Optional[str]:
@@ -288,7 +274,7 @@ class FilmarksExtractor(BaseExtractor):
     def _extract_by_web_search(self, anime, processed_name: str) -> bool:
         """通过Filmarks网页搜索兜底提取数据"""
         keyword_encoded = quote(processed_name)
-        search_url = f"https://filmarks.com/search/animes?q={keyword_encoded}"
+        search_url = f"{self.web_search_url}?q={keyword_encoded}"
         return self._extract_by_web_url(anime, search_url)
     
     def _extract_by_web_url(self, anime, url: str) -> bool:
@@ -300,10 +286,10 @@ class FilmarksExtractor(BaseExtractor):
         Returns:
             bool: 是否成功提取数据
         """
-        response = fetch_data_with_retry(url, headers=FILMARKS_HEADERS.copy())
+        response = fetch_data_with_retry(url, headers=FILMARKS_HEADERS.copy(), revalidate=True)
         
         if not response or response.status_code != 200:
-            logging.error(f"Filmarks页面请求失败: {url}")
+            logging.error("Filmarks页面请求失败: %s", url)
             return ExtractorErrorHandler.handle_request_error(anime, self.platform_key, "Request failed")
         
         try:
@@ -316,7 +302,7 @@ class FilmarksExtractor(BaseExtractor):
             return True
             
         except Exception as e:
-            logging.error(f"Filmarks数据提取失败: {e}")
+            logging.error("Filmarks数据提取失败: %s", e)
             return ExtractorErrorHandler.handle_parse_error(anime, self.platform_key, "Parse error")
 
 
@@ -2,32 +2,32 @@
 # 存放MyAnimeList数据提取逻辑
 
 import logging
-import re
-import unicodedata
-from difflib import SequenceMatcher
 from urllib.parse import quote
 from typing import Optional, Dict, Any
 
-from lxml import html
-
 from .base_extractor import BaseExtractor, ExtractorErrorHandler
 from src.parsers.myanimelist_parser import MyAnimeListParser, MyAnimeListDataSetter
 from src.parsers.link_parser import LinkParser
+from src.matching import is_relevant_title
 from utils.core.myanimelist_config import get_myanimelist_api_config
+from utils.core.profiling import traced
 from utils.date.date_processors import MyAnimeListDateProcessor
 from utils.network.network import fetch_data_with_retry
+from utils.network.endpoints import get_base_url
 
 
 class MyAnimeListExtractor(BaseExtractor):
     """MyAnimeList数据提取器"""
 
-    API_BASE = "https://api.myanimelist.net/v2"
     DETAIL_FIELDS = "id,title,alternative_titles,start_date,mean,num_scoring_users"
 
     def __init__(self):
         super().__init__("MyAnimeList")
         self.parser = MyAnimeListParser()
         self.score_key = "mal"
+        # 基础地址可通过环境变量指向本地模拟服务器
+        self.api_base = get_base_url('MZZB_MAL_API_BASE')
+        self.web_base = get_base_url('MZZB_MAL_WEB_BASE')
 
     def extract_identifier_from_url(self, url: str) -> Optional[str]:
         """从MyAnimeList URL中提取anime ID"""
@@ -100,21 +100,22 @@ class MyAnimeListExtractor(BaseExtractor):
         if not headers:
             return None
 
-        detail_url = f"{self.API_BASE}/anime/{anime_id}"
+        detail_url = f"{self.api_base}/anime/{anime_id}"
         response = fetch_data_with_retry(
             detail_url,
             params={"fields": self.DETAIL_FIELDS},
             headers=headers,
+            revalidate=True,
         )
 
         if not response:
-            logging.error(f"MyAnimeList条目 {anime_id} 请求失败")
+            logging.error("MyAnimeList条目 %s 请求失败", anime_id)
             return None
 
         try:
             return response.json()
         except Exception as e:
-            logging.error(f"MyAnimeList条目 {anime_id} JSON解析失败: {e}")
+            logging.error("MyAnimeList条目 %s JSON解析失败: %s", anime_id, e)
             return None
 
     def _search_candidates(self, processed_name: str) -> Optional[list]:
@@ -123,7 +124,7 @@ class MyAnimeListExtractor(BaseExtractor):
         if not headers:
             return None
 
-        search_url = f"{self.API_BASE}/anime"
+        search_url = f"{self.api_base}/anime"
         response = fetch_data_with_retry(
             search_url,
             params={
@@ -142,7 +143,7 @@ class MyAnimeListExtractor(BaseExtractor):
             search_result = response.json()
             return search_result.get("data", [])
         except Exception as e:
-            logging.error(f"MyAnimeList搜索结果JSON解析失败: {e}")
+            logging.error("MyAnimeList搜索结果JSON解析失败: %s", e)
             return None
 
     def _search_web_candidate_urls(self, processed_name: str) -> Optional[list]:
@@ -153,20 +154,23 @@ class MyAnimeListExtractor(BaseExtractor):
         提取条目链接/ID，评分、人数、日期仍统一由官方API详情接口获取。
         """
         keyword_encoded = quote(processed_name)
-        search_url = f"https://myanimelist.net/anime.php?q={keyword_encoded}&cat=anime"
-        response = fetch_data_with_retry(search_url)
+        search_url = f"{self.web_base}/anime.php?q={keyword_encoded}&cat=anime"
+        response = fetch_data_with_retry(search_url, revalidate=True)
 
         if not response or response.status_code != 200:
             logging.warning("MyAnimeList网页搜索请求失败")
             return None
 
+        # lxml较重，只在走网页搜索兜底时导入
+        from lxml import html
+
         try:
             mal_tree = html.fromstring(response.content)
             candidate_elements = mal_tree.xpath(
                 "//table[@border='0' and @cellpadding='0' and @cellspacing='0' and @width='100%']/tr"
             )
         except Exception as e:
-            logging.error(f"MyAnimeList网页搜索结果解析失败: {e}")
+            logging.error("MyAnimeList网页搜索结果解析失败: %s", e)
             return None
 
         if not candidate_elements or len(candidate_elements) <= 1:
@@ -236,7 +240,7 @@ class MyAnimeListExtractor(BaseExtractor):
 
         parsed_date = MyAnimeListDateProcessor.parse(extracted_data.get("aired_date"))
         if not parsed_date:
-            logging.info(f"MyAnimeList候选条目 {candidate_id} 没有可验证的开播日期")
+            logging.info("MyAnimeList候选条目 %s 没有可验证的开播日期", candidate_id)
             return None
 
         candidate_year = parsed_date[:4]
@@ -250,6 +254,7 @@ class MyAnimeListExtractor(BaseExtractor):
             "data": api_data,
         }
 
+    @traced("validate_candidates.myanimelist")
     def _validate_candidates(
         self,
         candidates,
@@ -301,7 +306,7 @@ class MyAnimeListExtractor(BaseExtractor):
                 )
 
             except Exception as e:
-                logging.warning(f"{self.platform_name}候选条目 {attempts} 处理失败: {e}")
+                logging.warning("%s候选条目 %s 处理失败: %s", self.platform_name, attempts, e)
                 continue
 
         if log_failure:
@@ -313,29 +318,7 @@ class MyAnimeListExtractor(BaseExtractor):
 
     def _is_relevant_candidate(self, expected_name: Optional[str], api_data: Dict[str, Any]) -> bool:
         """判断MAL API候选标题是否与查询名相关，避免只因年份合法而误选"""
-        expected_norm = self._normalize_title_text(expected_name)
-        if not expected_norm:
-            return True
-
-        for title in self._candidate_title_values(api_data):
-            title_norm = self._normalize_title_text(title)
-            if not title_norm:
-                continue
-
-            if expected_norm == title_norm:
-                return True
-
-            if len(expected_norm) >= 4 and expected_norm in title_norm:
-                return True
-
-            if len(title_norm) >= 4 and title_norm in expected_norm:
-                return True
-
-            similarity = SequenceMatcher(None, expected_norm, title_norm).ratio()
-            if similarity >= 0.72:
-                return True
-
-        return False
+        return is_relevant_title(expected_name, self._candidate_title_values(api_data))
 
     @staticmethod
     def _candidate_title_values(api_data: Dict[str, Any]) -> list:
@@ -357,15 +340,6 @@ class MyAnimeListExtractor(BaseExtractor):
 
         return titles
 
-    @staticmethod
-    def _normalize_title_text(value: Optional[str]) -> str:
-        """标准化标题用于候选相关性比对"""
-        if not value:
-            return ""
-
-        text = unicodedata.normalize("NFKC", str(value)).lower()
-        return re.sub(r"[\s\-_~:：;；,，、。.!！?？'\"“”‘’\[\]【】()（）/\\|・･☆★♪…·]", "", text)
-
     def _set_api_data(self, anime, api_data: Dict[str, Any]) -> bool:
         """将API数据写入Anime对象"""
         try:
@@ -376,14 +350,14 @@ class MyAnimeListExtractor(BaseExtractor):
 
             parsed_date = MyAnimeListDateProcessor.parse(extracted_data.get("aired_date"))
             if extracted_data.get("aired_date") and not parsed_date:
-                logging.warning(f"MyAnimeList日期格式不匹配: {extracted_data.get('aired_date')}")
+                logging.warning("MyAnimeList日期格式不匹配: %s", extracted_data.get('aired_date'))
 
             url = api_data.get("_mal_url") or f"https://myanimelist.net/anime/{anime_id}"
             MyAnimeListDataSetter.set_extracted_data(anime, url, extracted_data, parsed_date)
             return True
 
         except Exception as e:
-            logging.error(f"MyAnimeList数据提取失败: {e}")
+            logging.error("MyAnimeList数据提取失败: %s", e)
             return ExtractorErrorHandler.handle_parse_error(anime, self.score_key, "Parse error")
 
 
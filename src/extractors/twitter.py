@@ -5,23 +5,44 @@ import logging
 import time
 from typing import Optional
 
-try:
-    from Scweet import Scweet, ScweetConfig
-    from Scweet import ScweetError, AccountPoolExhausted, AuthError, NetworkError
-    SCWEET_AVAILABLE = True
-except ImportError:
-    SCWEET_AVAILABLE = False
-    logging.warning("Scweet库未安装，Twitter粉丝数获取功能将被禁用。请运行: pip install -U Scweet")
-
+from utils.core.metrics import get_metrics
 from utils.core.twitter_config import get_twitter_config
-from utils.network.proxy_config import get_global_proxy
+from utils.network.proxy_config import get_global_proxy, report_route_failure
+from utils.network.replay import recorded_call, is_replay_mode, ReplayMissError
+
+# Scweet 及其依赖（curl_cffi 等）导入较慢，延迟到第一次真正需要时再导入
+_scweet_module = None
+_scweet_checked = False
+
+
+def _load_scweet():
+    """
+    导入Scweet模块（只尝试一次）
+    Returns:
+        module or None: Scweet模块，未安装时返回None
+    """
+    global _scweet_module, _scweet_checked
+    if not _scweet_checked:
+        _scweet_checked = True
+        try:
+            import Scweet
+            _scweet_module = Scweet
+        except ImportError:
+            _scweet_module = None
+            logging.warning("Scweet库未安装，Twitter粉丝数获取功能将被禁用。请运行: pip install -U Scweet")
+    return _scweet_module
+
+
+def is_scweet_available() -> bool:
+    """检查Scweet库是否可用（首次调用时才会导入）"""
+    return _load_scweet() is not None
 
 
 class TwitterFollowersAPI:
     """Twitter粉丝数据获取API封装（基于Scweet）"""
 
     def __init__(self):
-        self._scweet: Optional["Scweet"] = None
+        self._scweet = None
         self.is_initialized = False
         self.last_error: Optional[str] = None
         self.twitter_config = get_twitter_config()
@@ -37,7 +58,7 @@ class TwitterFollowersAPI:
 
     def _should_skip(self) -> bool:
         """检查是否应该跳过Twitter功能"""
-        if not SCWEET_AVAILABLE:
+        if not is_scweet_available():
             logging.debug("Scweet库未安装，跳过Twitter粉丝数获取")
             return True
 
@@ -85,12 +106,13 @@ class TwitterFollowersAPI:
                 config_kwargs['proxy'] = proxy_url
                 
             # 关闭 Scweet 自身的详细日志（由项目的 logging 接管）
-            scweet_config = ScweetConfig(**config_kwargs) if config_kwargs else None
+            scweet = _load_scweet()
+            scweet_config = scweet.ScweetConfig(**config_kwargs) if config_kwargs else None
 
             if scweet_config:
-                self._scweet = Scweet(auth_token=auth_token, config=scweet_config)
+                self._scweet = scweet.Scweet(auth_token=auth_token, config=scweet_config)
             else:
-                self._scweet = Scweet(auth_token=auth_token)
+                self._scweet = scweet.Scweet(auth_token=auth_token)
 
             self.is_initialized = True
             logging.info("Scweet Twitter API 初始化成功")
@@ -144,18 +166,28 @@ class TwitterFollowersAPI:
             return None
 
         # 检查缓存
+        metrics = get_metrics()
         cached = self._get_from_cache(clean_username)
+        metrics.record_cache('twitter', 'get_user_info', hit=cached is not None)
         if cached is not None:
             return cached
 
-        # 确保已初始化
-        if not self._initialize():
+        # 确保已初始化（回放模式下使用录制的结果，不需要真实的Scweet会话）
+        if not is_replay_mode() and not self._initialize():
             return None
 
         try:
             logging.info(f"正在获取 @{clean_username} 的粉丝数...")
             # Scweet.get_user_info 是同步方法，返回 list[dict]
-            results = self._scweet.get_user_info([clean_username])
+            started = time.perf_counter()
+            try:
+                results = recorded_call('scweet', f'get_user_info:{clean_username}',
+                                        lambda: self._scweet.get_user_info([clean_username]))
+            except Exception as e:
+                if not isinstance(e, ReplayMissError):
+                    metrics.record_request('twitter', 'get_user_info', type(e).__name__, time.perf_counter() - started)
+                raise
+            metrics.record_request('twitter', 'get_user_info', 200, time.perf_counter() - started)
 
             if not results:
                 logging.warning(f"无法获取 @{clean_username} 的用户信息（返回为空）")
@@ -173,19 +205,23 @@ class TwitterFollowersAPI:
             self._save_to_cache(clean_username, followers_count)
             return followers_count
 
-        except AuthError as e:
-            logging.error(f"Twitter 认证失败，请刷新 auth_token: {e}")
-            # 认证失败时禁用功能，避免后续每个动画都触发同样错误
-            self.twitter_config.disable_with_reason(f"auth_token 已失效: {e}")
-            return None
-        except AccountPoolExhausted as e:
-            logging.warning(f"Twitter 账号已达到限额或冷却中: {e}")
-            return None
-        except NetworkError as e:
-            logging.error(f"Twitter 网络连接失败: {e}")
+        except ReplayMissError as e:
+            logging.warning(f"{e}")
             return None
         except Exception as e:
-            logging.error(f"获取 @{clean_username} 粉丝数时出错: {e}")
+            scweet = _load_scweet()
+            if isinstance(e, scweet.AuthError):
+                logging.error(f"Twitter 认证失败，请刷新 auth_token: {e}")
+                # 认证失败时禁用功能，避免后续每个动画都触发同样错误
+                self.twitter_config.disable_with_reason(f"auth_token 已失效: {e}")
+            elif isinstance(e, scweet.AccountPoolExhausted):
+                logging.warning(f"Twitter 账号已达到限额或冷却中: {e}")
+            elif isinstance(e, scweet.NetworkError):
+                logging.error(f"Twitter 网络连接失败: {e}")
+                if get_global_proxy():
+                    report_route_failure(f"Twitter 网络连接失败: {e}")
+            else:
+                logging.error(f"获取 @{clean_username} 粉丝数时出错: {e}")
             return None
 
     def get_followers_with_retry(self, username: str) -> Optional[int]:
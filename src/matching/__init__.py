@@ -0,0 +1,29 @@
+# src/matching/__init__.py
+# 标题匹配模块：各平台提取器共用的标题归一化与相似度计算
+
+from .title_matcher import (
+    normalize_title,
+    normalize_title_punctuation,
+    title_ngrams,
+    similarity,
+    sequence_ratio,
+    best_similarity,
+    is_relevant_title,
+    relevance_score,
+    rank_candidates,
+)
+from .title_index import TitleIndex, TitleMatch
+
+__all__ = [
+    'normalize_title',
+    'normalize_title_punctuation',
+    'title_ngrams',
+    'similarity',
+    'sequence_ratio',
+    'best_similarity',
+    'is_relevant_title',
+    'relevance_score',
+    'rank_candidates',
+    'TitleIndex',
+    'TitleMatch',
+]
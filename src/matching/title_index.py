@@ -0,0 +1,224 @@
+# src/matching/title_index.py
+# 本地标题倒排索引：对归一化标题（含日文、英文标题和别名）建立字符三元组倒排表，支持Top-K检索和落盘
+#
+# 检索时只累加与查询共享三元组的标题，按三元组集合的 Dice 系数 2·|Q∩T| / (|Q|+|T|) 打分，
+# 不再对整个本地目录逐条计算相似度。
+
+import heapq
+import json
+import logging
+import os
+from collections import Counter, namedtuple
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional
+
+from .title_matcher import normalize_title
+
+INDEX_FORMAT_VERSION = 1
+
+# 首尾填充字符：归一化标题只包含文字和数字，不会与填充字符冲突
+PAD_START = '^'
+PAD_END = '$'
+
+TitleMatch = namedtuple('TitleMatch', ['entry_id', 'score', 'title', 'data'])
+TitleMatch.__doc__ = "检索结果：条目ID、得分（0~1）、命中的原始标题、条目附带数据"
+
+
+def padded_ngrams(normalized: str, n: int = 3) -> frozenset:
+    """
+    获取带首尾填充的字符n元组集合，短标题（1~2个字）也能产生可检索的元组
+    Args:
+        normalized: 归一化后的标题
+        n: 元组长度
+    Returns:
+        frozenset: n元组集合
+    """
+    if not normalized:
+        return frozenset()
+    padded = PAD_START * (n - 1) + normalized + PAD_END * (n - 1)
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+class TitleIndex:
+    """
+    标题三元组倒排索引
+
+    每个条目（entry_id）可以有多个标题（主标题、日文/英文标题、别名），检索结果按条目去重，
+    取该条目得分最高的标题。
+    """
+
+    def __init__(self, n: int = 3):
+        """
+        Args:
+            n: n元组长度（默认三元组）
+        """
+        self.n = n
+        self._entry_ids: List[Hashable] = []
+        self._entry_data: List[Any] = []
+        self._entry_titles: List[Dict[str, str]] = []  # 归一化标题 -> 原始标题
+        self._entry_positions: Dict[Hashable, int] = {}
+        # 标题表：(条目位置, 原始标题, 元组个数)
+        self._titles: List[tuple] = []
+        # 倒排表：元组 -> 标题位置列表
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entry_ids)
+
+    def __contains__(self, entry_id) -> bool:
+        return entry_id in self._entry_positions
+
+    @property
+    def title_count(self) -> int:
+        """已索引的标题总数"""
+        return len(self._titles)
+
+    def add(self, entry_id: Hashable, titles: Iterable[Any], data: Any = None) -> None:
+        """
+        添加条目；同一entry_id重复添加时合并标题，data不为None时覆盖原数据
+        Args:
+            entry_id: 条目ID（需可JSON序列化，如平台ID）
+            titles: 条目的所有可比对标题
+            data: 条目附带数据（需可JSON序列化）
+        """
+        position = self._entry_positions.get(entry_id)
+        if position is None:
+            position = len(self._entry_ids)
+            self._entry_positions[entry_id] = position
+            self._entry_ids.append(entry_id)
+            self._entry_data.append(data)
+            self._entry_titles.append({})
+        elif data is not None:
+            self._entry_data[position] = data
+
+        known_titles = self._entry_titles[position]
+        for title in titles:
+            normalized = normalize_title(title)
+            if not normalized or normalized in known_titles:
+                continue
+            known_titles[normalized] = str(title)
+
+            grams = padded_ngrams(normalized, self.n)
+            title_position = len(self._titles)
+            self._titles.append((position, str(title), len(grams)))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(title_position)
+
+    def get(self, entry_id: Hashable, default: Any = None) -> Any:
+        """获取条目附带数据"""
+        position = self._entry_positions.get(entry_id)
+        return default if position is None else self._entry_data[position]
+
+    def titles_of(self, entry_id: Hashable) -> List[str]:
+        """获取条目已索引的原始标题"""
+        position = self._entry_positions.get(entry_id)
+        return [] if position is None else list(self._entry_titles[position].values())
+
+    def entries(self) -> Iterator[tuple]:
+        """遍历所有条目：(entry_id, 原始标题列表, 附带数据)"""
+        for position, entry_id in enumerate(self._entry_ids):
+            yield entry_id, list(self._entry_titles[position].values()), self._entry_data[position]
+
+    def search(self, query: Any, k: int = 5, min_score: float = 0.3) -> List[TitleMatch]:
+        """
+        检索与查询最相似的K个条目
+        Args:
+            query: 查询标题
+            k: 返回条目数
+            min_score: 最低得分（0~1）
+        Returns:
+            list[TitleMatch]: 按得分降序排列的结果
+        """
+        normalized = normalize_title(query)
+        if not normalized or not self._titles:
+            return []
+
+        query_grams = padded_ngrams(normalized, self.n)
+        query_size = len(query_grams)
+
+        # 累加每个标题与查询共享的元组数（Counter.update 在C层完成计数）
+        hits = Counter()
+        for gram in query_grams:
+            posting = self._postings.get(gram)
+            if posting:
+                hits.update(posting)
+
+        best_by_entry: Dict[int, tuple] = {}
+        for title_position, shared in hits.items():
+            entry_position, title, gram_count = self._titles[title_position]
+            score = 2 * shared / (query_size + gram_count)
+            if score < min_score:
+                continue
+            current = best_by_entry.get(entry_position)
+            if current is None or score > current[0]:
+                best_by_entry[entry_position] = (score, title)
+
+        top = heapq.nlargest(k, best_by_entry.items(), key=lambda item: item[1][0])
+        return [
+            TitleMatch(self._entry_ids[position], round(score, 4), title, self._entry_data[position])
+            for position, (score, title) in top
+        ]
+
+    def best(self, query: Any, min_score: float = 0.3) -> Optional[TitleMatch]:
+        """检索得分最高的条目，没有时返回None"""
+        results = self.search(query, k=1, min_score=min_score)
+        return results[0] if results else None
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        """导出为可JSON序列化的字典（只保存条目，倒排表在加载时重建）"""
+        return {
+            'version': INDEX_FORMAT_VERSION,
+            'n': self.n,
+            'entries': [
+                {'id': entry_id, 'titles': list(titles.values()), 'data': data}
+                for entry_id, titles, data in zip(self._entry_ids, self._entry_titles, self._entry_data)
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> 'TitleIndex':
+        """从 to_dict() 的结果重建索引"""
+        if payload.get('version') != INDEX_FORMAT_VERSION:
+            raise ValueError(f"不支持的标题索引版本: {payload.get('version')}")
+
+        index = cls(n=payload.get('n', 3))
+        for entry in payload.get('entries', []):
+            index.add(entry['id'], entry.get('titles', []), entry.get('data'))
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        保存索引到JSON文件（先写临时文件再替换，避免中断时留下损坏的文件）
+        Args:
+            path: 文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logging.debug(f"标题索引已保存: {path}（{len(self)} 个条目，{self.title_count} 个标题）")
+
+    @classmethod
+    def load(cls, path: str) -> Optional['TitleIndex']:
+        """
+        从JSON文件加载索引
+        Args:
+            path: 文件路径
+        Returns:
+            TitleIndex or None: 文件不存在或损坏时返回None
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            return cls.from_dict(payload)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"标题索引文件 {path} 读取失败: {e}")
+            return None
@@ -0,0 +1,272 @@
+# src/matching/title_matcher.py
+# 标题匹配引擎：统一的标题归一化（带缓存）与相似度计算
+#
+# 两种相似度：
+#   - similarity()：字符二元组多重集的 Dice 系数 2·|A∩B| / (|A|+|B|)，计算量与标题长度成线性关系，
+#     用于在大量标题中粗筛、排序（best_similarity、倒排索引）。
+#   - sequence_ratio()：difflib.SequenceMatcher 的 ratio，用于最终的接受判断（is_relevant_title、relevance_score）。
+#     MAL_RELEVANCE_THRESHOLD / FUZZY_RELEVANCE_THRESHOLD 是按 ratio 标定的；Dice 在同一对标题上通常低 0.01~0.3，
+#     不能直接套用这两个阈值。ratio 计算前先用 real_quick_ratio / quick_ratio（ratio 的上界）预筛。
+# 两者比较前都先用长度上界 2·min(|A|,|B|) / (|A|+|B|) 预筛。
+#
+# MAL 相关性判断沿用原来的归一化（只去除空白和常见标点，保留 ×、△、& 等符号），其余场景只保留文字和数字。
+# 判断结果的回归用例见 unit_test/test_title_matcher.py。
+
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Sequence, Tuple
+
+# 归一化/二元组缓存容量：覆盖本地番剧目录（数千条标题及别名）
+NORMALIZE_CACHE_SIZE = 65536
+
+# 各提取器原先使用的相似度阈值（按 SequenceMatcher.ratio 标定）
+MAL_RELEVANCE_THRESHOLD = 0.72
+FUZZY_RELEVANCE_THRESHOLD = 0.85
+
+# 子串包含判断时要求的最短标题长度，避免过短标题误命中
+MIN_CONTAINMENT_LENGTH = 4
+
+# MAL 相关性判断去除的空白和标点
+MAL_PUNCTUATION = re.compile(r"[\s\-_~:：;；,，、。.!！?？'\"“”‘’\[\]【】()（）/\\|・･☆★♪…·]")
+
+
+def normalize_title(value: Any) -> str:
+    """
+    归一化标题：NFKC（全半角统一）、转小写、去除空白和标点，只保留文字和数字
+    Args:
+        value: 原始标题（None或空值返回空字符串）
+    Returns:
+        str: 归一化后的标题
+    """
+    if value is None:
+        return ""
+    return _normalize_cached(str(value))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(text: str) -> str:
+    normalized = unicodedata.normalize('NFKC', text).lower()
+    return ''.join(char for char in normalized if char.isalnum())
+
+
+def normalize_title_punctuation(value: Any) -> str:
+    """
+    MAL 相关性判断使用的归一化：NFKC、转小写、只去除空白和常见标点
+    Args:
+        value: 原始标题（None或空值返回空字符串）
+    Returns:
+        str: 归一化后的标题
+    """
+    if not value:
+        return ""
+    return _strip_punctuation_cached(str(value))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _strip_punctuation_cached(text: str) -> str:
+    return MAL_PUNCTUATION.sub("", unicodedata.normalize('NFKC', text).lower())
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def title_ngrams(normalized: str, n: int = 2) -> Counter:
+    """
+    获取归一化标题的字符n元组多重集（结果会被缓存，调用方不要修改）
+    Args:
+        normalized: 归一化后的标题
+        n: 元组长度，标题短于n时退化为整个标题
+    Returns:
+        Counter: n元组 -> 出现次数
+    """
+    if len(normalized) < n:
+        return Counter([normalized]) if normalized else Counter()
+    return Counter(normalized[i:i + n] for i in range(len(normalized) - n + 1))
+
+
+def _gram_count(normalized: str, n: int = 2) -> int:
+    """n元组个数（无需真正切分）"""
+    if not normalized:
+        return 0
+    return max(1, len(normalized) - n + 1)
+
+
+def similarity(a: str, b: str, min_score: float = 0.0) -> float:
+    """
+    计算两个已归一化标题的相似度（0~1）
+    Args:
+        a: 归一化标题
+        b: 归一化标题
+        min_score: 预筛阈值，可证明达不到该值时直接返回0
+    Returns:
+        float: Dice 相似度
+    """
+    if a == b:
+        return 1.0 if a else 0.0
+    if not a or not b:
+        return 0.0
+
+    count_a, count_b = _gram_count(a), _gram_count(b)
+    total = count_a + count_b
+    if 2 * min(count_a, count_b) < min_score * total:
+        return 0.0
+
+    grams_a, grams_b = title_ngrams(a), title_ngrams(b)
+    if len(grams_a) > len(grams_b):
+        grams_a, grams_b = grams_b, grams_a
+    overlap = sum(min(count, grams_b[gram]) for gram, count in grams_a.items() if gram in grams_b)
+    return 2 * overlap / total
+
+
+def sequence_ratio(a: str, b: str, min_score: float = 0.0) -> float:
+    """
+    计算两个已归一化标题的 SequenceMatcher 相似度（0~1，接受判断使用）
+    Args:
+        a: 归一化标题
+        b: 归一化标题
+        min_score: 预筛阈值，上界达不到该值时直接返回0
+    Returns:
+        float: SequenceMatcher.ratio
+    """
+    if a == b:
+        return 1.0 if a else 0.0
+    if not a or not b:
+        return 0.0
+
+    matcher = SequenceMatcher(None, a, b)
+    if matcher.real_quick_ratio() < min_score or matcher.quick_ratio() < min_score:
+        return 0.0
+    return matcher.ratio()
+
+
+def best_similarity(query: Any, titles: Iterable[Any], min_score: float = 0.0) -> float:
+    """
+    查询标题与一组候选标题（主标题、日文/英文标题、别名）的最高相似度
+    Args:
+        query: 查询标题（原始或已归一化均可）
+        titles: 候选标题序列
+        min_score: 预筛阈值
+    Returns:
+        float: 最高相似度
+    """
+    normalized_query = normalize_title(query)
+    best = 0.0
+    for title in titles:
+        best = max(best, similarity(normalized_query, normalize_title(title), max(min_score, best)))
+        if best >= 1.0:
+            break
+    return best
+
+
+def is_relevant_title(query: Any, titles: Iterable[Any], threshold: float = MAL_RELEVANCE_THRESHOLD) -> bool:
+    """
+    判断候选标题中是否有与查询相关的标题（MAL）：完全相等、足够长的互相包含，或 SequenceMatcher 相似度达到阈值
+    Args:
+        query: 查询标题
+        titles: 候选标题序列
+        threshold: 相似度阈值
+    Returns:
+        bool: 是否相关（查询为空时视为相关）
+    """
+    normalized_query = normalize_title_punctuation(query)
+    if not normalized_query:
+        return True
+
+    for title in titles:
+        normalized_title = normalize_title_punctuation(title)
+        if not normalized_title:
+            continue
+
+        if normalized_query == normalized_title:
+            return True
+        if len(normalized_query) >= MIN_CONTAINMENT_LENGTH and normalized_query in normalized_title:
+            return True
+        if len(normalized_title) >= MIN_CONTAINMENT_LENGTH and normalized_title in normalized_query:
+            return True
+        if sequence_ratio(normalized_query, normalized_title, threshold) >= threshold:
+            return True
+
+    return False
+
+
+def relevance_score(query: Any, titles: Iterable[Any], fuzzy_threshold: float = FUZZY_RELEVANCE_THRESHOLD) -> float:
+    """
+    计算查询与候选标题的分级相关性得分（0~100）
+    完全相等100；候选以查询开头60~85；候选包含查询45~70；查询以候选开头35~60（均随长度差递减）；
+    其余情况 SequenceMatcher 相似度达到 fuzzy_threshold 时为 相似度×100，否则为0
+    Args:
+        query: 查询标题
+        titles: 候选标题序列
+        fuzzy_threshold: 模糊匹配的最低相似度
+    Returns:
+        float: 最高得分（查询为空时返回0）
+    """
+    normalized_query = normalize_title(query)
+    if not normalized_query:
+        return 0
+
+    best_score = 0
+    for title in titles:
+        normalized_title = normalize_title(title)
+        if not normalized_title:
+            continue
+
+        length_diff = abs(len(normalized_title) - len(normalized_query))
+        if normalized_title == normalized_query:
+            return 100
+        elif normalized_title.startswith(normalized_query):
+            score = max(60, 85 - min(length_diff, 25))
+        elif normalized_query in normalized_title:
+            score = max(45, 70 - min(length_diff, 25))
+        elif normalized_query.startswith(normalized_title):
+            score = max(35, 60 - min(length_diff, 25))
+        else:
+            ratio = sequence_ratio(normalized_query, normalized_title, fuzzy_threshold)
+            score = ratio * 100 if ratio >= fuzzy_threshold else 0
+
+        best_score = max(best_score, score)
+
+    return best_score
+
+
+def rank_candidates(query: Any, candidates: Sequence[Any],
+                    title_getter: Callable[[Any], Iterable[Any]]) -> List[Any]:
+    """
+    按标题相关性对搜索候选稳定排序（得分相同的保持搜索接口原有顺序）
+    Args:
+        query: 查询标题
+        candidates: 候选条目
+        title_getter: 从候选条目取出可比对标题的函数
+    Returns:
+        list: 排序后的候选条目
+    """
+    if not candidates or not normalize_title(query):
+        return list(candidates or [])
+
+    scored: List[Tuple[float, Any]] = []
+    for candidate in candidates:
+        try:
+            score = relevance_score(query, title_getter(candidate))
+        except Exception:
+            score = 0
+        scored.append((score, candidate))
+
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [candidate for _, candidate in scored]
+
+
+def clear_caches() -> None:
+    """清空归一化和n元组缓存"""
+    _normalize_cached.cache_clear()
+    _strip_punctuation_cached.cache_clear()
+    title_ngrams.cache_clear()
+
+
+def cache_info() -> dict:
+    """归一化缓存的命中统计（用于基准测试）"""
+    return {
+        'normalize': _normalize_cached.cache_info()._asdict(),
+        'punctuation': _strip_punctuation_cached.cache_info()._asdict(),
+        'ngrams': title_ngrams.cache_info()._asdict(),
+    }
@@ -1,12 +1,10 @@
 """
 业务相关解析器模块
+
+解析器在首次访问时才导入（FilmarksParser 依赖 lxml），避免拖慢程序启动。
 """
 
-from .base_parser import BaseParser
-from .twitter_parser import TwitterParser
-from .link_parser import LinkParser
-from .myanimelist_parser import MyAnimeListParser, MyAnimeListDataSetter
-from .filmarks_parser import FilmarksParser, FilmarksApiParser
+import importlib
 
 __all__ = [
     'BaseParser',
@@ -17,3 +15,29 @@ __all__ = [
     'FilmarksParser',
     'FilmarksApiParser'
 ] 
+
+# 名称 -> 所在子模块（相对于当前包）
+_LAZY_IMPORTS = {
+    'BaseParser': '.base_parser',
+    'TwitterParser': '.twitter_parser',
+    'LinkParser': '.link_parser',
+    'MyAnimeListParser': '.myanimelist_parser',
+    'MyAnimeListDataSetter': '.myanimelist_parser',
+    'FilmarksParser': '.filmarks_parser',
+    'FilmarksApiParser': '.filmarks_parser',
+}
+
+
+def __getattr__(name):
+    """首次访问导出名称时导入对应子模块，并缓存到包命名空间"""
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -30,21 +30,21 @@ class BaseParser(ABC):
         """
         pass
     
-    def log_info(self, message: str):
-        """记录信息日志"""
-        self.logger.info(message)
+    def log_info(self, message: str, *args):
+        """记录信息日志（参数按 % 格式延迟合并）"""
+        self.logger.info(message, *args)
     
-    def log_warning(self, message: str):
-        """记录警告日志"""
-        self.logger.warning(message)
+    def log_warning(self, message: str, *args):
+        """记录警告日志（参数按 % 格式延迟合并）"""
+        self.logger.warning(message, *args)
     
-    def log_error(self, message: str):
-        """记录错误日志"""
-        self.logger.error(message)
+    def log_error(self, message: str, *args):
+        """记录错误日志（参数按 % 格式延迟合并）"""
+        self.logger.error(message, *args)
     
-    def log_debug(self, message: str):
-        """记录调试日志"""
-        self.logger.debug(message)
+    def log_debug(self, message: str, *args):
+        """记录调试日志（参数按 % 格式延迟合并）"""
+        self.logger.debug(message, *args)
 
 
 class HtmlParser(BaseParser):
@@ -67,10 +67,10 @@ class HtmlParser(BaseParser):
         match = re.search(pattern, content)
         if match:
             result = match.group(group).strip()
-            self.log_debug(f"成功提取内容: {result}")
+            self.log_debug("成功提取内容: %s", result)
             return result
         else:
-            self.log_warning(f"未找到匹配的内容: {pattern}")
+            self.log_warning("未找到匹配的内容: %s", pattern)
             return None
     
     def extract_multiple_with_regex(self, pattern: str, content: str) -> list:
@@ -84,7 +84,7 @@ class HtmlParser(BaseParser):
         """
         import re
         matches = re.findall(pattern, content)
-        self.log_debug(f"提取到 {len(matches)} 个匹配项")
+        self.log_debug("提取到 %s 个匹配项", len(matches))
         return matches
 
 
@@ -112,10 +112,10 @@ class UrlParser(BaseParser):
         match = re.search(pattern, url)
         if match:
             extracted_id = match.group(group)
-            self.log_info(f"从URL提取到ID: {extracted_id}")
+            self.log_info("从URL提取到ID: %s", extracted_id)
             return extracted_id
         else:
-            self.log_warning(f"无法从URL提取ID: {url}")
+            self.log_warning("无法从URL提取ID: %s", url)
             return None
     
     def validate_url_format(self, url: str, pattern: str) -> bool:
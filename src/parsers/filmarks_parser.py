@@ -5,7 +5,6 @@ Filmarks解析器
 import re
 import json
 from typing import Optional, Dict, Any
-from lxml import html
 from .base_parser import HtmlParser
 
 
@@ -23,6 +22,9 @@ class FilmarksParser(HtmlParser):
         Returns:
             dict: 解析结果
         """
+        # lxml较重，只在真正解析网页时导入
+        from lxml import html
+
         tree = html.fromstring(content)
         
         # 判断是详情页还是搜索页
@@ -56,7 +58,7 @@ class FilmarksParser(HtmlParser):
         score_elements = tree.xpath('//div[@class="c2-rating-l__text"]/text()')
         if score_elements:
             result['score'] = score_elements[0].strip()
-            self.log_info(f"提取到评分: {result['score']}")
+            self.log_info("提取到评分: %s", result['score'])
         else:
             self.log_warning("未找到评分")
         
@@ -64,7 +66,7 @@ class FilmarksParser(HtmlParser):
         name_elements = tree.xpath('//h2[@class="p-content-detail__title"]/span/text()')
         if name_elements:
             result['name'] = name_elements[0].strip()
-            self.log_info(f"提取到名称: {result['name']}")
+            self.log_info("提取到名称: %s", result['name'])
         else:
             self.log_warning("未找到名称")
         
@@ -75,9 +77,9 @@ class FilmarksParser(HtmlParser):
                 data_mark_json = data_mark_elements[0].replace('&quot;', '"')
                 data_mark = json.loads(data_mark_json)
                 result['total'] = str(data_mark.get('count', 'No count found'))
-                self.log_info(f"提取到评分人数: {result['total']}")
+                self.log_info("提取到评分人数: %s", result['total'])
             except (json.JSONDecodeError, KeyError) as e:
-                self.log_error(f"解析评分人数失败: {e}")
+                self.log_error("解析评分人数失败: %s", e)
         else:
             self.log_warning("未找到评分人数")
         
@@ -87,7 +89,7 @@ class FilmarksParser(HtmlParser):
             date_text = date_elements[0].strip()
             result['date'] = self._extract_date_from_text(date_text)
             if result['date']:
-                self.log_info(f"提取到开播日期: {result['date']}")
+                self.log_info("提取到开播日期: %s", result['date'])
         else:
             self.log_warning("未找到开播日期")
         
@@ -131,7 +133,7 @@ class FilmarksParser(HtmlParser):
                 score_match = re.search(r'^(\d+\.?\d*)$', score_text)
                 if score_match and score_text != '-':
                     result['score'] = score_match.group(1)
-                    self.log_info(f"提取到评分: {result['score']}")
+                    self.log_info("提取到评分: %s", result['score'])
                     break
         else:
             self.log_warning("未找到评分")
@@ -148,7 +150,7 @@ class FilmarksParser(HtmlParser):
                 # 过滤掉太短的文本和无意义的文本
                 if clean_name and len(clean_name) > 3 and '検索' not in clean_name:
                     result['name'] = clean_name
-                    self.log_info(f"提取到名称: {result['name']}")
+                    self.log_info("提取到名称: %s", result['name'])
                     break
         else:
             self.log_warning("未找到名称")
@@ -159,9 +161,9 @@ class FilmarksParser(HtmlParser):
             try:
                 data_mark = json.loads(total_elements[0])
                 result['total'] = str(data_mark.get('count', 'No count found'))
-                self.log_info(f"提取到评分人数: {result['total']}")
+                self.log_info("提取到评分人数: %s", result['total'])
             except (json.JSONDecodeError, KeyError) as e:
-                self.log_error(f"解析评分人数失败: {e}")
+                self.log_error("解析评分人数失败: %s", e)
         else:
             self.log_warning("未找到评分人数")
         
@@ -178,7 +180,7 @@ class FilmarksParser(HtmlParser):
                 extracted_date = self._extract_date_from_text(date_str)
                 if extracted_date:
                     result['date'] = extracted_date
-                    self.log_info(f"提取到开播日期: {result['date']}")
+                    self.log_info("提取到开播日期: %s", result['date'])
                     break
         else:
             self.log_warning("未找到开播日期")
@@ -306,12 +308,12 @@ class FilmarksDataSetter:
     def _log_extraction_results(anime):
         """记录提取结果到日志"""
         import logging
-        logging.info(f"Filmarks链接: {anime.filmarks_url}")
-        logging.info(f"Filmarks名称: {anime.filmarks_name}")
-        logging.info(f"Filmarks评分: {anime.score_fm}")
-        logging.info(f"Filmarks评分人数: {anime.filmarks_total}")
+        logging.info("Filmarks链接: %s", anime.filmarks_url)
+        logging.info("Filmarks名称: %s", anime.filmarks_name)
+        logging.info("Filmarks评分: %s", anime.score_fm)
+        logging.info("Filmarks评分人数: %s", anime.filmarks_total)
         if hasattr(anime, 'filmarks_subject_Date') and anime.filmarks_subject_Date:
-            logging.info(f"Filmarks开播日期: {anime.filmarks_subject_Date}")
+            logging.info("Filmarks开播日期: %s", anime.filmarks_subject_Date)
     
     @staticmethod
     def set_error_state(anime, error_message: str):
@@ -323,4 +325,4 @@ class FilmarksDataSetter:
         """
         anime.score_fm = error_message
         import logging
-        logging.error(f"Filmarks数据提取失败: {error_message}") 
+        logging.error("Filmarks数据提取失败: %s", error_message) 
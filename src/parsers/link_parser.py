@@ -3,15 +3,18 @@
 
 import re
 import logging
-from typing import Optional, Dict, Any
-from openpyxl.cell import Cell
+from typing import Optional, Dict, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # 仅用于类型注解，运行时不导入openpyxl
+    from openpyxl.cell import Cell
 
 
 class LinkParser:
     """链接解析器，用于处理各平台的URL格式"""
     
     @staticmethod
-    def extract_cell_url(cell: Cell) -> Optional[str]:
+    def extract_cell_url(cell: "Cell") -> Optional[str]:
         """
         从Excel单元格中提取URL（支持超链接和纯文本）
         Args:
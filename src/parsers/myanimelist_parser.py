@@ -144,12 +144,12 @@ class MyAnimeListDataSetter:
     @staticmethod
     def _log_extraction_results(anime):
         """记录提取结果到日志"""
-        logging.info(f"MyAnimeList链接: {anime.myanimelist_url}")
-        logging.info(f"MyAnimeList名称: {anime.myanimelist_name}")
-        logging.info(f"MyAnimeList评分: {anime.score_mal}")
-        logging.info(f"MyAnimeList评分人数: {anime.myanimelist_total}")
+        logging.info("MyAnimeList链接: %s", anime.myanimelist_url)
+        logging.info("MyAnimeList名称: %s", anime.myanimelist_name)
+        logging.info("MyAnimeList评分: %s", anime.score_mal)
+        logging.info("MyAnimeList评分人数: %s", anime.myanimelist_total)
         if hasattr(anime, 'myanimelist_subject_Date') and anime.myanimelist_subject_Date:
-            logging.info(f"MyAnimeList开播日期: {anime.myanimelist_subject_Date}")
+            logging.info("MyAnimeList开播日期: %s", anime.myanimelist_subject_Date)
 
     @staticmethod
     def set_error_state(anime, error_message: str):
@@ -160,4 +160,4 @@ class MyAnimeListDataSetter:
             error_message: 错误信息
         """
         anime.score_mal = error_message
-        logging.error(f"MyAnimeList数据提取失败: {error_message}")
+        logging.error("MyAnimeList数据提取失败: %s", error_message)
@@ -0,0 +1,481 @@
+# src/pipeline.py
+# 单行处理流程：读取已有链接 → 按依赖关系调度的单行任务图 → 返回提取结果
+# main.py（经由 src/targets.py）和端到端基准测试（benchmarks/e2e_pipeline.py）共用同一套流程
+#
+# 单行任务图（ROW_TASKS）：
+#   extract.bangumi / extract.myanimelist / extract.anilist / extract.filmarks   立即并发执行
+#   fallback.myanimelist   MAL和AniList都完成、且MAL未找到时，用AniList返回的标题重试MAL
+#   fallback.anilist       同上（在MAL兜底之后），AniList未找到时用MAL返回的标题重试AniList
+#   twitter                AniList（或其兜底）一拿到Twitter账号就开始获取粉丝数
+# 交叉兜底和Twitter不再等待较慢的Bangumi / Filmarks，单行耗时取决于真正的关键路径。
+#
+# 各任务耗时都会记录到运行指标（utils/core/metrics.py）：extract（整张任务图）以及每个任务名；
+# process_row 还可接收 timings 字典，按阶段（extract / fallback / twitter）累加耗时（秒），
+# 其中 fallback 和 twitter 与 extract 在时间上重叠。
+#
+# 每行有截止时间（MZZB_ROW_DEADLINE，见 utils/network/budget.py）：到达后不再启动新任务，
+# 未完成的平台评分写为 TIMEOUT，个别条目不会拖住整次运行。
+# 每个任务在该行Anime对象的副本上运行，完成后才把修改的字段合并回来；超时后仍在后台运行的任务只会修改自己的副本，
+# 不会覆盖 TIMEOUT 标记或写入已经交给表格写入的结果。
+#
+# process_rows 可同时处理多行（MZZB_ROW_WORKERS，默认1行），各站点的实际并发由网络层的
+# 自适应并发窗口（utils/network/rate_control.py）控制，不会因为行数增加而压垮限流严格的站点。
+
+import contextvars
+import copy
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from html import unescape
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from models import Anime
+from utils import preprocess_name, UrlChecker
+from utils.core.logger import log_context
+from utils.core.metrics import get_metrics
+from utils.core.profiling import span
+from utils.network import is_twitter_accessible
+from utils.network.budget import deadline_scope, get_retry_budget, get_row_deadline, time_remaining
+from utils.validators.data_validators import ROW_TIMEOUT_CODE, is_valid_value
+from src.extractors import (
+    extract_bangumi_data,
+    extract_myanimelist_data,
+    extract_anilist_data,
+    extract_filmarks_data
+)
+
+MAL_NOT_FOUND_ERRORS = {"No acceptable subject found", "No results found"}
+ANILIST_NOT_FOUND_ERRORS = {"No acceptable subject found", "No AniList results"}
+INVALID_FALLBACK_TITLES = {"", "No name found", "未知名称", None}
+
+ROW_WORKERS_ENV = "MZZB_ROW_WORKERS"
+
+# 到达单行截止时间后，再等待进行中任务结束的时间（秒）
+DEADLINE_GRACE = 2.0
+
+# 多行并发时保护 timings 累加；Scweet 会话不保证线程安全，Twitter查询串行执行；
+# openpyxl 按行取单元格时会补建缺失的单元格，多行同时读取同一工作表需要串行
+_timings_lock = threading.Lock()
+_twitter_lock = threading.Lock()
+_sheet_lock = threading.Lock()
+
+# 平台 -> 提取函数（并发执行）
+PLATFORM_EXTRACTORS = (
+    ("bangumi", extract_bangumi_data),
+    ("myanimelist", extract_myanimelist_data),
+    ("anilist", extract_anilist_data),
+    ("filmarks", extract_filmarks_data),
+)
+
+
+@contextmanager
+def _stage(timings: Optional[Dict[str, float]], name: str):
+    """记录某个阶段的耗时到运行指标，并累加到 timings（如果提供）；剖析期间同时记录为追踪区间"""
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        get_metrics().record_stage(name, elapsed)
+        _add_timing(timings, name, elapsed)
+
+
+def _add_timing(timings: Optional[Dict[str, float]], name: str, elapsed: float) -> None:
+    if timings is not None:
+        with _timings_lock:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def _is_mal_not_found(anime):
+    """MAL是否处于可用交叉兜底重试的未找到状态"""
+    return anime.score_mal in MAL_NOT_FOUND_ERRORS
+
+
+def _is_anilist_not_found(anime):
+    """AniList是否处于可用交叉兜底重试的未找到状态"""
+    return anime.score_al in ANILIST_NOT_FOUND_ERRORS
+
+
+def _is_valid_fallback_title(title):
+    """检查交叉兜底标题是否值得尝试"""
+    return title not in INVALID_FALLBACK_TITLES and bool(str(title).strip())
+
+
+def _retry_myanimelist_with_anilist_titles(anime):
+    """MAL失败时，先用AniList日文标题兜底，再用AniList英文标题兜底"""
+    fallback_titles = [
+        ("日文标题", getattr(anime, "anilist_japanese_name", "") or anime.anilist_name),
+        ("英文标题", getattr(anime, "anilist_english_name", "")),
+    ]
+
+    for title_type, title in fallback_titles:
+        if not _is_mal_not_found(anime):
+            break
+        if not _is_valid_fallback_title(title):
+            continue
+
+        logging.info("MAL候选未找到，尝试使用 AniList 返回的%s重新搜索 MAL: %s", title_type, title)
+        new_processed_name = preprocess_name(title)
+        extract_myanimelist_data(anime, new_processed_name)
+
+
+def _retry_anilist_with_myanimelist_titles(anime):
+    """AniList失败时，先用MAL日文标题兜底，再用MAL英文标题兜底"""
+    fallback_titles = [
+        ("日文标题", getattr(anime, "myanimelist_japanese_name", "") or anime.myanimelist_name),
+        ("英文标题", getattr(anime, "myanimelist_english_name", "")),
+    ]
+
+    for title_type, title in fallback_titles:
+        if not _is_anilist_not_found(anime):
+            break
+        if not _is_valid_fallback_title(title):
+            continue
+
+        logging.info("AniList候选未找到，尝试使用 MAL 返回的%s重新搜索 AniList: %s", title_type, title)
+        new_processed_name = unescape(preprocess_name(title))
+        extract_anilist_data(anime, new_processed_name)
+
+
+def load_pending_rows(file_path: str) -> List[Tuple[int, str]]:
+    """
+    读取表格中待处理的行（跳过原名为空的行）
+    Args:
+        file_path: Excel文件路径
+    Returns:
+        list: (DataFrame行索引, 原名) 列表；Excel行号 = 行索引 + 3
+    """
+    import pandas as pd
+
+    df = pd.read_excel(file_path, skiprows=1)
+    pending_rows = []
+    for index, row in df.iterrows():
+        if pd.isna(row['原名']):
+            logging.warning(f"Skipping row {index} because the original name is NaN.")
+            continue  # 跳过这一行
+        pending_rows.append((index, row['原名']))
+    return pending_rows
+
+
+def prepare_anime(excel_row, col_helper, original_name, fallback_rows=()) -> Anime:
+    """
+    创建Anime对象，并预先填入表格中已有的平台链接
+    Args:
+        excel_row: 当前行的Excel行对象
+        col_helper: Excel列助手
+        original_name: 原名
+        fallback_rows: 其他表格中同名作品的 (Excel行对象, Excel列助手) 列表，当前行缺少的平台链接从中补充
+    Returns:
+        Anime: 动画对象
+    """
+    anime = Anime(original_name=original_name)
+    logging.info(str(anime))
+
+    # 检查当前行是否已有链接数据
+    existing_urls = UrlChecker.check_row_urls(excel_row, col_helper)
+    for other_row, other_helper in fallback_rows:
+        for platform, url in UrlChecker.check_row_urls(other_row, other_helper).items():
+            if url and not existing_urls.get(platform):
+                existing_urls[platform] = url
+
+    # 如果找到链接，预先设置到anime对象中
+    if existing_urls.get('bangumi'):
+        anime.bangumi_url = existing_urls['bangumi']
+    if existing_urls.get('anilist'):
+        anime.anilist_url = existing_urls['anilist']
+    if existing_urls.get('myanimelist'):
+        anime.myanimelist_url = existing_urls['myanimelist']
+    if existing_urls.get('filmarks'):
+        anime.filmarks_url = existing_urls['filmarks']
+
+    if UrlChecker.has_any_url(existing_urls):
+        available_platforms = UrlChecker.get_available_platforms(existing_urls)
+        logging.info(f"发现已有链接的平台: {', '.join(available_platforms)}")
+    else:
+        logging.info("未发现已有链接，将进行搜索模式")
+    return anime
+
+
+def fetch_twitter_followers(anime, twitter_config_success: bool) -> None:
+    """
+    获取Twitter粉丝数（如果找到了Twitter账号且配置成功且网络可用）
+    Args:
+        anime: Anime对象
+        twitter_config_success: Twitter配置是否成功
+    """
+    if not (hasattr(anime, 'twitter_username') and anime.twitter_username):
+        return
+
+    if not is_twitter_accessible():
+        logging.info(f"发现Twitter账号 @{anime.twitter_username}，但Twitter网络不可用，跳过粉丝数获取")
+        anime.twitter_followers = "网络不可用"
+    elif twitter_config_success:
+        try:
+            from src.extractors import TwitterFollowersHelper
+            with _twitter_lock:
+                followers_count = TwitterFollowersHelper.get_followers_count(anime.twitter_username)
+            if followers_count is not None:
+                anime.twitter_followers = followers_count
+            else:
+                logging.warning(f"无法获取 @{anime.twitter_username} 的粉丝数")
+                anime.twitter_followers = "获取失败"
+        except Exception as e:
+            logging.error(f"获取Twitter粉丝数时出错: {e}")
+            anime.twitter_followers = "获取出错"
+    else:
+        logging.info(f"发现Twitter账号 @{anime.twitter_username}，但Twitter配置未成功，跳过粉丝数获取")
+        anime.twitter_followers = "配置未成功"
+
+
+class RowTask(NamedTuple):
+    """单行任务图中的一个任务"""
+    name: str                                     # 任务名（同时作为运行指标中的阶段名）
+    platform: str                                 # 日志上下文中的平台
+    run: Callable                                 # run(anime, processed_name, twitter_config_success)
+    after: Tuple[str, ...] = ()                   # 依赖的任务
+    when: Optional[Callable] = None               # 依赖满足后判断是否需要执行，返回False时跳过
+    any_of: bool = False                          # True：任一依赖完成且 when 成立即可执行（全部完成仍不成立则跳过）
+
+
+def _has_twitter_username(anime) -> bool:
+    return bool(getattr(anime, 'twitter_username', None))
+
+
+def _platform_task(name: str, extract) -> RowTask:
+    return RowTask(f"extract.{name}", name, lambda anime, processed_name, _: extract(anime, processed_name))
+
+
+ROW_TASKS: Tuple[RowTask, ...] = tuple(_platform_task(name, extract) for name, extract in PLATFORM_EXTRACTORS) + (
+    RowTask("fallback.myanimelist", "myanimelist",
+            lambda anime, processed_name, _: _retry_myanimelist_with_anilist_titles(anime),
+            after=("extract.myanimelist", "extract.anilist"), when=_is_mal_not_found),
+    RowTask("fallback.anilist", "anilist",
+            lambda anime, processed_name, _: _retry_anilist_with_myanimelist_titles(anime),
+            after=("extract.myanimelist", "extract.anilist", "fallback.myanimelist"), when=_is_anilist_not_found),
+    RowTask("twitter", "twitter",
+            lambda anime, processed_name, twitter_config_success: fetch_twitter_followers(anime, twitter_config_success),
+            after=("extract.anilist", "fallback.anilist"), when=_has_twitter_username, any_of=True),
+)
+
+# 任务的平台 -> 评分属性（超时标记）
+SCORE_ATTRS = {
+    "bangumi": "score_bgm",
+    "myanimelist": "score_mal",
+    "anilist": "score_al",
+    "filmarks": "score_fm",
+}
+
+# 任务名前缀 -> timings 中的阶段
+_TIMING_STAGES = (("fallback.", "fallback"), ("twitter", "twitter"))
+
+
+def _run_task(task: RowTask, anime, processed_name: str, twitter_config_success: bool) -> float:
+    """在工作线程中执行单个任务，返回耗时（秒）"""
+    start = time.perf_counter()
+    with log_context(platform=task.platform), span(task.name):
+        task.run(anime, processed_name, twitter_config_success)
+    elapsed = time.perf_counter() - start
+    get_metrics().record_stage(task.name, elapsed)
+    return elapsed
+
+
+def run_row_tasks(anime, processed_name: str, twitter_config_success: bool,
+                  tasks: Tuple[RowTask, ...] = ROW_TASKS,
+                  timings: Optional[Dict[str, float]] = None) -> bool:
+    """
+    按依赖关系执行单行任务图：依赖一满足就提交，不再按阶段整体等待
+    Args:
+        anime: Anime对象
+        processed_name: 预处理后的名称（用于没有链接的平台）
+        twitter_config_success: Twitter配置是否成功
+        tasks: 任务图
+        timings: 可选，按阶段累加 fallback / twitter 任务的耗时
+    Returns:
+        bool: 全部任务在截止时间（deadline_scope）内完成时返回True；
+              超时时未完成的平台评分标记为 TIMEOUT，返回False
+    """
+    import concurrent.futures
+
+    pending = {task.name: task for task in tasks}
+    finished = set()  # 已完成或已跳过的任务
+    running = {}
+    copies = {}  # future -> (任务使用的Anime副本, 提交时的字段)
+    timed_out: List[RowTask] = []
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="extract")
+
+    def schedule():
+        # 跳过任务可能让其他任务就绪，循环到没有变化为止
+        changed = True
+        while changed:
+            changed = False
+            for name, task in list(pending.items()):
+                done_count = sum(1 for dep in task.after if dep in finished)
+                all_done = done_count == len(task.after)
+                if not (all_done or (task.any_of and done_count)):
+                    continue
+                if task.when is None or task.when(anime):
+                    del pending[name]
+                    # 任务在副本上运行，完成后再合并（超时放弃的任务不会再修改anime）
+                    task_anime = copy.copy(anime)
+                    before = dict(task_anime.__dict__)
+                    # 线程池不会自动继承 contextvars，每个任务复制一份当前上下文（日志中的行号、截止时间等）
+                    future = executor.submit(contextvars.copy_context().run, _run_task,
+                                             task, task_anime, processed_name, twitter_config_success)
+                    running[future] = task
+                    copies[future] = (task_anime, before)
+                elif all_done:
+                    del pending[name]
+                    finished.add(name)
+                    changed = True
+
+    def collect(completed):
+        for future in completed:
+            task = running.pop(future)
+            # 出错的任务也合并（平台的错误标记等）
+            _merge_task_result(anime, *copies.pop(future))
+            try:
+                elapsed = future.result()
+                logging.info("%s task completed", task.name)
+                for prefix, stage in _TIMING_STAGES:
+                    if task.name.startswith(prefix):
+                        _add_timing(timings, stage, elapsed)
+            except Exception as exc:
+                logging.error("%s task generated an exception: %s", task.name, exc)
+            finished.add(task.name)
+
+    try:
+        schedule()
+        while running:
+            remaining = time_remaining()
+            if remaining is not None and remaining <= 0:
+                # 到达截止时间：不再启动新任务；进行中的请求会因截止时间很快放弃，只再等待一小段时间
+                timed_out = list(running.values()) + list(pending.values())
+                pending.clear()
+                completed, _ = concurrent.futures.wait(running, timeout=DEADLINE_GRACE)
+                collect(completed)
+                break
+            completed, _ = concurrent.futures.wait(running, timeout=remaining,
+                                                   return_when=concurrent.futures.FIRST_COMPLETED)
+            collect(completed)
+            schedule()
+    finally:
+        # 超时后仍未结束的任务不再等待（线程在后台自行结束）
+        executor.shutdown(wait=not running, cancel_futures=True)
+
+    if timed_out:
+        _mark_timed_out(anime, timed_out, abandoned=list(running.values()))
+        return False
+    if pending:
+        logging.error("单行任务图存在无法满足的依赖: %s", ", ".join(pending))
+    return True
+
+
+def _merge_task_result(anime, task_anime, before: Dict) -> None:
+    """把任务在副本上修改的字段合并回该行的Anime对象（只合并该任务改动过的字段，不覆盖其他并发任务的结果）"""
+    for attr, value in task_anime.__dict__.items():
+        if attr not in before or before[attr] is not value:
+            setattr(anime, attr, value)
+
+
+def _mark_timed_out(anime, tasks: List[RowTask], abandoned: List[RowTask]) -> None:
+    """把截止时间到达时仍未完成的任务对应的平台标记为超时（已拿到有效评分的平台保留结果）"""
+    get_retry_budget().record_row_timeout()
+    platforms = []
+    for task in tasks:
+        score_attr = SCORE_ATTRS.get(task.platform)
+        if score_attr and not is_valid_value(getattr(anime, score_attr, None)):
+            setattr(anime, score_attr, ROW_TIMEOUT_CODE)
+            platforms.append(task.platform)
+        elif task.platform == "twitter":
+            anime.twitter_followers = "超时"
+            platforms.append(task.platform)
+    logging.warning("超过单行截止时间，中止未完成的任务: %s（标记为超时: %s；仍在后台运行: %s）",
+                    ", ".join(task.name for task in tasks), ", ".join(dict.fromkeys(platforms)) or "无",
+                    ", ".join(task.name for task in abandoned) or "无")
+
+
+def process_row(ws, col_helper, index: int, original_name, twitter_config_success: bool,
+                timings: Optional[Dict[str, float]] = None, fallback_rows=()) -> Anime:
+    """
+    处理表格中的一行：按任务图提取各平台数据（不写入表格，由调用方统一写入）
+    Args:
+        ws: Excel工作表对象
+        col_helper: Excel列助手
+        index: DataFrame行索引（Excel行号为 index + 3）
+        original_name: 原名
+        twitter_config_success: Twitter配置是否成功
+        timings: 可选，按阶段累加耗时（extract 为整张任务图，fallback / twitter 与之重叠）
+        fallback_rows: 其他表格中同名作品的 (Excel行对象, Excel列助手) 列表（见 prepare_anime）
+    Returns:
+        Anime: 提取结果；超过单行截止时间（MZZB_ROW_DEADLINE）时未完成的平台评分为 TIMEOUT
+    """
+    # DataFrame从0开始，Excel从1开始，且有表头，所以+3
+    with log_context(row=index + 3, anime=str(original_name)), deadline_scope(get_row_deadline()):
+        with _sheet_lock:
+            excel_row = ws[index + 3]
+        anime = prepare_anime(excel_row, col_helper, original_name, fallback_rows)
+
+        # 预处理名称（仍然需要，用于没有链接的平台）
+        processed_name = preprocess_name(anime.original_name)
+
+        with _stage(timings, 'extract'):
+            run_row_tasks(anime, processed_name, twitter_config_success, timings=timings)
+    return anime
+
+
+def get_row_workers() -> int:
+    """同时处理的行数（MZZB_ROW_WORKERS，默认1）"""
+    try:
+        return max(1, int(os.environ.get(ROW_WORKERS_ENV, "") or 1))
+    except ValueError:
+        logging.warning(f"{ROW_WORKERS_ENV} 不是有效的整数，按1行处理")
+        return 1
+
+
+def process_rows(ws, col_helper, pending_rows: List[Tuple[int, str]], twitter_config_success: bool,
+                 workers: Optional[int] = None, timings: Optional[Dict[str, float]] = None,
+                 row_delay: float = 0.1,
+                 fallback_rows: Optional[Dict[int, List]] = None) -> Iterator[Tuple[int, Anime, float]]:
+    """
+    逐行（或多行并发）处理表格，按完成顺序返回结果
+    Args:
+        ws: Excel工作表对象
+        col_helper: Excel列助手
+        pending_rows: (行索引, 原名) 列表
+        twitter_config_success: Twitter配置是否成功
+        workers: 同时处理的行数，默认读取 MZZB_ROW_WORKERS
+        timings: 可选，按阶段累加耗时
+        row_delay: 单行模式下每行之间的间隔（秒），避免频繁请求被拒绝；多行模式由自适应并发控制请求速率
+        fallback_rows: 可选，行索引 -> 其他表格中同名作品的 (Excel行对象, Excel列助手) 列表
+    Yields:
+        tuple: (行索引, Anime对象, 单行耗时秒数)
+    """
+    workers = workers or get_row_workers()
+
+    def run(index, original_name):
+        start = time.perf_counter()
+        anime = process_row(ws, col_helper, index, original_name, twitter_config_success, timings=timings,
+                            fallback_rows=(fallback_rows or {}).get(index, ()))
+        return index, anime, time.perf_counter() - start
+
+    if workers <= 1:
+        for position, (index, original_name) in enumerate(pending_rows):
+            if position and row_delay:
+                time.sleep(row_delay)
+            yield run(index, original_name)
+        return
+
+    import concurrent.futures
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="row")
+    try:
+        futures = [executor.submit(run, index, original_name) for index, original_name in pending_rows]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+    finally:
+        # 中途出错或调用方提前结束时，不再启动排队中的行
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,276 @@
+# src/targets.py
+# 目标表格：一次运行可以同时填写多张表格（如 mzzb.xlsx、X月新番首月评分.xlsx、X月新番完结评分.xlsx）。
+# 各表格的待处理行按原名合并，每部作品只提取一次（共用HTTP缓存、ID映射表和本地目录库），
+# 再用同一份提取结果分别写入各表格（各自的列布局、评分标准化和综合排名），最后并行保存。
+#
+# 第一张表格为主表：目标年份取自主表A1，主表的模板版本（M1）必须与 FORMAT_VERSION 一致；
+# 其他表格只在M1有值时检查版本（首月/完结评分模板没有版本号），目标年份与主表不同的表格会被跳过。
+# 同名作品的已有链接以排在前面的表格为准，缺少的平台链接从后面的表格补充。
+#
+# 写入时只修改值真正变化的单元格（见 ExcelColumnHelper.write_cell），保存前按表格输出变化的单元格，
+# 没有任何变化的表格不再保存；各表格变化的单元格数见运行指标中的 excel_changes 表。
+#
+# 用法：
+#   python main.py                                                          # 只处理 mzzb.xlsx
+#   python main.py --targets mzzb.xlsx,X月新番首月评分.xlsx,X月新番完结评分.xlsx
+#   MZZB_TARGETS=X月新番首月评分.xlsx,X月新番完结评分.xlsx mzzb_score.exe      # exe 环境使用环境变量
+
+import concurrent.futures
+import logging
+import os
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.core.global_variables import FILE_PATH
+from utils.core.metrics import get_metrics
+
+TARGETS_ENV = 'MZZB_TARGETS'
+
+TEMPLATE_URL = "https://github.com/kisekinoumi/mzzbscore/releases"
+
+# 日志中逐条列出的变化单元格数（其余的只在DEBUG级别输出）
+CHANGE_LOG_LIMIT = 20
+
+
+class TargetWorkbook:
+    """一张目标表格：工作簿、列助手和待处理行"""
+
+    def __init__(self, path: str, wb):
+        self.path = path
+        self.wb = wb
+        self.ws = wb.active
+        self.year = str(self.ws['A1'].value)[:4]
+        self.col_helper = None
+        self.pending_rows: List[Tuple[int, str]] = []
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+
+class PendingTitle(NamedTuple):
+    """合并后的一部待处理作品"""
+    target: TargetWorkbook      # 负责提取的表格（排在最前面、包含该作品的表格）
+    index: int                  # 在该表格中的行索引
+    original_name: str
+    fallback_rows: List         # 其他表格中同名作品的 (Excel行对象, Excel列助手)
+
+
+def get_target_paths(argv: Optional[List[str]] = None) -> List[str]:
+    """
+    从命令行参数（--targets a.xlsx,b.xlsx）或环境变量 MZZB_TARGETS 读取目标表格
+    Args:
+        argv: 命令行参数，默认使用 sys.argv
+    Returns:
+        list: 去重后的表格路径，未指定时为 [mzzb.xlsx]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    value = None
+    for position, arg in enumerate(argv):
+        if arg == '--targets' and position + 1 < len(argv):
+            value = argv[position + 1]
+        elif arg.startswith('--targets='):
+            value = arg.split('=', 1)[1]
+    if value is None:
+        value = os.environ.get(TARGETS_ENV, '')
+
+    paths = []
+    for path in value.split(','):
+        path = path.strip()
+        if path and path not in paths:
+            paths.append(path)
+    return paths or [FILE_PATH]
+
+
+def load_targets(paths: List[str], format_version: Optional[int]) -> List[TargetWorkbook]:
+    """
+    加载目标表格、检查模板版本并设置目标年份（取自主表）
+    Args:
+        paths: 表格路径，第一张为主表
+        format_version: 要求的模板版本，None 时不检查（基准测试使用自备表格时）
+    Returns:
+        list: 可以处理的表格；主表无法加载或版本不匹配时抛出异常，其他表格出错时跳过
+    """
+    from openpyxl import load_workbook
+    from utils import ExcelColumnHelper
+    from utils.core.global_variables import update_constants
+    from src.pipeline import load_pending_rows
+
+    targets = []
+    for path in paths:
+        primary = not targets
+        try:
+            target = TargetWorkbook(path, load_workbook(path))
+        except Exception as e:
+            logging.error(f"无法加载Excel文件 {path}: {e}")
+            if primary:
+                logging.error("请检查Excel文件是否存在且格式正确")
+                raise
+            logging.warning(f"跳过表格 {path}")
+            continue
+
+        # 检查表格格式版本（首月/完结评分模板没有版本号，只检查主表和带版本号的表格）
+        excel_version = target.ws['M1'].value
+        if format_version is not None and excel_version != format_version and (primary or excel_version is not None):
+            logging.error(f"表格模板版本不匹配！当前代码要求表格文件模板版本为 {format_version}，但表格 {path} 的模板版本为 {excel_version}。请更新表格模板后重试。")
+            logging.error(f"请访问: {TEMPLATE_URL} 下载最新版本的表格模板。")
+            if primary:
+                raise SystemExit(1)
+            logging.warning(f"跳过表格 {path}")
+            continue
+
+        if primary:
+            # 更新全局常量：读取主表设置的目标放送年份
+            update_constants(target.year)
+        elif target.year != targets[0].year:
+            logging.error(f"表格 {path} 的目标年份 {target.year} 与主表 {targets[0].path} 的 {targets[0].year} 不同，跳过该表格")
+            continue
+
+        # 创建Excel列助手（每张表格只创建一次，各表格的列布局可以不同）
+        target.col_helper = ExcelColumnHelper(target.ws)
+        target.pending_rows = load_pending_rows(path)
+        logging.info(f"成功加载Excel文件: {path}（{len(target.pending_rows)} 个动画条目）")
+        targets.append(target)
+    return targets
+
+
+def merge_pending_rows(targets: List[TargetWorkbook]) -> List[PendingTitle]:
+    """
+    按原名合并各表格的待处理行，每部作品只提取一次
+    Args:
+        targets: 目标表格
+    Returns:
+        list: 合并后的待处理作品（按表格及行的先后顺序）
+    """
+    merged: Dict[str, PendingTitle] = {}
+    for target in targets:
+        for index, original_name in target.pending_rows:
+            pending = merged.get(original_name)
+            if pending is None:
+                merged[original_name] = PendingTitle(target, index, original_name, [])
+            else:
+                pending.fallback_rows.append((target.ws[index + 3], target.col_helper))
+    return list(merged.values())
+
+
+def process_targets(pending: List[PendingTitle], twitter_config_success: bool,
+                    workers: Optional[int] = None, timings: Optional[Dict[str, float]] = None,
+                    row_delay: float = 0.1) -> Iterator[Tuple[str, object, float]]:
+    """
+    提取合并后的全部作品：按负责提取的表格分组，依次交给 process_rows
+    Args:
+        pending: merge_pending_rows 的结果
+        twitter_config_success: Twitter配置是否成功
+        workers: 同时处理的行数，默认读取 MZZB_ROW_WORKERS
+        timings: 可选，按阶段累加耗时（见 process_rows）
+        row_delay: 单行模式下每行之间的间隔（秒）
+    Yields:
+        tuple: (原名, Anime对象, 单行耗时秒数)
+    """
+    from src.pipeline import process_rows
+
+    groups: Dict[int, List[PendingTitle]] = {}
+    for title in pending:
+        groups.setdefault(id(title.target), []).append(title)
+
+    for titles in groups.values():
+        target = titles[0].target
+        rows = [(title.index, title.original_name) for title in titles]
+        fallback_rows = {title.index: title.fallback_rows for title in titles if title.fallback_rows}
+        for index, anime, elapsed in process_rows(target.ws, target.col_helper, rows, twitter_config_success,
+                                                   workers=workers, timings=timings, row_delay=row_delay,
+                                                   fallback_rows=fallback_rows):
+            yield anime.original_name, anime, elapsed
+
+
+def write_targets(targets: List[TargetWorkbook], results: Dict[str, object], year: str = '') -> None:
+    """
+    用同一份提取结果写入各表格，并为每张表格追加评分快照
+    Args:
+        targets: 目标表格
+        results: 原名 -> Anime对象
+        year: 目标年份（记录到评分历史）
+    """
+    from src.data_process.excel_handler import update_excel_rows
+    from utils import date_error
+
+    for target in targets:
+        rows = [(index, results[name]) for index, name in target.pending_rows if name in results]
+        if not rows:
+            continue
+        try:
+            with get_metrics().stage('write'):
+                score_table = update_excel_rows(target.ws, rows, target.col_helper)
+            logging.info(f"已写入 {len(rows)} 个动画条目的数据: {target.name}")
+        except Exception as e:
+            logging.error(f"写入Excel数据时发生错误（{target.name}）: {e}")
+            continue
+
+        # 追加本次运行的评分快照（供之后按运行对比评分变化）
+        try:
+            from src.data_process.score_history import record_score_snapshot
+            record_score_snapshot(score_table, target.path, year)
+        except Exception as e:
+            logging.error(f"记录评分历史时发生错误（{target.name}）: {e}")
+
+    # 同一作品在每张表格中都会做一次日期验证，汇总时只保留一条
+    if len(targets) > 1:
+        unique = {(entry.get('name'), entry.get('error')): entry for entry in date_error}
+        date_error[:] = list(unique.values())
+
+
+def report_changes(target: TargetWorkbook) -> None:
+    """输出表格中发生变化的单元格：按列汇总，并逐条列出前 CHANGE_LOG_LIMIT 个"""
+    columns = target.col_helper.columns
+    changes = sorted(target.col_helper.changes.values(),
+                     key=lambda change: (change.row, columns.get(change.column, len(columns))))
+    if not changes:
+        return
+
+    rows = len({change.row for change in changes})
+    summary = ", ".join(f"{column} {count}" for column, count in target.col_helper.change_summary().items())
+    logging.info(f"{target.name}: {len(changes)} 个单元格发生变化（{rows} 行）：{summary}")
+    for position, change in enumerate(changes):
+        level = logging.INFO if position < CHANGE_LOG_LIMIT else logging.DEBUG
+        logging.log(level, f"  行 {change.row} {change.column}: {change.old!r} -> {change.new!r}")
+    if len(changes) > CHANGE_LOG_LIMIT:
+        logging.info(f"  ……其余 {len(changes) - CHANGE_LOG_LIMIT} 个单元格的变化见DEBUG日志")
+
+
+def save_targets(targets: List[TargetWorkbook]) -> int:
+    """
+    并行保存有单元格变化的表格，没有变化的表格跳过保存
+    （openpyxl的序列化受GIL限制，并行主要省下的是文件写入的等待，如网络盘、U盘）
+    Args:
+        targets: 目标表格
+    Returns:
+        int: 保存成功的表格数
+    """
+    stats = {}
+    dirty = []
+    for target in targets:
+        report_changes(target)
+        changes = target.col_helper.changes
+        stats[target.name] = {'cells': len(changes), 'rows': len({row for row, _ in changes}), 'saved': 0}
+        if changes:
+            dirty.append(target)
+        else:
+            logging.info(f"{target.name} 没有变化，跳过保存")
+    get_metrics().register_collector('excel_changes', lambda: stats)
+    if not dirty:
+        return 0
+
+    saved = 0
+    with get_metrics().stage('save'), concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(dirty), thread_name_prefix="save") as executor:
+        futures = {executor.submit(target.wb.save, target.path): target for target in dirty}
+        for future in concurrent.futures.as_completed(futures):
+            target = futures[future]
+            try:
+                future.result()
+                saved += 1
+                stats[target.name]['saved'] = 1
+                logging.info(f"Excel表格已成功更新: {target.path}")
+            except Exception as e:
+                logging.error(f"保存Excel文件 {target.path} 时发生错误: {e}")
+    return saved
@@ -0,0 +1,46 @@
+# unit_test/test_profiling.py
+# 性能剖析冒烟测试：cProfile 模式下线程池中的线程必须能正常运行
+# （Python 3.12+ 上为每个新线程再启用一个 cProfile 会抛出 ValueError，线程在运行目标函数前退出，整次运行卡住）
+#
+# 用法：
+#   python -m pytest unit_test/test_profiling.py
+#   python unit_test/test_profiling.py          # 未安装 pytest 的解释器（如 3.12 / 3.13）
+
+import concurrent.futures
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.core import profiling  # noqa: E402
+
+
+def _work(n):
+    return sum(range(n))
+
+
+def test_cprofile_thread_pool():
+    with tempfile.TemporaryDirectory() as workdir:
+        profiling.start_profiling('cprofile', output_prefix=os.path.join(workdir, 'smoke'))
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [executor.submit(_work, 1000) for _ in range(8)]
+                # 线程在启动时退出的话，这里会超时而不是永远等待
+                results = [future.result(timeout=10) for future in futures]
+        finally:
+            paths = profiling.stop_profiling()
+
+        assert results == [sum(range(1000))] * 8
+        combined = os.path.join(workdir, 'smoke.pstats')
+        assert combined in paths
+
+        import pstats
+        functions = {name for _, _, name in pstats.Stats(combined).stats}
+        # 3.12+ 主线程的剖析器覆盖所有线程，更早的版本由各线程的剖析器合并，两种情况下都应包含线程中的函数
+        assert '_work' in functions
+
+
+if __name__ == '__main__':
+    test_cprofile_thread_pool()
+    print(f"ok ({sys.version.split()[0]})")
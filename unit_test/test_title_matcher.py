@@ -0,0 +1,93 @@
+# unit_test/test_title_matcher.py
+# 标题匹配回归测试：真实作品标题上的接受/拒绝判断
+# （MAL 相关性阈值 0.72、模糊匹配阈值 0.85 是按 SequenceMatcher.ratio 标定的，二元组 Dice 系数在同一对标题上偏低，
+#   例如“僕の心のヤバイやつ 第2期 / 僕の心のヤバイやつ 2”为 0.91 对 0.80，直接套用阈值会把相关条目判为无关）
+#
+# 用法：
+#   python -m pytest unit_test/test_title_matcher.py
+#   python unit_test/test_title_matcher.py
+
+import os
+import sys
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.matching import (  # noqa: E402
+    is_relevant_title,
+    normalize_title,
+    normalize_title_punctuation,
+    relevance_score,
+    sequence_ratio,
+)
+
+# (表格原名, MAL候选标题, 是否相关)
+MAL_CASES = [
+    ("葬送のフリーレン", ["Sousou no Frieren", "葬送のフリーレン"], True),
+    ("【推しの子】 第2期", ["Oshi no Ko 2nd Season", "【推しの子】第2期"], True),
+    ("僕の心のヤバイやつ 第2期", ["Boku no Kokoro no Yabai Yatsu 2nd Season", "僕の心のヤバイやつ 2"], True),
+    ("HUNTER×HUNTER", ["Hunter x Hunter (2011)", "HUNTER x HUNTER"], True),
+    ("無職転生Ⅱ ～異世界行ったら本気だす～", ["Mushoku Tensei II", "無職転生 ～異世界行ったら本気だす～"], True),
+    ("転生したらスライムだった件 第3期", ["Tensei shitara Slime Datta Ken 3rd Season", "転生したらスライムだった件 転スラ日記"], True),
+    ("姫様“拷問”の時間です", ["Hime-sama \"Goumon\" no Jikan desu", "姫様拷問の時間です"], True),
+    ("響け！ユーフォニアム3", ["Hibike! Euphonium 3", "響け!ユーフォニアム2"], True),
+    ("ゆるキャン△ SEASON３", ["Yuru Camp△ Season 3", "ゆるキャン△ SEASON2"], True),
+    ("Kusuriya no Hitorigoto", ["Kusuriya no Hitorigoto 2nd Season"], True),
+    ("Tonikaku Kawaii", ["Tonikaku Kawaii: Joshikou-hen"], True),
+    ("ダンジョン飯", ["Dungeon ni Deai wo Motomeru no wa Machigatteiru Darou ka", "ダンジョンに出会いを求めるのは間違っているだろうか"], False),
+    ("ガールズバンドクライ", ["Girls und Panzer", "ガールズ＆パンツァー"], False),
+    ("鬼滅の刃 柱稽古編", ["Kimetsu no Yaiba: Katanakaji no Sato-hen", "鬼滅の刃 刀鍛冶の里編"], False),
+    ("呪術廻戦 第2期", ["Jujutsu Kaisen 0", "呪術廻戦 懐玉・玉折／渋谷事変"], False),
+    ("怪獣8号", ["Kemono Jihen", "怪物事変"], False),
+    ("ダンダダン", ["Dungeon Meshi", "ダンジョン飯"], False),
+    ("アオのハコ", ["Ao Haru Ride", "アオハライド"], False),
+    ("Kaijuu 8-gou", ["Kaiju No. 8"], False),
+    ("Mushoku Tensei II", ["Mushoku no Eiyuu"], False),
+    ("Tensei shitara Slime Datta Ken", ["Tensei Shitara Ken Deshita"], False),
+    ("戦国妖狐 千魔混沌編", ["Sengoku Youko: Yonaoshi Kyoudai-hen", "戦国妖狐 世直し姉弟編"], False),
+    ("ラーメン赤猫", ["Ramen Daisuki Koizumi-san", "ラーメン大好き小泉さん"], False),
+]
+
+# (查询标题, 候选标题, 期望的相关性得分)：模糊匹配的得分为 SequenceMatcher.ratio×100
+FUZZY_CASES = [
+    ("僕の心のヤバイやつ 第2期", "僕の心のヤバイやつ 2", 90.91),
+    ("無職転生Ⅱ ～異世界行ったら本気だす～", "無職転生 ～異世界行ったら本気だす～", 93.75),
+    ("Re:ゼロから始める異世界生活 3rd season", "Re:ゼロから始める異世界生活 2nd season", 91.3),
+    ("とある科学の超電磁砲T", "とある科学の超電磁砲S", 90.91),
+    ("響け！ユーフォニアム3", "響け!ユーフォニアム2", 90.0),
+    ("薬屋のひとりごと 第2期", "薬屋のひとりごと", 57),
+    ("転生したらスライムだった件 第3期", "転生したらスライムだった件 転スラ日記", 0),
+    ("鬼滅の刃 柱稽古編", "鬼滅の刃 刀鍛冶の里編", 0),
+    ("推しの子", "【推しの子】", 100),
+]
+
+
+def test_mal_relevance():
+    failures = [(query, titles) for query, titles, expected in MAL_CASES
+                if is_relevant_title(query, titles) != expected]
+    assert not failures, failures
+
+
+def test_fuzzy_relevance_score():
+    for query, title, expected in FUZZY_CASES:
+        score = relevance_score(query, [title])
+        assert abs(score - expected) < 0.01, (query, title, score)
+
+
+def test_sequence_ratio_matches_difflib():
+    for query, titles, _ in MAL_CASES:
+        for title in titles:
+            for normalize in (normalize_title, normalize_title_punctuation):
+                a, b = normalize(query), normalize(title)
+                expected = SequenceMatcher(None, a, b).ratio() if a != b else float(bool(a))
+                assert abs(sequence_ratio(a, b) - expected) < 1e-9
+                # 预筛只会把达不到阈值的结果置0
+                assert sequence_ratio(a, b, 0.72) in (0.0, expected)
+                assert expected < 0.72 or sequence_ratio(a, b, 0.72) == expected
+
+
+if __name__ == '__main__':
+    test_mal_relevance()
+    test_fuzzy_relevance_score()
+    test_sequence_ratio_matches_difflib()
+    print("ok")
@@ -1,5 +1,11 @@
 # utils/__init__.py
 # 导入工具函数，使其可以通过utils包直接访问
+#
+# 为了缩短程序（尤其是PyInstaller打包后的exe）的冷启动时间，这里不在导入utils包时
+# 立即加载各子模块，而是在第一次访问对应名称时才导入（PEP 562 模块级 __getattr__）。
+# 例如 LinkParser 依赖 openpyxl，只有真正用到时才会加载。
+
+import importlib
 
 # 定义__all__列表，明确指定可以从utils包中导入的内容
 __all__ = [
@@ -15,7 +21,12 @@ __all__ = [
     'update_constants',        # 从global_variables模块
     'get_allowed_years',       # 从global_variables模块
     'get_desired_year',        # 从global_variables模块
+    'get_cache_path',          # 从global_variables模块
+    'get_metrics',             # 从metrics模块
+    'report_metrics',          # 从metrics模块
     'setup_logger',            # 从logger模块
+    'flush_logger',            # 从logger模块
+    'log_context',             # 从logger模块
     'date_error',              # 从logger模块
     'ExcelColumnHelper',       # 从excel_utils模块
     'safe_write_cell',         # 从excel_utils模块
@@ -44,48 +55,78 @@ __all__ = [
     'MyAnimeListDateProcessor' # 从date_processors模块
 ]
 
-# 从network模块导入
-from utils.network.network import fetch_data_with_retry
-from utils.network.headers import (
-    RequestHeaders, BANGUMI_HEADERS, ANILIST_HEADERS, MYANIMELIST_HEADERS,
-    FILMARKS_HEADERS, FILMARKS_API_HEADERS
-)
-
-# 从text_processor模块导入
-from utils.parsers.text_processor import preprocess_name
-
-# 从global_variables模块导入
-from utils.core.global_variables import FILE_PATH, update_constants, get_allowed_years, get_desired_year
-
-# 从logger模块导入
-from utils.core.logger import setup_logger, date_error
-
-# 从excel_utils模块导入
-from utils.excel.excel_utils import ExcelColumnHelper, safe_write_cell, get_workbook_info
-
-# 从data_validators模块导入
-from utils.validators.data_validators import (
-    is_valid_value, is_valid_name, safe_float, safe_int, validate_score_range,
-    validate_url, sanitize_anime_name, validate_anime_data,
-    UNAVAILABLE_VALUES, INVALID_NAMES
-)
-
-# 从excel_columns模块导入
-from utils.excel.excel_columns import ExcelColumns, ColumnMappings, COLUMN_NAMES
-
-# 从link_parser模块导入
-from src.parsers.link_parser import LinkParser, UrlChecker
-
-# 从twitter_parser模块导入
-from src.parsers.twitter_parser import TwitterParser
-
-
-
-# 从twitter_config模块导入
-from utils.core.twitter_config import setup_twitter_config
-
-# 从myanimelist_config模块导入
-from utils.core.myanimelist_config import setup_myanimelist_api_config, get_myanimelist_api_config
-
-# 从date_processors模块导入
-from utils.date.date_processors import DateProcessor, MyAnimeListDateProcessor
+# 名称 -> 所在模块，首次访问时才导入
+_LAZY_IMPORTS = {
+    # network模块
+    'fetch_data_with_retry': 'utils.network.network',
+    # headers模块
+    'RequestHeaders': 'utils.network.headers',
+    'BANGUMI_HEADERS': 'utils.network.headers',
+    'ANILIST_HEADERS': 'utils.network.headers',
+    'MYANIMELIST_HEADERS': 'utils.network.headers',
+    'FILMARKS_HEADERS': 'utils.network.headers',
+    'FILMARKS_API_HEADERS': 'utils.network.headers',
+    # text_processor模块
+    'preprocess_name': 'utils.parsers.text_processor',
+    # global_variables模块
+    'FILE_PATH': 'utils.core.global_variables',
+    'update_constants': 'utils.core.global_variables',
+    'get_allowed_years': 'utils.core.global_variables',
+    'get_desired_year': 'utils.core.global_variables',
+    'get_cache_path': 'utils.core.global_variables',
+    # metrics模块
+    'get_metrics': 'utils.core.metrics',
+    'report_metrics': 'utils.core.metrics',
+    # logger模块
+    'setup_logger': 'utils.core.logger',
+    'flush_logger': 'utils.core.logger',
+    'log_context': 'utils.core.logger',
+    'date_error': 'utils.core.logger',
+    # excel_utils模块
+    'ExcelColumnHelper': 'utils.excel.excel_utils',
+    'safe_write_cell': 'utils.excel.excel_utils',
+    'get_workbook_info': 'utils.excel.excel_utils',
+    # data_validators模块
+    'is_valid_value': 'utils.validators.data_validators',
+    'is_valid_name': 'utils.validators.data_validators',
+    'safe_float': 'utils.validators.data_validators',
+    'safe_int': 'utils.validators.data_validators',
+    'validate_score_range': 'utils.validators.data_validators',
+    'validate_url': 'utils.validators.data_validators',
+    'sanitize_anime_name': 'utils.validators.data_validators',
+    'validate_anime_data': 'utils.validators.data_validators',
+    'UNAVAILABLE_VALUES': 'utils.validators.data_validators',
+    'INVALID_NAMES': 'utils.validators.data_validators',
+    # excel_columns模块
+    'ExcelColumns': 'utils.excel.excel_columns',
+    'ColumnMappings': 'utils.excel.excel_columns',
+    'COLUMN_NAMES': 'utils.excel.excel_columns',
+    # link_parser模块
+    'LinkParser': 'src.parsers.link_parser',
+    'UrlChecker': 'src.parsers.link_parser',
+    # twitter_parser模块
+    'TwitterParser': 'src.parsers.twitter_parser',
+    # twitter_config模块
+    'setup_twitter_config': 'utils.core.twitter_config',
+    # myanimelist_config模块
+    'setup_myanimelist_api_config': 'utils.core.myanimelist_config',
+    'get_myanimelist_api_config': 'utils.core.myanimelist_config',
+    # date_processors模块
+    'DateProcessor': 'utils.date.date_processors',
+    'MyAnimeListDateProcessor': 'utils.date.date_processors',
+}
+
+
+def __getattr__(name):
+    """首次访问导出名称时导入对应模块，并缓存到包命名空间"""
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,11 +1,16 @@
 # utils/global_variables.py
 # 存放全局变量
 
+import os
+
 # 全局变量，将在程序运行时设置
 ALLOWED_YEARS = []
 DESIRED_YEAR = ""
 FILE_PATH = 'mzzb.xlsx'
 
+# 本地缓存目录（exe哈希、代理检测结果等跨运行复用的数据），可通过环境变量 MZZB_CACHE_DIR 覆盖
+CACHE_DIR = os.environ.get('MZZB_CACHE_DIR', 'mzzb_cache')
+
 def update_constants(year):
     """
     更新全局变量
@@ -35,4 +40,18 @@ def get_desired_year():
     Returns:
         str: 目标年份
     """
-    return DESIRED_YEAR
\ No newline at end of file
+    return DESIRED_YEAR
+
+
+def get_cache_path(filename):
+    """
+    获取本地缓存文件路径（缓存目录不存在时自动创建）
+
+    Args:
+        filename (str): 缓存文件名
+
+    Returns:
+        str: 缓存文件路径
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
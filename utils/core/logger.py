@@ -1,7 +1,125 @@
 # -*- coding: utf-8 -*-
+# 日志配置：控制台和文件输出经过队列由后台线程写出（QueueHandler / QueueListener），
+# 提取线程只负责把日志记录放入队列，不在热路径上争抢文件锁或等待I/O
+#
+# 环境变量：
+#   MZZB_LOG_FORMAT=json   日志文件改为JSON Lines格式（每行一条，带行号、平台等上下文字段），默认 text
+#   MZZB_LOG_QUEUE=0       关闭队列，直接同步写出（调试时使用）
+#
+# 上下文字段通过 log_context(row=..., platform=...) 设置（基于 contextvars，
+# 提交到线程池的任务需要用 contextvars.copy_context().run 继承上下文）。
+# quiet_logs(level) 在当前上下文中只保留该级别及以上的日志（批量转换预取条目等场景）。
+import atexit
+import contextvars
+import io
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-import io
+from contextlib import contextmanager
+from datetime import datetime
+
+LOG_FORMAT_ENV = 'MZZB_LOG_FORMAT'
+LOG_QUEUE_ENV = 'MZZB_LOG_QUEUE'
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 当前日志上下文（行号、原名、平台等）
+_log_context: contextvars.ContextVar = contextvars.ContextVar('mzzb_log_context', default={})
+# 当前上下文输出日志的最低级别（0 表示不限制）
+_quiet: contextvars.ContextVar = contextvars.ContextVar('mzzb_log_quiet', default=0)
+
+# 后台写日志的监听器（关闭队列时为None）
+_listener = None
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    在当前上下文中附加日志字段（嵌套时合并，退出时恢复）
+    Args:
+        **fields: 上下文字段，如 row=5、anime='原名'、platform='bangumi'
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+@contextmanager
+def quiet_logs(level: int = logging.WARNING):
+    """
+    在当前上下文中屏蔽低于指定级别的日志（不影响其他线程）
+    Args:
+        level: 保留的最低日志级别
+    """
+    token = _quiet.set(level)
+    try:
+        yield
+    finally:
+        _quiet.reset(token)
+
+
+def get_log_context() -> dict:
+    """获取当前日志上下文字段"""
+    return _log_context.get()
+
+
+class ContextFilter(logging.Filter):
+    """把当前日志上下文附加到日志记录的 context 属性上（在产生日志的线程中执行）"""
+
+    def filter(self, record):
+        if record.levelno < _quiet.get():
+            return False
+        record.context = _log_context.get()
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """JSON Lines格式：每条日志一行JSON"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'context', None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    只在产生日志的线程中合并 % 参数，时间戳等格式化交给后台监听线程完成
+    （默认的 QueueHandler.prepare 会在当前线程完整格式化一次）
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _console_stream():
+    """控制台输出流（UTF-8，行缓冲）"""
+    if sys.platform == 'win32':
+        # 在Windows系统中，特别是exe环境中，确保控制台输出使用UTF-8编码
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
+    # 设置行缓冲模式，确保及时输出
+    sys.stdout.reconfigure(line_buffering=True)
+    return sys.stdout
+
 
 def setup_logger(log_file_path='mzzb_score.log'):
     """
@@ -13,23 +131,37 @@ def setup_logger(log_file_path='mzzb_score.log'):
     Returns:
         配置好的logger对象
     """
-    # 设置控制台输出编码，启用行缓冲
-    console_handler = logging.StreamHandler()
-    if sys.platform == 'win32':
-        # 在Windows系统中，特别是exe环境中，确保控制台输出使用UTF-8编码
-        console_handler.stream = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
+    global _listener
+
+    console_handler = logging.StreamHandler(_console_stream())
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    file_handler = logging.FileHandler(log_file_path, mode='w', encoding='utf-8')  # 文件输出UTF-8
+    if os.environ.get(LOG_FORMAT_ENV, '').strip().lower() == 'json':
+        file_handler.setFormatter(JsonLinesFormatter())
     else:
-        # 设置行缓冲模式，确保及时输出
-        console_handler.stream = sys.stdout
-        sys.stdout.reconfigure(line_buffering=True)
-    
-    # 配置日志
-    logging.basicConfig(level=logging.INFO,
-                        format='%(asctime)s - %(levelname)s - %(message)s',
-                        handlers=[
-                            logging.FileHandler(log_file_path, mode='w', encoding='utf-8'),  # 文件输出UTF-8
-                            console_handler  # 控制台输出UTF-8
-                        ])
+        file_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    if os.environ.get(LOG_QUEUE_ENV, '').strip() == '0':
+        for handler in (file_handler, console_handler):
+            handler.addFilter(ContextFilter())
+            root.addHandler(handler)
+    else:
+        queue_handler = _LazyQueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(ContextFilter())
+        root.addHandler(queue_handler)
+        _listener = logging.handlers.QueueListener(queue_handler.queue, file_handler, console_handler,
+                                                   respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logger)
     
     # 控制第三方库的详细日志输出
     # 禁用 httpx 的详细HTTP请求日志
@@ -41,7 +173,24 @@ def setup_logger(log_file_path='mzzb_score.log'):
     # 控制 asyncio 的详细日志
     logging.getLogger('asyncio').setLevel(logging.WARNING)
     
-    return logging.getLogger()
+    return root
+
+
+def flush_logger():
+    """
+    等待队列中的日志全部写出（等待用户输入前调用，避免提示与日志交错）
+    """
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def stop_logger():
+    """停止后台日志线程并写出剩余日志（程序退出时自动调用）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 def setup_interactive_logger():
     """
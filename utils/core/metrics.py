@@ -0,0 +1,397 @@
+# utils/core/metrics.py
+# 运行指标：按平台和接口统计请求（次数、延迟直方图、重试、429、缓存命中、字节数），
+# 以及按阶段统计每行处理耗时（各平台提取、交叉兜底、Twitter、Excel写入、保存）
+#
+# 运行结束时 main.py 会输出汇总表；设置 MZZB_METRICS_EXPORT 可额外导出：
+#   MZZB_METRICS_EXPORT=metrics.json   导出JSON
+#   MZZB_METRICS_EXPORT=metrics.prom   导出Prometheus文本格式（扩展名为 .prom 或 .txt）
+#
+# 所有记录方法都是线程安全的（四个平台的提取在线程池中并发执行）。
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 导出路径环境变量
+METRICS_EXPORT_ENV = 'MZZB_METRICS_EXPORT'
+
+# 延迟直方图的桶上界（秒），最后一个桶为 +Inf
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """固定桶的耗时直方图（非线程安全，由 MetricsRegistry 加锁保护）"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        按桶估算分位数（返回所在桶的上界，落在 +Inf 桶时返回最大值）
+        Args:
+            q: 0~1 之间的分位
+        Returns:
+            float: 估算的耗时（秒），没有样本时返回None
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            seen += self.buckets[i]
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum_s': round(self.total, 4),
+            'max_s': round(self.max, 4),
+            'p50_s': self.quantile(0.5),
+            'p95_s': self.quantile(0.95),
+            'buckets': {str(bound): n for bound, n in zip(LATENCY_BUCKETS + ('+Inf',), self.buckets)},
+        }
+
+
+class RequestStats:
+    """单个（平台, 接口）的请求统计"""
+
+    __slots__ = ('requests', 'errors', 'retries', 'rate_limited', 'not_modified', 'cache_hits', 'cache_misses',
+                 'bytes', 'statuses', 'latency')
+
+    def __init__(self):
+        self.requests = 0        # 实际发出的请求（每次重试都计一次）
+        self.errors = 0          # 异常或非2xx/3xx响应
+        self.retries = 0
+        self.rate_limited = 0    # 429
+        self.not_modified = 0    # 304（条件请求命中持久化HTTP缓存）
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes = 0
+        self.statuses: Dict[str, int] = {}
+        self.latency = Histogram()
+
+    def to_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'not_modified': self.not_modified,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'bytes': self.bytes,
+            'statuses': dict(self.statuses),
+            'latency': self.latency.to_dict(),
+        }
+
+
+class MetricsRegistry:
+    """请求与阶段指标的注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str], RequestStats] = {}
+        self._stages: Dict[str, Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Dict]]] = {}
+        self._started = time.time()
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Dict]]) -> None:
+        """
+        注册一组由其他模块维护的数值指标（如各站点的并发窗口），输出时调用 collect() 读取
+        Args:
+            name: 指标组名（Prometheus 中为 mzzb_<name>_<字段>，标签为 key）
+            collect: 返回 {key: {字段: 数值}} 的函数
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _collect(self) -> Dict[str, Dict[str, Dict]]:
+        with self._lock:
+            collectors = dict(self._collectors)
+        results = {}
+        for name, collect in collectors.items():
+            try:
+                results[name] = collect()
+            except Exception as e:
+                logging.warning(f"读取指标组 {name} 失败: {e}")
+        return results
+
+    def reset(self) -> None:
+        """清空所有指标"""
+        with self._lock:
+            self._requests.clear()
+            self._stages.clear()
+            self._started = time.time()
+
+    def _request_stats(self, platform: str, endpoint: str) -> RequestStats:
+        key = (platform, endpoint)
+        stats = self._requests.get(key)
+        if stats is None:
+            stats = self._requests[key] = RequestStats()
+        return stats
+
+    # ------------------------------------------------------------------
+    # 请求指标
+    # ------------------------------------------------------------------
+
+    def record_request(self, platform: str, endpoint: str, status, elapsed: float, nbytes: int = 0) -> None:
+        """
+        记录一次实际发出的请求
+        Args:
+            platform: 平台名
+            endpoint: 接口路径（数字ID已归并为 {id}）
+            status: HTTP状态码，或异常类名（请求未得到响应时）
+            elapsed: 耗时（秒）
+            nbytes: 响应体字节数
+        """
+        status_key = str(status)
+        with self._lock:
+            stats = self._request_stats(platform, endpoint)
+            stats.requests += 1
+            stats.bytes += nbytes
+            stats.statuses[status_key] = stats.statuses.get(status_key, 0) + 1
+            stats.latency.observe(elapsed)
+            if status == 429:
+                stats.rate_limited += 1
+            elif status == 304:
+                stats.not_modified += 1
+            if not isinstance(status, int) or status >= 400:
+                stats.errors += 1
+
+    def record_retry(self, platform: str, endpoint: str) -> None:
+        """记录一次重试"""
+        with self._lock:
+            self._request_stats(platform, endpoint).retries += 1
+
+    def record_cache(self, platform: str, endpoint: str, hit: bool) -> None:
+        """记录一次内存缓存查询结果"""
+        with self._lock:
+            stats = self._request_stats(platform, endpoint)
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+
+    # ------------------------------------------------------------------
+    # 阶段指标
+    # ------------------------------------------------------------------
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        """
+        记录某个阶段的一次耗时
+        Args:
+            name: 阶段名，如 extract、extract.bangumi、fallback、twitter、write、save
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """计时上下文：退出时记录阶段耗时（出现异常也会记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        """导出为可JSON序列化的字典"""
+        collected = self._collect()
+        with self._lock:
+            return {
+                'started_at': self._started,
+                'duration_s': round(time.time() - self._started, 3),
+                'requests': [
+                    dict(platform=platform, endpoint=endpoint, **stats.to_dict())
+                    for (platform, endpoint), stats in sorted(self._requests.items())
+                ],
+                'stages': {name: histogram.to_dict() for name, histogram in sorted(self._stages.items())},
+                **collected,
+            }
+
+    def to_prometheus(self) -> str:
+        """导出为Prometheus文本格式"""
+        lines: List[str] = []
+        collected = self._collect()
+        with self._lock:
+            requests = sorted(self._requests.items())
+            stages = sorted(self._stages.items())
+
+            counters = (
+                ('mzzb_http_requests_total', 'requests', '实际发出的HTTP请求数'),
+                ('mzzb_http_errors_total', 'errors', '失败的HTTP请求数'),
+                ('mzzb_http_retries_total', 'retries', 'HTTP重试次数'),
+                ('mzzb_http_rate_limited_total', 'rate_limited', '429响应数'),
+                ('mzzb_http_not_modified_total', 'not_modified', '304响应数（持久化HTTP缓存重新验证命中）'),
+                ('mzzb_http_cache_hits_total', 'cache_hits', '内存缓存命中数'),
+                ('mzzb_http_cache_misses_total', 'cache_misses', '内存缓存未命中数'),
+                ('mzzb_http_response_bytes_total', 'bytes', '响应体字节数'),
+            )
+            for metric, attr, help_text in counters:
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} counter')
+                for (platform, endpoint), stats in requests:
+                    lines.append(f'{metric}{{{_labels(platform=platform, endpoint=endpoint)}}} {getattr(stats, attr)}')
+
+            lines.append('# HELP mzzb_http_responses_total 按状态码统计的HTTP响应数')
+            lines.append('# TYPE mzzb_http_responses_total counter')
+            for (platform, endpoint), stats in requests:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'mzzb_http_responses_total{{{_labels(platform=platform, endpoint=endpoint, status=status)}}} {count}')
+
+            lines.append('# HELP mzzb_http_request_duration_seconds HTTP请求耗时')
+            lines.append('# TYPE mzzb_http_request_duration_seconds histogram')
+            for (platform, endpoint), stats in requests:
+                _append_histogram(lines, 'mzzb_http_request_duration_seconds', stats.latency,
+                                  platform=platform, endpoint=endpoint)
+
+            lines.append('# HELP mzzb_stage_duration_seconds 各处理阶段耗时')
+            lines.append('# TYPE mzzb_stage_duration_seconds histogram')
+            for name, histogram in stages:
+                _append_histogram(lines, 'mzzb_stage_duration_seconds', histogram, stage=name)
+
+        for group, items in collected.items():
+            fields = sorted({field for values in items.values() for field, value in values.items()
+                             if isinstance(value, (int, float)) and not isinstance(value, bool)})
+            for field in fields:
+                metric = f'mzzb_{group}_{field}'
+                lines.append(f'# TYPE {metric} gauge')
+                for key, values in items.items():
+                    if isinstance(values.get(field), (int, float)):
+                        lines.append(f'{metric}{{{_labels(key=key)}}} {values[field]}')
+        return '\n'.join(lines) + '\n'
+
+    def summary_lines(self) -> List[str]:
+        """生成运行结束时输出的汇总表"""
+        data = self.to_dict()
+        lines = []
+        if data['requests']:
+            lines.append('请求统计：')
+            lines.append(f"{'平台':<12} {'接口':<28} {'请求':>6} {'错误':>5} {'重试':>5} {'429':>5} {'304':>5} "
+                         f"{'缓存命中':>8} {'KB':>9} {'平均ms':>8} {'p95ms':>8} {'最大ms':>8}")
+            for item in data['requests']:
+                latency = item['latency']
+                avg = latency['sum_s'] / latency['count'] * 1000 if latency['count'] else 0.0
+                lines.append(
+                    f"{item['platform']:<12} {item['endpoint'][:28]:<28} {item['requests']:>6} {item['errors']:>5} "
+                    f"{item['retries']:>5} {item['rate_limited']:>5} {item['not_modified']:>5} {item['cache_hits']:>8} "
+                    f"{item['bytes'] / 1024:>9.1f} {avg:>8.0f} {_ms(latency['p95_s']):>8} {latency['max_s'] * 1000:>8.0f}"
+                )
+        if data['stages']:
+            lines.append('阶段耗时：')
+            lines.append(f"{'阶段':<24} {'次数':>6} {'合计s':>9} {'平均ms':>8} {'p95ms':>8} {'最大ms':>8}")
+            for name, stage in data['stages'].items():
+                avg = stage['sum_s'] / stage['count'] * 1000 if stage['count'] else 0.0
+                lines.append(f"{name:<24} {stage['count']:>6} {stage['sum_s']:>9.2f} {avg:>8.0f} "
+                             f"{_ms(stage['p95_s']):>8} {stage['max_s'] * 1000:>8.0f}")
+        for group in self._collectors:
+            items = data.get(group) or {}
+            if not items:
+                continue
+            fields = list(next(iter(items.values())))
+            lines.append(f'{group}：')
+            lines.append(f"{'':<36} " + ' '.join(f'{field:>10}' for field in fields))
+            for key, values in items.items():
+                lines.append(f"{key[:36]:<36} " + ' '.join(f"{_cell(values.get(field)):>10}" for field in fields))
+        return lines
+
+    def export(self, path: str) -> None:
+        """
+        导出到文件（.prom / .txt 为Prometheus文本格式，其余为JSON）
+        Args:
+            path: 导出文件路径
+        """
+        if path.lower().endswith(('.prom', '.txt')):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return '-'
+    return f'{value:g}' if isinstance(value, float) else str(value)
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return '-' if seconds is None else f'{seconds * 1000:.0f}'
+
+
+def _labels(**labels) -> str:
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in labels.items()
+    )
+
+
+def _append_histogram(lines: List[str], metric: str, histogram: Histogram, **labels) -> None:
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram.buckets):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{_labels(**labels, le=bound)}}} {cumulative}')
+    lines.append(f'{metric}_sum{{{_labels(**labels)}}} {histogram.total:.6f}')
+    lines.append(f'{metric}_count{{{_labels(**labels)}}} {histogram.count}')
+
+
+# 全局注册表
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """获取全局指标注册表"""
+    return _metrics
+
+
+def report_metrics(logger: Optional[logging.Logger] = None) -> None:
+    """
+    输出指标汇总表，并在设置了 MZZB_METRICS_EXPORT 时导出到文件
+    Args:
+        logger: 日志记录器，默认使用根记录器
+    """
+    logger = logger or logging.getLogger()
+    lines = _metrics.summary_lines()
+    if lines:
+        logger.info("=" * 50)
+        for line in lines:
+            logger.info(line)
+
+    export_path = os.environ.get(METRICS_EXPORT_ENV, '').strip()
+    if export_path:
+        try:
+            _metrics.export(export_path)
+            logger.info(f"运行指标已导出到 {export_path}")
+        except OSError as e:
+            logger.error(f"导出运行指标到 {export_path} 失败: {e}")
@@ -0,0 +1,391 @@
+# utils/core/profiling.py
+# 可选的整次运行性能剖析：cProfile（确定性）或采样剖析，以及轻量的追踪区间（span）
+#
+# 启用方式（二选一）：
+#   python main.py --profile              默认 cProfile
+#   python main.py --profile=sample       采样剖析（开销更小，按墙钟时间统计，包含等待网络的时间）
+#   MZZB_PROFILE=cprofile|sample          exe 环境下使用环境变量
+#
+# 其他环境变量：
+#   MZZB_PROFILE_OUTPUT       输出文件前缀，默认 mzzb_profile
+#   MZZB_PROFILE_INTERVAL_MS  采样间隔（毫秒），默认 5
+#
+# 输出文件：
+#   cprofile 模式：<前缀>.pstats（所有线程合并）以及按线程分组的 <前缀>.<线程>.pstats
+#                  （Python 3.12+ 的 cProfile 基于 sys.monitoring，一个剖析器即覆盖所有线程，只输出合并结果）
+#   sample 模式：  <前缀>.collapsed（折叠栈格式，可直接交给 flamegraph.pl / speedscope）
+#   两种模式都会输出 <前缀>.trace.json（Chrome Trace 格式的追踪区间，可用 chrome://tracing 或 Perfetto 打开）
+#
+# 线程按名称分组（去掉名称中的编号），四个平台的提取线程池统一归为 extract 线程组；
+# 采样栈的根部会带上线程名和当前所在的追踪区间，便于区分各平台的耗时。
+# 未启用剖析时，span / traced 只做一次布尔判断，不产生额外开销。
+
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+PROFILE_ENV = 'MZZB_PROFILE'
+PROFILE_OUTPUT_ENV = 'MZZB_PROFILE_OUTPUT'
+PROFILE_INTERVAL_ENV = 'MZZB_PROFILE_INTERVAL_MS'
+
+PROFILE_MODES = ('cprofile', 'sample')
+DEFAULT_OUTPUT_PREFIX = 'mzzb_profile'
+DEFAULT_INTERVAL_MS = 5.0
+
+# Python 3.12+ 同一时间只能有一个 cProfile 处于启用状态，主线程的剖析器已经覆盖所有线程
+CPROFILE_COVERS_ALL_THREADS = sys.version_info >= (3, 12)
+
+# 线程名中的编号（ThreadPoolExecutor-3_1、extract_2 等），分组时去掉
+_THREAD_NUMBER = re.compile(r'[-_]?\d+')
+
+_NULL_SPAN = nullcontext()
+
+# 当前的剖析器（未启用时为None）
+_profiler = None
+
+
+def thread_group(name: str) -> str:
+    """把线程名归并为线程组名（去掉编号）"""
+    return _THREAD_NUMBER.sub('', name) or name
+
+
+def get_profile_mode(argv: Optional[List[str]] = None) -> Optional[str]:
+    """
+    从命令行参数（--profile / --profile=sample）或环境变量 MZZB_PROFILE 读取剖析模式
+    Args:
+        argv: 命令行参数，默认使用 sys.argv
+    Returns:
+        str or None: cprofile / sample，未启用时返回None
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    mode = None
+    for arg in argv:
+        if arg == '--profile':
+            mode = 'cprofile'
+        elif arg.startswith('--profile='):
+            mode = arg.split('=', 1)[1].strip().lower()
+    if mode is None:
+        mode = os.environ.get(PROFILE_ENV, '').strip().lower() or None
+    if mode in ('1', 'true', 'on'):
+        mode = 'cprofile'
+    if mode is not None and mode not in PROFILE_MODES:
+        logging.warning(f"未知的剖析模式 {mode!r}，可选值: {', '.join(PROFILE_MODES)}，已忽略")
+        return None
+    return mode
+
+
+class _StatsSnapshot:
+    """已采集的 cProfile 统计（pstats.Stats 会调用 create_stats，这里不再停止剖析器）"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class Profiler:
+    """整次运行的剖析器：cProfile 或采样，外加追踪区间记录"""
+
+    def __init__(self, mode: str, output_prefix: str = DEFAULT_OUTPUT_PREFIX,
+                 interval_ms: float = DEFAULT_INTERVAL_MS):
+        """
+        Args:
+            mode: cprofile / sample
+            output_prefix: 输出文件前缀
+            interval_ms: 采样间隔（毫秒，仅 sample 模式）
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}")
+        self.mode = mode
+        self.output_prefix = output_prefix
+        self.interval = max(interval_ms, 0.5) / 1000.0
+        self._lock = threading.Lock()
+        self._started_ns = 0
+        # 追踪区间：完成的事件（Chrome Trace 'X' 事件）和各线程当前的区间栈
+        self._events: List[dict] = []
+        self._span_stacks: Dict[int, List[str]] = {}
+        # cprofile 模式
+        self._main_profile = None
+        self._thread_profiles: List[tuple] = []
+        # sample 模式
+        self._samples: Dict[str, int] = {}
+        self._sample_count = 0
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------
+    # 启动 / 停止
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        self._started_ns = time.perf_counter_ns()
+        if self.mode == 'cprofile':
+            import cProfile
+
+            # 之后启动的线程（提取线程池等）各自创建一个剖析器
+            if not CPROFILE_COVERS_ALL_THREADS:
+                threading.setprofile(self._thread_profile_hook)
+            self._main_profile = cProfile.Profile()
+            self._main_profile.enable()
+        else:
+            self._stop_event.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name='mzzb-profiler', daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        if self.mode == 'cprofile':
+            if not CPROFILE_COVERS_ALL_THREADS:
+                threading.setprofile(None)
+            if self._main_profile is not None:
+                self._main_profile.disable()
+        elif self._sampler is not None:
+            self._stop_event.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _thread_profile_hook(self, frame, event, arg):
+        """新线程第一次产生剖析事件时，为该线程创建并启用 cProfile（启用后会替换掉这个钩子）"""
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 已有其他剖析工具处于启用状态：不能让线程在运行目标函数之前就因此退出
+            sys.setprofile(None)
+            return
+        with self._lock:
+            self._thread_profiles.append((threading.current_thread().name, profile))
+
+    # ------------------------------------------------------------------
+    # 采样
+    # ------------------------------------------------------------------
+
+    def _sample_loop(self) -> None:
+        own_ident = threading.get_ident()
+        thread_names: Dict[int, str] = {}
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            if any(ident not in thread_names for ident in frames):
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            with self._lock:
+                span_stacks = {ident: list(stack) for ident, stack in self._span_stacks.items() if stack}
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                root = [thread_group(thread_names.get(ident, str(ident)))]
+                root.extend(f"span:{name}" for name in span_stacks.get(ident, ()))
+                key = ';'.join(root + stack)
+                self._samples[key] = self._samples.get(key, 0) + 1
+            self._sample_count += 1
+
+    # ------------------------------------------------------------------
+    # 追踪区间
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str):
+        ident = threading.get_ident()
+        with self._lock:
+            self._span_stacks.setdefault(ident, []).append(name)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            thread_name = threading.current_thread().name
+            with self._lock:
+                self._span_stacks[ident].pop()
+                self._events.append({
+                    'name': name,
+                    'ph': 'X',
+                    'ts': (start - self._started_ns) / 1000.0,
+                    'dur': (end - start) / 1000.0,
+                    'pid': os.getpid(),
+                    'tid': ident,
+                    'args': {'thread': thread_name},
+                })
+
+    def span_summary(self) -> List[tuple]:
+        """
+        按区间名汇总
+        Returns:
+            list: (区间名, 次数, 合计秒数, 最大秒数)，按合计耗时降序
+        """
+        totals: Dict[str, list] = {}
+        with self._lock:
+            for event in self._events:
+                item = totals.setdefault(event['name'], [0, 0.0, 0.0])
+                item[0] += 1
+                item[1] += event['dur'] / 1e6
+                item[2] = max(item[2], event['dur'] / 1e6)
+        return sorted(((name, *values) for name, values in totals.items()), key=lambda row: row[2], reverse=True)
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+
+    def write(self) -> List[str]:
+        """
+        写出剖析结果
+        Returns:
+            list: 写出的文件路径
+        """
+        directory = os.path.dirname(self.output_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        paths = self._write_pstats() if self.mode == 'cprofile' else self._write_collapsed()
+        paths.append(self._write_trace())
+        return paths
+
+    def _write_pstats(self) -> List[str]:
+        import pstats
+
+        groups: Dict[str, list] = {}
+        if self._main_profile is not None:
+            self._main_profile.snapshot_stats()
+            groups['MainThread'] = [_StatsSnapshot(self._main_profile.stats)]
+        with self._lock:
+            thread_profiles = list(self._thread_profiles)
+        for thread_name, profile in thread_profiles:
+            # 不调用 disable：它只会作用于当前（主）线程
+            profile.snapshot_stats()
+            if profile.stats:
+                groups.setdefault(thread_group(thread_name), []).append(_StatsSnapshot(profile.stats))
+
+        paths = []
+        combined = None
+        for group, snapshots in sorted(groups.items()):
+            stats = pstats.Stats(snapshots[0])
+            for snapshot in snapshots[1:]:
+                stats.add(snapshot)
+            path = f"{self.output_prefix}.{group}.pstats"
+            stats.dump_stats(path)
+            paths.append(path)
+            if combined is None:
+                combined = pstats.Stats(_StatsSnapshot(dict(stats.stats)))
+            else:
+                combined.add(_StatsSnapshot(stats.stats))
+        if combined is not None:
+            path = f"{self.output_prefix}.pstats"
+            combined.dump_stats(path)
+            paths.insert(0, path)
+        return paths
+
+    def _write_collapsed(self) -> List[str]:
+        path = f"{self.output_prefix}.collapsed"
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write(f"{stack} {count}\n")
+        return [path]
+
+    def _write_trace(self) -> str:
+        path = f"{self.output_prefix}.trace.json"
+        with self._lock:
+            events = list(self._events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return path
+
+
+def start_profiling(mode: str, output_prefix: Optional[str] = None,
+                    interval_ms: Optional[float] = None) -> Profiler:
+    """
+    启动整次运行的剖析（追踪区间从此刻开始记录）
+    Args:
+        mode: cprofile / sample
+        output_prefix: 输出文件前缀，默认读取 MZZB_PROFILE_OUTPUT
+        interval_ms: 采样间隔，默认读取 MZZB_PROFILE_INTERVAL_MS
+    Returns:
+        Profiler: 剖析器
+    """
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+
+    if output_prefix is None:
+        output_prefix = os.environ.get(PROFILE_OUTPUT_ENV, '').strip() or DEFAULT_OUTPUT_PREFIX
+    if interval_ms is None:
+        try:
+            interval_ms = float(os.environ.get(PROFILE_INTERVAL_ENV, '') or DEFAULT_INTERVAL_MS)
+        except ValueError:
+            interval_ms = DEFAULT_INTERVAL_MS
+
+    profiler = Profiler(mode, output_prefix, interval_ms)
+    profiler.start()
+    _profiler = profiler
+    logging.info(f"性能剖析已启用（{mode}），结果将写入 {output_prefix}.*")
+    return profiler
+
+
+def stop_profiling() -> List[str]:
+    """
+    停止剖析并写出结果，同时在日志中输出耗时最多的追踪区间
+    Returns:
+        list: 写出的文件路径（未启用剖析时为空）
+    """
+    global _profiler
+    profiler = _profiler
+    if profiler is None:
+        return []
+    _profiler = None
+    profiler.stop()
+
+    paths = profiler.write()
+    summary = profiler.span_summary()
+    if summary:
+        logging.info(f"{'追踪区间':<32} {'次数':>6} {'合计s':>9} {'最大ms':>8}")
+        for name, count, total, longest in summary[:20]:
+            logging.info(f"{name:<32} {count:>6} {total:>9.2f} {longest * 1000:>8.0f}")
+    logging.info(f"性能剖析结果已写入: {', '.join(paths)}")
+    return paths
+
+
+def is_profiling() -> bool:
+    """是否正在剖析"""
+    return _profiler is not None
+
+
+def span(name: str):
+    """
+    追踪区间上下文：剖析期间记录耗时和所在线程，未启用时什么都不做
+    Args:
+        name: 区间名
+    """
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.span(name)
+
+
+def traced(name: str):
+    """
+    追踪区间装饰器（剖析期间记录每次调用）
+    Args:
+        name: 区间名
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -4,6 +4,7 @@
 import logging
 from typing import Dict, Optional
 from utils.network.proxy_config import get_global_proxy
+from utils.network.replay import recorded_call
 
 
 class TwitterInteractiveConfig:
@@ -60,6 +61,10 @@ class TwitterInteractiveConfig:
         Returns:
             bool: 是否成功收集到有效配置
         """
+        # 先写出队列中的普通日志，避免与交互提示交错
+        from utils.core.logger import flush_logger
+        flush_logger()
+
         self.logger.info("\n" + "=" * 60)
         self.logger.info("[TWITTER] Twitter粉丝数获取功能配置")
         self.logger.info("=" * 60)
@@ -201,7 +206,8 @@ class TwitterInteractiveConfig:
 
             # 测试查询 @naobou_official（动漫相关账号，几乎必然存在）
             self.logger.info("[SEARCH] 正在测试查询 @naobou_official 的粉丝数...")
-            results = s.get_user_info(["naobou_official"])
+            results = recorded_call('scweet', 'get_user_info:naobou_official',
+                                    lambda: s.get_user_info(["naobou_official"]))
 
             if results:
                 user_info = results[0]
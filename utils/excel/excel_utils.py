@@ -1,7 +1,44 @@
 # utils/excel_utils.py
 # Excel操作相关的工具函数
+#
+# ExcelColumnHelper 的写入会先与单元格中已加载的值比较，只有值（或超链接、数字格式）真正变化时才写入，
+# 并记录到 changes；没有任何变化的表格可以跳过保存（见 src/targets.py）。
 
 import logging
+import math
+import numbers
+from typing import Any, Dict, NamedTuple
+
+
+class CellChange(NamedTuple):
+    """一个发生变化的单元格（同一单元格多次写入时保留最初的原值）"""
+    row: int
+    column: str
+    old: Any
+    new: Any
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def same_cell_value(old, new) -> bool:
+    """
+    比较单元格原值与新值：空值与空字符串视为相同，数值按大小比较（7 与 7.0 相同）
+    Args:
+        old: 单元格中已有的值
+        new: 要写入的值
+    Returns:
+        bool: 是否相同
+    """
+    if old == '':
+        old = None
+    if new == '':
+        new = None
+    if _is_number(old) and _is_number(new):
+        old, new = float(old), float(new)
+        return old == new or (math.isnan(old) and math.isnan(new))
+    return type(old) is type(new) and old == new
 
 
 class ExcelColumnHelper:
@@ -17,6 +54,7 @@ class ExcelColumnHelper:
         self.ws = ws
         self.header_row = header_row
         self.columns = {}
+        self.changes: Dict[tuple, CellChange] = {}  # (行号, 列名) -> CellChange
         self._build_column_mapping()
     
     def _build_column_mapping(self):
@@ -49,7 +87,50 @@ class ExcelColumnHelper:
             bool: 列是否存在
         """
         return column_name.strip() in self.columns
-    
+
+    def _record_change(self, row_num, column_name, old, new):
+        key = (row_num, column_name)
+        previous = self.changes.get(key)
+        self.changes[key] = CellChange(row_num, column_name, previous.old if previous else old, new)
+
+    def write_cell(self, cell, column_name, value, number_format=None):
+        """
+        写入单元格：值和数字格式都与已有内容相同时不做任何修改
+        Args:
+            cell: Excel单元格对象
+            column_name: 列名（用于记录变化）
+            value: 要写入的值
+            number_format: 可选的数字格式
+        Returns:
+            bool: 是否发生了变化
+        """
+        old = cell.value
+        changed = not same_cell_value(old, value)
+        if changed:
+            cell.value = value
+        if number_format and cell.number_format != number_format:
+            cell.number_format = number_format
+            changed = True
+        if changed:
+            self._record_change(cell.row, column_name, old, value)
+        return changed
+
+    @property
+    def has_changes(self):
+        """是否有单元格发生了变化"""
+        return bool(self.changes)
+
+    def change_summary(self):
+        """
+        按列统计发生变化的单元格数
+        Returns:
+            dict: 列名 -> 单元格数（按表头顺序）
+        """
+        counts = {}
+        for change in self.changes.values():
+            counts[change.column] = counts.get(change.column, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: self.columns.get(item[0], len(self.columns))))
+
     def safe_write(self, row, column_name, value):
         """
         安全写入数据到指定列
@@ -63,7 +144,7 @@ class ExcelColumnHelper:
         col_idx = self.get_col_index(column_name)
         if col_idx is not None:
             try:
-                row[col_idx].value = value if value is not None else None
+                self.write_cell(row[col_idx], column_name, value)
                 return True
             except Exception as e:
                 logging.error(f"写入列 '{column_name}' 时出错: {e}")
@@ -88,9 +169,19 @@ class ExcelColumnHelper:
             try:
                 # openpyxl中列索引从1开始，但我们的索引从0开始，所以要+1
                 cell = self.ws.cell(row=row_num, column=col_idx + 1)
-                cell.hyperlink = url
                 # 设置显示文本，如果没有提供则使用URL
-                cell.value = display_text if display_text else url
+                text = display_text if display_text else url
+                old_value = cell.value
+                old_url = cell.hyperlink.target if cell.hyperlink else None
+                if old_url != url:
+                    # 注意：单元格为空时 openpyxl 会把链接同时设为单元格的值
+                    cell.hyperlink = url
+                if not same_cell_value(old_value, text):
+                    cell.value = text
+                    self._record_change(row_num, column_name, old_value, text)
+                elif old_url != url:
+                    # 显示文本不变、只有链接变化时，记录链接的变化
+                    self._record_change(row_num, column_name, old_url, url)
                 return True
             except Exception as e:
                 logging.error(f"写入超链接到列 '{column_name}' 时出错: {e}")
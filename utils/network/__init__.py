@@ -4,6 +4,10 @@
 
 from .network import *
 from .proxy_config import setup_proxy, get_global_proxy, has_proxy, get_proxy_status, reset_proxy, verify_direct_twitter_connection, is_twitter_accessible, reset_twitter_accessibility
-from .update import check_update
+from .proxy_config import start_proxy_setup_in_background, wait_for_proxy_setup
+from .update import check_update, check_update_in_background
+from .replay import get_http_mode, get_replay_stats
 
-__all__ = ['setup_proxy', 'get_global_proxy', 'has_proxy', 'get_proxy_status', 'reset_proxy', 'verify_direct_twitter_connection', 'is_twitter_accessible', 'reset_twitter_accessibility', 'check_update'] 
\ No newline at end of file
+__all__ = ['setup_proxy', 'get_global_proxy', 'has_proxy', 'get_proxy_status', 'reset_proxy', 'verify_direct_twitter_connection', 'is_twitter_accessible', 'reset_twitter_accessibility', 'check_update',
+           'start_proxy_setup_in_background', 'wait_for_proxy_setup', 'check_update_in_background',
+           'get_http_mode', 'get_replay_stats'] 
\ No newline at end of file
@@ -0,0 +1,150 @@
+# utils/network/budget.py
+# 全局重试预算和单行截止时间，避免个别条目（反复超时、持续429）拖住整次运行
+#
+# 重试预算：整个进程的重试次数不超过已发送请求数的一定比例（另有少量保底额度，小表格也能正常重试）。
+#   站点大面积故障时，重试不再成倍放大请求量，预算用完后请求失败即放弃。
+# 单行截止时间：process_row 为每行设置截止时间（保存在 contextvars 中，任务图的工作线程会继承），
+#   网络请求的超时和退避等待都不会超过剩余时间，过了截止时间的请求直接放弃；
+#   任务图不再启动新任务，未完成的平台在表格中写为 TIMEOUT。
+#
+# 环境变量：
+#   MZZB_RETRY_BUDGET     重试次数占请求数的比例上限，默认 0.1
+#   MZZB_ROW_DEADLINE     单行截止时间（秒），默认 120；0 表示不限制
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from utils.core.metrics import get_metrics
+
+RETRY_BUDGET_ENV = 'MZZB_RETRY_BUDGET'
+ROW_DEADLINE_ENV = 'MZZB_ROW_DEADLINE'
+
+DEFAULT_RETRY_RATIO = 0.1
+# 保底重试次数：运行刚开始请求数还很少时也允许重试
+RETRY_RESERVE = 10
+DEFAULT_ROW_DEADLINE = 120.0
+
+# 当前行的截止时间（time.monotonic()），None 表示不限制
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('mzzb_row_deadline', default=None)
+
+
+def _read_float(env_name: str, default: float) -> float:
+    value = os.environ.get(env_name, '').strip()
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        logging.warning(f"{env_name} 不是有效的数字，使用默认值 {default}")
+        return default
+
+
+def get_row_deadline() -> float:
+    """单行截止时间（秒），0 表示不限制"""
+    return _read_float(ROW_DEADLINE_ENV, DEFAULT_ROW_DEADLINE)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    在当前上下文中设置截止时间（已有更早的截止时间时保留更早的）
+    Args:
+        seconds: 从现在起的秒数，None 或 0 表示不限制
+    """
+    deadline = time.monotonic() + seconds if seconds else None
+    current = _deadline.get()
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """当前上下文距截止时间的剩余秒数（可能为负），未设置截止时间时返回None"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def deadline_exceeded() -> bool:
+    """当前上下文是否已过截止时间"""
+    remaining = time_remaining()
+    return remaining is not None and remaining <= 0
+
+
+class RetryBudget:
+    """进程级重试预算：重试次数 ≤ 保底额度 + 比例 × 已发送请求数"""
+
+    def __init__(self, ratio: float = DEFAULT_RETRY_RATIO, reserve: int = RETRY_RESERVE):
+        """
+        Args:
+            ratio: 重试次数占请求数的比例上限
+            reserve: 保底重试次数
+        """
+        self.ratio = ratio
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self.row_timeouts = 0
+
+    @property
+    def limit(self) -> int:
+        """当前允许的重试总数"""
+        return self.reserve + int(self.ratio * self.requests)
+
+    def record_request(self) -> None:
+        """记录一次实际发送的请求（包括重试）"""
+        with self._lock:
+            self.requests += 1
+
+    def try_retry(self) -> bool:
+        """
+        申请一次重试
+        Returns:
+            bool: 预算内返回True并计入重试次数，预算用完返回False
+        """
+        with self._lock:
+            if self.retries < self.limit:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def record_row_timeout(self) -> None:
+        """记录一行因超过截止时间而被中止"""
+        with self._lock:
+            self.row_timeouts += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {'global': {
+                'requests': self.requests,
+                'retries': self.retries,
+                'limit': self.limit,
+                'denied': self.denied,
+                'row_timeouts': self.row_timeouts,
+            }}
+
+
+_budget: Optional[RetryBudget] = None
+_budget_lock = threading.Lock()
+
+
+def get_retry_budget() -> RetryBudget:
+    """获取全局重试预算（首次调用时读取 MZZB_RETRY_BUDGET）"""
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = RetryBudget(_read_float(RETRY_BUDGET_ENV, DEFAULT_RETRY_RATIO))
+                get_metrics().register_collector('retry_budget', _budget.snapshot)
+    return _budget
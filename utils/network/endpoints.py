@@ -0,0 +1,112 @@
+# utils/network/endpoints.py
+# 各平台接口的基础地址：默认指向线上服务，可通过环境变量改为本地模拟服务器（benchmarks/mock_server.py）
+#
+# 环境变量：
+#   MZZB_BANGUMI_API_BASE    Bangumi v0 API，默认 https://api.bgm.tv/v0
+#   MZZB_ANILIST_API_URL     AniList GraphQL，默认 https://graphql.anilist.co
+#   MZZB_MAL_API_BASE        MyAnimeList API v2，默认 https://api.myanimelist.net/v2
+#   MZZB_MAL_WEB_BASE        MyAnimeList 网页搜索，默认 https://myanimelist.net
+#   MZZB_FILMARKS_API_BASE   Filmarks API，默认 https://api.filmarks.com
+#   MZZB_FILMARKS_WEB_BASE   Filmarks 网页搜索，默认 https://filmarks.com
+#
+# 写入表格的条目链接（bgm.tv/subject/...、anilist.co/anime/... 等）始终使用线上地址，不受这里影响。
+
+import ipaddress
+import os
+import re
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+# 环境变量 -> 默认地址
+BASE_URL_DEFAULTS: Dict[str, str] = {
+    'MZZB_BANGUMI_API_BASE': 'https://api.bgm.tv/v0',
+    'MZZB_ANILIST_API_URL': 'https://graphql.anilist.co',
+    'MZZB_MAL_API_BASE': 'https://api.myanimelist.net/v2',
+    'MZZB_MAL_WEB_BASE': 'https://myanimelist.net',
+    'MZZB_FILMARKS_API_BASE': 'https://api.filmarks.com',
+    'MZZB_FILMARKS_WEB_BASE': 'https://filmarks.com',
+}
+
+# 基础地址环境变量 -> 平台（用于请求统计）
+BASE_URL_PLATFORMS: Dict[str, str] = {
+    'MZZB_BANGUMI_API_BASE': 'bangumi',
+    'MZZB_ANILIST_API_URL': 'anilist',
+    'MZZB_MAL_API_BASE': 'myanimelist',
+    'MZZB_MAL_WEB_BASE': 'myanimelist',
+    'MZZB_FILMARKS_API_BASE': 'filmarks',
+    'MZZB_FILMARKS_WEB_BASE': 'filmarks',
+}
+
+# 其他已知主机 -> 平台（条目页面、Twitter、更新检查等）
+KNOWN_HOSTS: Dict[str, str] = {
+    'bgm.tv': 'bangumi',
+    'bangumi.tv': 'bangumi',
+    'anilist.co': 'anilist',
+    'x.com': 'twitter',
+    'twitter.com': 'twitter',
+    'api.github.com': 'github',
+}
+
+# 路径中的数字ID段，统计时归并为 {id}
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def get_base_url(env_name: str) -> str:
+    """
+    获取接口基础地址（每次调用都会重新读取环境变量，基准测试可以在运行中切换）
+    Args:
+        env_name: BASE_URL_DEFAULTS 中的环境变量名
+    Returns:
+        str: 不带末尾斜杠的基础地址
+    """
+    value = os.environ.get(env_name, '').strip()
+    return (value or BASE_URL_DEFAULTS[env_name]).rstrip('/')
+
+
+def is_loopback_url(url: str) -> bool:
+    """
+    判断URL是否指向本机（本地模拟服务器不应经过代理）
+    Args:
+        url: 请求URL
+    Returns:
+        bool: 主机名为 localhost 或回环地址时返回True
+    """
+    host = urlparse(str(url)).hostname
+    if not host:
+        return False
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def describe_url(url: str) -> Tuple[str, str]:
+    """
+    把请求URL归类为（平台, 接口），用于按平台和接口统计请求
+    Args:
+        url: 请求URL（不含查询参数的部分参与归类）
+    Returns:
+        tuple: (平台, 接口路径)，路径中的数字ID替换为 {id}；无法识别的主机以主机名作为平台
+    """
+    parsed = urlparse(str(url))
+    path = parsed.path.rstrip('/') or '/'
+
+    # 先匹配当前配置的基础地址（可能指向本地模拟服务器），取最长前缀
+    best = None
+    for env_name, platform in BASE_URL_PLATFORMS.items():
+        base = urlparse(get_base_url(env_name))
+        base_path = base.path.rstrip('/')
+        if base.netloc == parsed.netloc and (path == base_path or path.startswith(base_path + '/')):
+            if best is None or len(base_path) > len(best[1]):
+                best = (platform, base_path)
+
+    if best is not None:
+        platform, base_path = best
+        endpoint = path[len(base_path):] or '/'
+    else:
+        host = parsed.hostname or ''
+        platform = KNOWN_HOSTS.get(host) or KNOWN_HOSTS.get(host.split('.', 1)[-1]) or host or 'unknown'
+        endpoint = path
+    return platform, _ID_SEGMENT.sub('/{id}', endpoint)
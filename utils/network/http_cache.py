@@ -0,0 +1,147 @@
+# utils/network/http_cache.py
+# 持久化HTTP缓存（条件请求）：保存详情接口响应的 ETag / Last-Modified 和响应体，
+# 下次运行请求同一地址时带上 If-None-Match / If-Modified-Since，服务器返回 304 时直接使用本地保存的响应体。
+# 每周刷新已完结季度的评分时，大部分详情请求只需要一次很小的 304 往返。
+#
+# 只有调用 fetch_data_with_retry(..., revalidate=True) 的 GET 请求使用（条目详情、MAL 网页搜索、Filmarks 页面），
+# 服务器没有返回验证字段的响应不会保存。条目按请求（方法、URL、查询参数）的哈希分文件保存在
+# mzzb_cache/http/<主机>/ 下，请求头不参与匹配也不会落盘。
+#
+# 环境变量：
+#   MZZB_HTTP_CACHE=0        关闭持久化HTTP缓存
+#   MZZB_HTTP_CACHE_DIR      缓存目录，默认 mzzb_cache/http
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+
+from utils.core.global_variables import CACHE_DIR
+from .replay import _deserialize_response, _request_key, _serialize_response
+
+HTTP_CACHE_ENV = 'MZZB_HTTP_CACHE'
+HTTP_CACHE_DIR_ENV = 'MZZB_HTTP_CACHE_DIR'
+
+HTTP_CACHE_FORMAT_VERSION = 1
+
+
+class CachedEntry:
+    """一条已保存的响应"""
+
+    __slots__ = ('path', 'etag', 'last_modified', 'payload')
+
+    def __init__(self, path: str, payload: dict):
+        self.path = path
+        self.payload = payload
+        headers = payload['response'].get('headers') or {}
+        lowered = {key.lower(): value for key, value in headers.items()}
+        self.etag = lowered.get('etag')
+        self.last_modified = lowered.get('last-modified')
+
+    def conditional_headers(self) -> dict:
+        """条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """把保存的响应还原为 requests.Response（状态码为原来的200）"""
+        return _deserialize_response(self.payload['response'])
+
+
+class HttpCache:
+    """持久化HTTP缓存"""
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 缓存目录
+        """
+        self.directory = directory
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return os.environ.get(HTTP_CACHE_ENV, '').strip() != '0'
+
+    def _path(self, url: str, params=None) -> str:
+        host = urlparse(str(url)).netloc
+        safe_host = ''.join(c if c.isalnum() or c in '.-_' else '_' for c in host) or 'default'
+        return os.path.join(self.directory, safe_host, f"get-{_request_key('GET', url, params)}.json")
+
+    def lookup(self, url: str, params=None) -> Optional[CachedEntry]:
+        """
+        查找已保存的响应
+        Args:
+            url: 请求URL
+            params: 查询参数
+        Returns:
+            CachedEntry or None: 带有验证字段的缓存条目
+        """
+        path = self._path(url, params)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if payload.get('version') != HTTP_CACHE_FORMAT_VERSION:
+            return None
+        entry = CachedEntry(path, payload)
+        return entry if entry.etag or entry.last_modified else None
+
+    def store(self, url: str, params, response: requests.Response, elapsed: float) -> bool:
+        """
+        保存带有 ETag / Last-Modified 的200响应
+        Args:
+            url: 请求URL
+            params: 查询参数
+            response: 响应对象
+            elapsed: 请求耗时（秒）
+        Returns:
+            bool: 是否已保存
+        """
+        if response.status_code != 200:
+            return False
+        if not (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            return False
+        path = self._path(url, params)
+        payload = {
+            'version': HTTP_CACHE_FORMAT_VERSION,
+            'url': url,
+            'params': params,
+            'stored_at': time.time(),
+            'response': _serialize_response(response, elapsed * 1000),
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+            return True
+        except (OSError, TypeError) as e:
+            logging.warning(f"写入HTTP缓存失败: {e}")
+            return False
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """获取持久化HTTP缓存，已关闭时返回None"""
+    global _cache
+    if not HttpCache.is_enabled():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache(os.environ.get(HTTP_CACHE_DIR_ENV) or os.path.join(CACHE_DIR, 'http'))
+    return _cache
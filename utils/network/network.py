@@ -11,12 +11,19 @@ REQUEST_TIMEOUT = 10  # 设置请求超时时间，单位为秒
 DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/106.0.0.0 Safari/537.36'
 
 # 导入代理配置函数
-from .proxy_config import get_global_proxy
+from .proxy_config import get_global_proxy, report_route_failure
+from .replay import send_request, get_http_mode, ReplayMissError, MODE_OFF
+from .endpoints import is_loopback_url, describe_url
+from .rate_control import get_rate_controller, classify_status, SlotTimeoutError
+from .budget import get_retry_budget, time_remaining
+from .http_cache import get_http_cache
+from utils.core.metrics import get_metrics
 
 # 简单的内存缓存，用于存储请求结果
 _request_cache = {}
 
-def fetch_data_with_retry(url, params=None, data=None, method='GET', headers=None, use_cache=True, cache_ttl=300):
+def fetch_data_with_retry(url, params=None, data=None, method='GET', headers=None, use_cache=True, cache_ttl=300,
+                          revalidate=False):
     """
     带有重试机制的请求函数。
 
@@ -28,9 +35,11 @@ def fetch_data_with_retry(url, params=None, data=None, method='GET', headers=Non
         headers (dict, optional): 请求头。默认为 None。
         use_cache (bool, optional): 是否使用缓存。默认为True。
         cache_ttl (int, optional): 缓存有效期，单位为秒。默认为300秒(5分钟)。
+        revalidate (bool, optional): 是否使用持久化HTTP缓存发送条件请求（仅GET，适用于条目详情等内容很少变化的地址）。
+            服务器返回304时使用本地保存的响应体。录制/回放模式下不使用（磁带中只保存完整响应）。默认为False。
 
     Returns:
-        requests.Response: 请求成功时的响应对象，如果所有重试都失败则返回None。
+        requests.Response: 请求成功时的响应对象，如果所有重试都失败（或全局重试预算用完、超过单行截止时间）则返回None。
     """
     # 设置默认请求头
     if headers is None:
@@ -40,31 +49,82 @@ def fetch_data_with_retry(url, params=None, data=None, method='GET', headers=Non
     
     # 生成缓存键
     cache_key = f"{method}:{url}:{str(params)}:{str(data)}"
-    
+
+    # 按平台和接口统计请求
+    metrics = get_metrics()
+    platform, endpoint = describe_url(url)
+
     # 检查缓存
-    if method == 'GET' and use_cache and cache_key in _request_cache:
-        cache_entry = _request_cache[cache_key]
-        cache_time, cached_response = cache_entry
+    if method == 'GET' and use_cache:
+        cache_entry = _request_cache.get(cache_key)
         # 检查缓存是否过期
-        if time.time() - cache_time < cache_ttl:
-            logging.debug(f"Using cached response for {url}")
-            return cached_response
-    
-    # 获取全局代理配置
-    proxies = get_global_proxy()
+        if cache_entry is not None and time.time() - cache_entry[0] < cache_ttl:
+            metrics.record_cache(platform, endpoint, hit=True)
+            logging.debug("Using cached response for %s", url)
+            return cache_entry[1]
+        metrics.record_cache(platform, endpoint, hit=False)
+
+    # 持久化HTTP缓存：带上次响应的 ETag / Last-Modified 发送条件请求
+    # （录制模式下不发条件请求，否则磁带中会录下没有响应体的304，回放时无法还原）
+    http_cache = get_http_cache() if revalidate and method == 'GET' and get_http_mode() == MODE_OFF else None
+    cached_entry = http_cache.lookup(url, params) if http_cache is not None else None
+    if cached_entry is not None:
+        headers = {**headers, **cached_entry.conditional_headers()}
+
+    # 获取全局代理配置（本地模拟服务器直连）
+    proxies = None if is_loopback_url(url) else get_global_proxy()
     if proxies:
-        logging.debug(f"Using proxy for {url}: {proxies.get('http', 'N/A')}")
-    
-    logging.info(f"Fetching data from {url} with method {method}")
+        logging.debug("Using proxy for %s: %s", url, proxies.get('http', 'N/A'))
     
+    logging.info("Fetching data from %s with method %s", url, method)
+
+    # 按站点自适应并发：名额只在请求期间占用，退避等待前已归还
+    rate_controller = get_rate_controller()
+    retry_budget = get_retry_budget()
+
     for attempt in range(MAX_RETRIES):
+        # 单行截止时间：剩余时间不足时放弃，否则请求超时不超过剩余时间
+        timeout = _request_timeout()
+        if timeout is None:
+            logging.warning("已超过单行截止时间，放弃请求 %s", url)
+            return None
+        if attempt > 0:
+            metrics.record_retry(platform, endpoint)
+        started = time.perf_counter()
         try:
-            if method == 'GET':
-                response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT, headers=headers, proxies=proxies)
-            elif method == 'POST':
-                response = requests.post(url, json=data, timeout=REQUEST_TIMEOUT, headers=headers, proxies=proxies)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
+            with rate_controller.slot(url, platform) as slot:
+                started = time.perf_counter()  # 不计入等待并发名额的时间
+                # 等待名额期间可能已接近截止时间，重新计算超时
+                timeout = _request_timeout()
+                if timeout is None:
+                    logging.warning("已超过单行截止时间，放弃请求 %s", url)
+                    return None
+                retry_budget.record_request()
+                if method == 'GET':
+                    response = send_request('GET', url, params=params, timeout=timeout, headers=headers, proxies=proxies)
+                elif method == 'POST':
+                    response = send_request('POST', url, json=data, timeout=timeout, headers=headers, proxies=proxies)
+                else:
+                    raise ValueError(f"Unsupported method: {method}")
+                slot.outcome = classify_status(response.status_code)
+            metrics.record_request(platform, endpoint, response.status_code,
+                                   time.perf_counter() - started, len(response.content or b''))
+
+            # 内容未变化：使用本地保存的响应体
+            if response.status_code == 304 and cached_entry is not None:
+                logging.debug("Not modified, using stored response for %s", url)
+                response = cached_entry.to_response()
+                if use_cache:
+                    _request_cache[cache_key] = (time.time(), response)
+                return response
+            if response.status_code == 304:
+                # 没有可用的本地响应体（如调用方自带条件请求头）：去掉条件请求头重新请求
+                logging.warning("Received 304 without a stored response for %s, retrying without conditional headers", url)
+                headers = {key: value for key, value in headers.items()
+                           if key.lower() not in ('if-none-match', 'if-modified-since')}
+                if attempt < MAX_RETRIES - 1 and not _wait_before_retry(url, 0):
+                    return None
+                continue
 
             # 处理不同的HTTP状态码
             if response.status_code == 429:  # 请求过多
@@ -74,13 +134,15 @@ def fetch_data_with_retry(url, params=None, data=None, method='GET', headers=Non
                 else:
                     # 如果没有 Retry-After 字段，则采用指数退避
                     wait_time = 2 ** attempt * 5
-                logging.warning(f"Received 429 Too Many Requests. Waiting for {wait_time} seconds before retrying...")
-                time.sleep(wait_time)
+                logging.warning("Received 429 Too Many Requests. Waiting for %s seconds before retrying...", wait_time)
+                if attempt < MAX_RETRIES - 1 and not _wait_before_retry(url, wait_time):
+                    return None
                 continue
             elif response.status_code >= 500:  # 服务器错误
                 wait_time = 2 ** attempt * 5
-                logging.warning(f"Received server error {response.status_code}. Waiting for {wait_time} seconds before retrying...")
-                time.sleep(wait_time)
+                logging.warning("Received server error %s. Waiting for %s seconds before retrying...", response.status_code, wait_time)
+                if attempt < MAX_RETRIES - 1 and not _wait_before_retry(url, wait_time):
+                    return None
                 continue
 
             response.raise_for_status()
@@ -88,41 +150,100 @@ def fetch_data_with_retry(url, params=None, data=None, method='GET', headers=Non
             # 缓存成功的GET请求结果
             if method == 'GET' and use_cache:
                 _request_cache[cache_key] = (time.time(), response)
+            if http_cache is not None:
+                http_cache.store(url, params, response, time.perf_counter() - started)
                 
             return response
 
+        except SlotTimeoutError as e:
+            # 等待并发名额时到达单行截止时间
+            logging.warning("已超过单行截止时间，放弃请求 %s: %s", url, e)
+            return None
+        except ReplayMissError as e:
+            # 回放模式下没有录制结果，重试也不会有结果
+            logging.warning("%s", e)
+            return None
         except requests.exceptions.ProxyError as e:
-            # 代理错误，尝试直连
+            metrics.record_request(platform, endpoint, type(e).__name__, time.perf_counter() - started)
+            # 代理错误：代理检测结果可能已经过时，后台重新检测
+            report_route_failure(f"代理错误: {url}")
+            # 尝试直连
             if proxies and attempt == 0:
-                logging.warning(f"Proxy error for {url}, trying direct connection: {e}")
+                logging.warning("Proxy error for %s, trying direct connection: %s", url, e)
                 proxies = None  # 清除代理，下次重试时使用直连
+                if not _wait_before_retry(url, 0):
+                    return None
                 continue
             else:
                 wait_time = 2 ** attempt * 5
-                logging.warning(f"Proxy error for {url} (Attempt {attempt + 1}/{MAX_RETRIES}): {e}. Waiting for {wait_time} seconds.")
-                if attempt < MAX_RETRIES - 1:
-                    time.sleep(wait_time)
+                logging.warning("Proxy error for %s (Attempt %s/%s): %s. Waiting for %s seconds.", url, attempt + 1, MAX_RETRIES, e, wait_time)
+                if attempt < MAX_RETRIES - 1 and not _wait_before_retry(url, wait_time):
+                    return None
         except requests.exceptions.Timeout as e:
+            metrics.record_request(platform, endpoint, type(e).__name__, time.perf_counter() - started)
             # 超时错误，可能需要更长的等待时间
             wait_time = 2 ** attempt * 10
-            logging.warning(f"Request timed out for {url} (Attempt {attempt + 1}/{MAX_RETRIES}): {e}. Waiting for {wait_time} seconds.")
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(wait_time)
+            logging.warning("Request timed out for %s (Attempt %s/%s): %s. Waiting for %s seconds.", url, attempt + 1, MAX_RETRIES, e, wait_time)
+            if attempt < MAX_RETRIES - 1 and not _wait_before_retry(url, wait_time):
+                return None
         except requests.exceptions.ConnectionError as e:
+            metrics.record_request(platform, endpoint, type(e).__name__, time.perf_counter() - started)
             # 连接错误，可能是网络问题
             wait_time = 2 ** attempt * 5
-            logging.warning(f"Connection error for {url} (Attempt {attempt + 1}/{MAX_RETRIES}): {e}. Waiting for {wait_time} seconds.")
+            logging.warning("Connection error for %s (Attempt %s/%s): %s. Waiting for %s seconds.", url, attempt + 1, MAX_RETRIES, e, wait_time)
             if attempt < MAX_RETRIES - 1:
-                time.sleep(wait_time)
+                if not _wait_before_retry(url, wait_time):
+                    return None
+            elif proxies:
+                # 经过代理多次连接失败：代理路由可能已经不可用（直连时只是该站点连不上，与路由无关）
+                report_route_failure(f"连接错误: {url}")
         except requests.exceptions.RequestException as e:
-            # 其他请求错误
+            # 其他请求错误（raise_for_status 抛出的4xx已带响应，上面已经统计过）
+            if e.response is None:
+                metrics.record_request(platform, endpoint, type(e).__name__, time.perf_counter() - started)
             wait_time = 2 ** attempt * 5
-            logging.warning(f"Request failed for {url} (Attempt {attempt + 1}/{MAX_RETRIES}): {e}. Waiting for {wait_time} seconds.")
+            logging.warning("Request failed for %s (Attempt %s/%s): %s. Waiting for %s seconds.", url, attempt + 1, MAX_RETRIES, e, wait_time)
             if attempt < MAX_RETRIES - 1:
-                time.sleep(wait_time)
+                if not _wait_before_retry(url, wait_time):
+                    return None
             else:
-                logging.error(f"Max retries reached for {url}. Giving up.")
+                logging.error("Max retries reached for %s. Giving up.", url)
                 return None
     
-    logging.error(f"All attempts failed for {url}.")
-    return None
\ No newline at end of file
+    logging.error("All attempts failed for %s.", url)
+    return None
+
+
+def _request_timeout():
+    """
+    本次请求的超时时间：不超过 REQUEST_TIMEOUT，也不超过当前行剩余时间
+    Returns:
+        float: 超时秒数；已过截止时间时返回None
+    """
+    remaining = time_remaining()
+    if remaining is None:
+        return REQUEST_TIMEOUT
+    if remaining <= 0:
+        return None
+    return min(REQUEST_TIMEOUT, remaining)
+
+
+def _wait_before_retry(url, wait_time):
+    """
+    重试前检查全局重试预算和单行截止时间，然后退避等待
+    Args:
+        url: 请求URL（用于日志）
+        wait_time: 退避秒数
+    Returns:
+        bool: 可以重试时返回True；预算用完或等待后会超过截止时间时返回False（调用方放弃请求）
+    """
+    remaining = time_remaining()
+    if remaining is not None and wait_time >= remaining:
+        logging.warning("等待 %s 秒后将超过单行截止时间，放弃重试 %s", wait_time, url)
+        return False
+    if not get_retry_budget().try_retry():
+        logging.warning("全局重试预算已用完，放弃重试 %s", url)
+        return False
+    if wait_time:
+        time.sleep(wait_time)
+    return True
\ No newline at end of file
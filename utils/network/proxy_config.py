@@ -6,14 +6,21 @@ try:
 except ImportError:
     winreg = None
 
+import hashlib
+import json
 import logging
 import os
 import subprocess
 import sys
+import threading
+import time
 from typing import Optional, Dict
 
 import requests
 
+from utils.core.global_variables import get_cache_path
+from .replay import send_request
+
 
 # 全局代理配置
 _global_proxy = None
@@ -21,6 +28,21 @@ _global_proxy = None
 # Twitter可用性状态
 _twitter_accessible = True
 
+# 代理检测结果缓存：代理设置指纹不变且未过期时，跳过联网验证
+PROXY_CACHE_FILE = 'proxy_state.json'
+PROXY_CACHE_TTL = 6 * 3600  # 默认6小时，可通过环境变量 MZZB_PROXY_CACHE_TTL 覆盖
+PROXY_CACHE_NEGATIVE_TTL = 10 * 60  # Twitter不可用的检测结果只缓存10分钟，网络恢复后能尽快重新检测
+_proxy_from_cache = False
+
+# 后台代理检测：检测完成前读取代理配置的调用会在这里等待
+_proxy_ready = threading.Event()
+_proxy_ready.set()
+_proxy_setup_thread: Optional[threading.Thread] = None
+
+# 运行中代理失效时的重新检测：每次运行最多一次，在后台进行，检测完成前请求沿用当前路由（失败时由调用方改为直连重试）
+_reprobe_lock = threading.Lock()
+_reprobe_thread: Optional[threading.Thread] = None
+
 
 def _get_env_value(*names: str) -> Optional[str]:
     """按顺序读取环境变量，返回第一个非空值。"""
@@ -86,12 +108,14 @@ def _request_get(url: str, *, proxies=None, timeout=5, headers=None, allow_redir
     """
     with requests.Session() as session:
         session.trust_env = False
-        return session.get(
+        return send_request(
+            'GET',
             url,
             proxies=proxies,
             timeout=timeout,
             headers=headers,
             allow_redirects=allow_redirects,
+            session=session,
         )
 
 
@@ -479,74 +503,267 @@ def verify_direct_twitter_connection() -> bool:
     return False
 
 
-def setup_proxy() -> Optional[Dict[str, str]]:
+def _proxy_fingerprint(system_proxy: Optional[Dict[str, str]]) -> str:
+    """
+    计算代理设置指纹（平台 + 检测到的代理配置），设置变化时缓存自动失效
+    Args:
+        system_proxy: 检测到的系统代理配置
+    Returns:
+        str: 指纹字符串
+    """
+    payload = json.dumps({"platform": sys.platform, "proxy": system_proxy}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_proxy_cache_ttl() -> int:
+    """读取代理检测缓存有效期（秒），MZZB_PROXY_CACHE_TTL=0 表示禁用缓存"""
+    value = _get_env_value("MZZB_PROXY_CACHE_TTL")
+    if value is None:
+        return PROXY_CACHE_TTL
+    try:
+        return max(0, int(value))
+    except ValueError:
+        logging.warning(f"MZZB_PROXY_CACHE_TTL 不是有效整数: {value}，使用默认值 {PROXY_CACHE_TTL}")
+        return PROXY_CACHE_TTL
+
+
+def load_proxy_cache(fingerprint: str) -> Optional[Dict]:
+    """
+    读取代理检测缓存
+    Args:
+        fingerprint: 当前代理设置指纹
+    Returns:
+        dict or None: 指纹一致且未过期的缓存内容，否则返回None
+    """
+    ttl = _get_proxy_cache_ttl()
+    if ttl <= 0:
+        return None
+
+    try:
+        with open(get_cache_path(PROXY_CACHE_FILE), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get("fingerprint") != fingerprint:
+        logging.info("代理设置已变化，重新检测代理")
+        return None
+
+    if not cached.get("twitter_accessible"):
+        ttl = min(ttl, PROXY_CACHE_NEGATIVE_TTL)
+
+    age = time.time() - cached.get("checked_at", 0)
+    if age < 0 or age >= ttl:
+        logging.info("代理检测缓存已过期，重新检测代理")
+        return None
+
+    return cached
+
+
+def save_proxy_cache(fingerprint: str, proxy: Optional[Dict[str, str]], proxy_ok: Optional[bool],
+                     direct_ok: Optional[bool], twitter_accessible: bool) -> None:
+    """
+    保存代理检测结果
+    Args:
+        fingerprint: 代理设置指纹
+        proxy: 最终使用的代理配置
+        proxy_ok: 代理验证结果（未检测到代理时为None）
+        direct_ok: 直连验证结果（未测试直连时为None）
+        twitter_accessible: Twitter是否可用
+    """
+    if _get_proxy_cache_ttl() <= 0:
+        return
+
+    cached = {
+        "fingerprint": fingerprint,
+        "checked_at": time.time(),
+        "proxy": proxy,
+        "proxy_ok": proxy_ok,
+        "direct_ok": direct_ok,
+        "twitter_accessible": twitter_accessible,
+    }
+    try:
+        with open(get_cache_path(PROXY_CACHE_FILE), "w", encoding="utf-8") as f:
+            json.dump(cached, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logging.debug(f"保存代理检测缓存失败: {e}")
+
+
+def invalidate_proxy_cache() -> None:
+    """删除代理检测缓存，下次启动时重新检测"""
+    try:
+        os.remove(get_cache_path(PROXY_CACHE_FILE))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.debug(f"删除代理检测缓存失败: {e}")
+
+
+def report_route_failure(reason: str) -> None:
     """
-    设置代理配置，使用推特验证，包含降级处理
+    报告通过代理的请求失败（ProxyError，或经过代理的连接失败；直连时某个站点连不上与代理路由无关，不要报告）。
+    当前路由来自缓存时先清除缓存，然后在后台重新检测代理（每次运行最多一次），检测结果在本次运行中立即生效。
+    Args:
+        reason: 失败原因（用于日志）
+    """
+    global _proxy_from_cache, _reprobe_thread
+
+    with _reprobe_lock:
+        if _proxy_from_cache:
+            _proxy_from_cache = False
+            invalidate_proxy_cache()
+            logging.warning(f"缓存的代理路由请求失败（{reason}），已清除代理检测缓存")
+        if _reprobe_thread is not None:
+            return
+        logging.warning(f"代理请求失败（{reason}），在后台重新检测代理")
+        _reprobe_thread = threading.Thread(target=_run_proxy_setup, kwargs={'reprobe': True},
+                                           name="proxy-reprobe", daemon=True)
+        _reprobe_thread.start()
+
+
+def setup_proxy(use_cache: bool = True) -> Optional[Dict[str, str]]:
+    """
+    设置代理配置，使用推特验证，包含降级处理。
+    代理设置未变化且缓存未过期时，直接使用上次的检测结果，跳过联网验证。
+    Args:
+        use_cache: 是否使用代理检测缓存（运行中重新检测时为False）
     Returns:
         Dict[str, str] or None: 代理配置字典，失败时返回None
     """
-    global _global_proxy, _twitter_accessible
+    global _global_proxy, _twitter_accessible, _proxy_from_cache
 
     logging.info("🔍 开始检测系统代理...")
 
     system_proxy = get_system_proxy()
+    fingerprint = _proxy_fingerprint(system_proxy)
+
+    cached = load_proxy_cache(fingerprint) if use_cache else None
+    if cached is not None:
+        _global_proxy = cached.get("proxy")
+        _twitter_accessible = bool(cached.get("twitter_accessible"))
+        _proxy_from_cache = True
+        logging.info(
+            f"⚡ 使用缓存的代理检测结果（代理可用: {cached.get('proxy_ok')}，"
+            f"直连可用: {cached.get('direct_ok')}，Twitter可用: {_twitter_accessible}）"
+        )
+        return _global_proxy
+
+    _proxy_from_cache = False
+    proxy_ok = None
+    direct_ok = None
 
     if system_proxy:
         logging.info(f"检测到系统代理: {system_proxy.get('http', 'N/A')}")
 
-        if verify_proxy_twitter(system_proxy):
+        proxy_ok = verify_proxy_twitter(system_proxy)
+        if proxy_ok:
             logging.info("✅ 代理验证成功，可以正常访问推特，所有网络请求将使用代理")
             _global_proxy = system_proxy
             _twitter_accessible = True
-            return system_proxy
         else:
             logging.warning("❌ 代理无法访问推特，降级为直连模式")
             logging.info("🔍 尝试直连模式访问推特...")
 
-            if verify_direct_twitter_connection():
+            direct_ok = verify_direct_twitter_connection()
+            if direct_ok:
                 logging.info("✅ 直连验证成功，可以正常访问推特，使用直连模式")
                 _global_proxy = None
                 _twitter_accessible = True
-                return None
             else:
                 logging.warning("❌ 直连也无法访问推特，网络连接可能存在问题")
                 logging.info("⚠️ Twitter粉丝数获取功能将被禁用，程序将继续运行其他功能")
                 _global_proxy = None
                 _twitter_accessible = False
-                return None
     else:
         logging.info("未检测到系统代理，测试直连模式访问推特...")
 
-        if verify_direct_twitter_connection():
+        direct_ok = verify_direct_twitter_connection()
+        if direct_ok:
             logging.info("✅ 直连验证成功，可以正常访问推特，使用直连模式")
             _global_proxy = None
             _twitter_accessible = True
-            return None
         else:
             logging.warning("❌ 直连无法访问推特，建议检查网络连接或配置代理")
             logging.info("⚠️ Twitter粉丝数获取功能将被禁用，程序将继续运行其他功能")
             _global_proxy = None
             _twitter_accessible = False
-            return None
+
+    save_proxy_cache(fingerprint, _global_proxy, proxy_ok, direct_ok, _twitter_accessible)
+    return _global_proxy
+
+
+def _run_proxy_setup(reprobe: bool = False):
+    """
+    后台线程中执行代理检测，并输出最终网络配置
+    Args:
+        reprobe: 是否为运行中的重新检测（跳过缓存）
+    """
+    try:
+        proxy_config = setup_proxy(use_cache=not reprobe)
+        if proxy_config:
+            logging.info(f"✅ 代理配置完成 - {get_proxy_status()}")
+        else:
+            logging.info(f"📡 网络配置完成 - {get_proxy_status()}")
+    except Exception as e:
+        logging.error(f"代理配置过程中出现错误: {e}")
+        logging.info("程序将使用直连模式继续运行")
+    finally:
+        _proxy_ready.set()
+
+
+def start_proxy_setup_in_background() -> threading.Thread:
+    """
+    在后台线程中启动代理检测（setup_proxy），不阻塞程序启动。
+    检测完成前，读取代理配置或Twitter可用性的调用会自动等待检测结果。
+    Returns:
+        threading.Thread: 执行代理检测的线程
+    """
+    global _proxy_setup_thread
+
+    if _proxy_setup_thread is not None:
+        return _proxy_setup_thread
+
+    _proxy_ready.clear()
+    _proxy_setup_thread = threading.Thread(target=_run_proxy_setup, name="proxy-setup", daemon=True)
+    _proxy_setup_thread.start()
+    return _proxy_setup_thread
+
+
+def wait_for_proxy_setup(timeout: Optional[float] = None) -> bool:
+    """
+    等待后台代理检测完成（未启动后台检测时立即返回）
+    Args:
+        timeout: 最长等待秒数，None表示一直等待
+    Returns:
+        bool: 代理检测是否已完成
+    """
+    # 代理检测线程自身读取状态时不能等待自己
+    if threading.current_thread() is _proxy_setup_thread:
+        return True
+    return _proxy_ready.wait(timeout)
 
 
 def get_global_proxy() -> Optional[Dict[str, str]]:
     """
-    获取全局代理配置
+    获取全局代理配置（后台代理检测未完成时会等待其完成）
     Returns:
         Dict[str, str] or None: 全局代理配置
     """
+    wait_for_proxy_setup()
     return _global_proxy
 
 
 def reset_proxy():
     """重置代理配置"""
-    global _global_proxy
+    global _global_proxy, _proxy_from_cache, _reprobe_thread
     _global_proxy = None
+    _proxy_from_cache = False
+    _reprobe_thread = None
 
 
 def has_proxy() -> bool:
     """检查是否有可用的代理"""
+    wait_for_proxy_setup()
     return _global_proxy is not None
 
 
@@ -562,7 +779,8 @@ def get_proxy_status() -> str:
 
 
 def is_twitter_accessible() -> bool:
-    """检查Twitter是否可用"""
+    """检查Twitter是否可用（后台代理检测未完成时会等待其完成）"""
+    wait_for_proxy_setup()
     return _twitter_accessible
 
 
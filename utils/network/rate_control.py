@@ -0,0 +1,271 @@
+# utils/network/rate_control.py
+# 按站点自适应并发（AIMD）：每个站点维护一个并发窗口，
+# 请求成功时加性增长（每个窗口的成功请求约 +1），遇到 429、5xx 或超时时乘性减半，
+# 延迟明显高于该站点观测到的最低延迟时暂停增长。这样不需要手动调参，并发会收敛到各站点实际能承受的水平。
+#
+# 站点按 平台@主机 区分（例如 anilist@graphql.anilist.co、myanimelist@myanimelist.net），
+# MAL 的 API 和网页搜索各自独立限流。当前窗口、在途请求数、等待次数等会出现在运行指标的 concurrency 表中。
+# 等待名额的时间不超过当前行的剩余时间（见 budget.py），到达截止时间仍未等到名额时抛出 SlotTimeoutError。
+#
+# 环境变量：
+#   MZZB_ADAPTIVE_CONCURRENCY=0     关闭自适应并发（不限制）
+#   MZZB_HOST_CONCURRENCY           按平台覆盖 初始值:上限，例如 anilist=1:3,bangumi=4:24
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from utils.core.metrics import get_metrics
+from .budget import time_remaining
+from .endpoints import describe_url
+
+ADAPTIVE_CONCURRENCY_ENV = 'MZZB_ADAPTIVE_CONCURRENCY'
+HOST_CONCURRENCY_ENV = 'MZZB_HOST_CONCURRENCY'
+
+# 平台 -> (初始窗口, 窗口上限)；AniList 限流严格，MAL 网页搜索容易触发拦截，Bangumi API 较宽松
+PLATFORM_LIMITS: Dict[str, Tuple[int, int]] = {
+    'anilist': (2, 4),
+    'myanimelist': (2, 6),
+    'bangumi': (4, 16),
+    'filmarks': (2, 8),
+}
+DEFAULT_LIMITS: Tuple[int, int] = (2, 8)
+
+MIN_WINDOW = 1.0
+DECREASE_FACTOR = 0.5
+# 平滑延迟超过最低延迟的倍数时暂停增长
+LATENCY_HOLD_FACTOR = 3.0
+# 两次减窗之间至少间隔（秒）：同一批并发请求同时失败只算一次拥塞
+MIN_DECREASE_INTERVAL = 1.0
+
+# 请求结果
+OUTCOME_OK = 'ok'                # 成功（包括4xx等与容量无关的响应）
+OUTCOME_CONGESTED = 'congested'  # 429、5xx、超时
+OUTCOME_NEUTRAL = 'neutral'      # 连接错误等，不调整窗口
+
+
+class SlotTimeoutError(Exception):
+    """到达单行截止时间仍未等到并发名额"""
+
+
+class AimdLimiter:
+    """单个站点的AIMD并发窗口"""
+
+    def __init__(self, key: str, initial: float, maximum: float, minimum: float = MIN_WINDOW):
+        """
+        Args:
+            key: 站点标识（平台@主机）
+            initial: 初始窗口
+            maximum: 窗口上限
+            minimum: 窗口下限
+        """
+        self.key = key
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.window = min(max(initial, minimum), self.maximum)
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self.waits = 0
+        self.wait_timeouts = 0
+        self.wait_seconds = 0.0
+        self.min_latency: Optional[float] = None
+        self.smoothed_latency: Optional[float] = None
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        """当前允许的在途请求数"""
+        return max(int(self.window), 1)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        占用一个并发名额，窗口已满时等待
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+        Returns:
+            bool: 是否占到名额（等待超时时返回False）
+        """
+        with self._cond:
+            if self.in_flight >= self.limit:
+                self.waits += 1
+                start = time.perf_counter()
+                acquired = self._cond.wait_for(lambda: self.in_flight < self.limit, timeout)
+                self.wait_seconds += time.perf_counter() - start
+                if not acquired:
+                    self.wait_timeouts += 1
+                    return False
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def release(self, outcome: str, latency: float) -> None:
+        """
+        归还名额并按结果调整窗口
+        Args:
+            outcome: OUTCOME_OK / OUTCOME_CONGESTED / OUTCOME_NEUTRAL
+            latency: 本次请求耗时（秒）
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == OUTCOME_OK:
+                self._observe_latency(latency)
+                if self.window < self.maximum and not self._latency_inflated():
+                    previous = self.limit
+                    self.window = min(self.maximum, self.window + 1.0 / self.window)
+                    if self.limit > previous:
+                        self.increases += 1
+            elif outcome == OUTCOME_CONGESTED:
+                now = time.monotonic()
+                if now - self._last_decrease >= max(MIN_DECREASE_INTERVAL, self.smoothed_latency or 0.0):
+                    self._last_decrease = now
+                    self.window = max(self.minimum, self.window * DECREASE_FACTOR)
+                    self.decreases += 1
+                    logging.info("%s 出现拥塞，并发窗口降为 %.1f", self.key, self.window)
+            self._cond.notify_all()
+
+    def _observe_latency(self, latency: float) -> None:
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        if self.smoothed_latency is None:
+            self.smoothed_latency = latency
+        else:
+            self.smoothed_latency = 0.8 * self.smoothed_latency + 0.2 * latency
+
+    def _latency_inflated(self) -> bool:
+        if not self.min_latency or self.smoothed_latency is None:
+            return False
+        # 最低延迟极小（如本机缓存）时不据此判断
+        return self.smoothed_latency > max(self.min_latency * LATENCY_HOLD_FACTOR, 0.05)
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {
+                'window': round(self.window, 2),
+                'limit': self.limit,
+                'max_limit': int(self.maximum),
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'waits': self.waits,
+                'wait_timeouts': self.wait_timeouts,
+                'wait_s': round(self.wait_seconds, 3),
+                'latency_ms': round(self.smoothed_latency * 1000, 1) if self.smoothed_latency is not None else None,
+            }
+
+
+class _Slot:
+    """一次请求占用的并发名额（上下文管理器），请求结束时由调用方设置 outcome"""
+
+    __slots__ = ('limiter', 'outcome', '_start')
+
+    def __init__(self, limiter: Optional[AimdLimiter]):
+        self.limiter = limiter
+        self.outcome = OUTCOME_NEUTRAL
+        self._start = 0.0
+
+    def __enter__(self):
+        # 等待名额不超过当前行的剩余时间
+        if self.limiter is not None and not self.limiter.acquire(time_remaining()):
+            raise SlotTimeoutError(f"{self.limiter.key} 的并发名额在截止时间前未释放")
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, requests.exceptions.Timeout):
+            self.outcome = OUTCOME_CONGESTED
+        if self.limiter is not None:
+            self.limiter.release(self.outcome, time.perf_counter() - self._start)
+        return False
+
+
+def _parse_overrides(value: str) -> Dict[str, Tuple[int, int]]:
+    """解析 MZZB_HOST_CONCURRENCY（平台=初始值:上限，逗号分隔）"""
+    overrides = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        platform, limits = item.split('=', 1)
+        try:
+            initial, _, maximum = limits.partition(':')
+            initial = int(initial)
+            overrides[platform.strip().lower()] = (initial, int(maximum) if maximum else initial)
+        except ValueError:
+            logging.warning(f"忽略无效的并发配置: {item}")
+    return overrides
+
+
+class RateController:
+    """所有站点的并发窗口"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, AimdLimiter] = {}
+        self._overrides = _parse_overrides(os.environ.get(HOST_CONCURRENCY_ENV, ''))
+        get_metrics().register_collector('concurrency', self.snapshot)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return os.environ.get(ADAPTIVE_CONCURRENCY_ENV, '').strip() != '0'
+
+    def limiter_for(self, url: str, platform: Optional[str] = None) -> AimdLimiter:
+        """
+        获取URL所属站点的并发窗口
+        Args:
+            url: 请求URL
+            platform: 已知的平台名（省略时按URL识别）
+        """
+        if platform is None:
+            platform, _ = describe_url(url)
+        parsed = urlparse(str(url))
+        # 未识别平台的主机直接以主机名区分
+        key = parsed.netloc if platform == parsed.hostname else f"{platform}@{parsed.netloc}"
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(key)
+                if limiter is None:
+                    initial, maximum = self._overrides.get(platform) or PLATFORM_LIMITS.get(platform, DEFAULT_LIMITS)
+                    limiter = self._limiters[key] = AimdLimiter(key, initial, maximum)
+        return limiter
+
+    def slot(self, url: str, platform: Optional[str] = None) -> _Slot:
+        """
+        为一次请求占用并发名额：with controller.slot(url) as slot: ...; slot.outcome = ...
+        到达单行截止时间仍未等到名额时，进入 with 块时抛出 SlotTimeoutError
+        """
+        return _Slot(self.limiter_for(url, platform) if self.is_enabled() else None)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.snapshot() for key, limiter in sorted(limiters.items())}
+
+
+_controller: Optional[RateController] = None
+_controller_lock = threading.Lock()
+
+
+def get_rate_controller() -> RateController:
+    """获取全局并发控制器"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = RateController()
+    return _controller
+
+
+def classify_status(status_code: int) -> str:
+    """按HTTP状态码判断请求结果对窗口的影响"""
+    if status_code == 429 or status_code >= 500:
+        return OUTCOME_CONGESTED
+    return OUTCOME_OK
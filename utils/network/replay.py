@@ -0,0 +1,329 @@
+# utils/network/replay.py
+# HTTP录制/回放：把真实会话录制到磁带目录，之后在无网络环境下按请求回放，可注入延迟和错误
+#
+# 环境变量：
+#   MZZB_HTTP_MODE            off（默认，直接联网） / record（联网并录制） / replay（只回放，不联网）
+#   MZZB_CASSETTE_DIR         磁带目录，默认 mzzb_cache/cassettes
+#   MZZB_REPLAY_LATENCY_MS    回放延迟：固定值 "120"、均匀分布 "50-300"，或 "recorded"（使用录制时的耗时）
+#   MZZB_REPLAY_ERROR_RATE    回放时以该概率（0~1）返回 503，用于测试重试逻辑
+#   MZZB_REPLAY_SEED          延迟和错误注入的随机种子（默认0，保证结果可复现）
+#
+# 磁带按请求（方法、URL、查询参数、JSON请求体）的哈希分文件保存，请求头不参与匹配也不会写入磁带，
+# 因此 MAL Client ID、Twitter auth_token 等凭据不会落盘。
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.core.global_variables import CACHE_DIR
+
+MODE_OFF = 'off'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+HTTP_MODES = (MODE_OFF, MODE_RECORD, MODE_REPLAY)
+
+CASSETTE_FORMAT_VERSION = 1
+
+# 不写入磁带的响应头
+EXCLUDED_RESPONSE_HEADERS = {'set-cookie', 'content-encoding', 'transfer-encoding', 'content-length'}
+
+
+class ReplayMissError(requests.exceptions.RequestException):
+    """回放模式下找不到对应的录制结果"""
+
+
+class ReplayConfig:
+    """录制/回放配置（从环境变量读取一次）"""
+
+    def __init__(self):
+        mode = os.environ.get('MZZB_HTTP_MODE', MODE_OFF).strip().lower()
+        if mode not in HTTP_MODES:
+            logging.warning(f"未知的 MZZB_HTTP_MODE={mode!r}，按 off 处理")
+            mode = MODE_OFF
+        self.mode = mode
+        self.cassette_dir = os.environ.get('MZZB_CASSETTE_DIR') or os.path.join(CACHE_DIR, 'cassettes')
+        self.latency = self._parse_latency(os.environ.get('MZZB_REPLAY_LATENCY_MS', '0'))
+        self.error_rate = self._parse_rate(os.environ.get('MZZB_REPLAY_ERROR_RATE', '0'))
+        self._random = random.Random(os.environ.get('MZZB_REPLAY_SEED', '0'))
+        self._random_lock = threading.Lock()
+
+    @staticmethod
+    def _parse_latency(raw: str):
+        """解析延迟配置，返回 'recorded' 或 (最小毫秒, 最大毫秒)"""
+        raw = (raw or '0').strip().lower()
+        if raw == 'recorded':
+            return raw
+        try:
+            if '-' in raw:
+                low, high = (float(part) for part in raw.split('-', 1))
+            else:
+                low = high = float(raw)
+            return (max(0.0, min(low, high)), max(0.0, low, high))
+        except ValueError:
+            logging.warning(f"无效的 MZZB_REPLAY_LATENCY_MS={raw!r}，不注入延迟")
+            return (0.0, 0.0)
+
+    @staticmethod
+    def _parse_rate(raw: str) -> float:
+        try:
+            return min(1.0, max(0.0, float(raw)))
+        except ValueError:
+            logging.warning(f"无效的 MZZB_REPLAY_ERROR_RATE={raw!r}，不注入错误")
+            return 0.0
+
+    def latency_seconds(self, recorded_ms: Optional[float]) -> float:
+        """本次回放应等待的秒数"""
+        if self.latency == 'recorded':
+            return (recorded_ms or 0.0) / 1000
+        low, high = self.latency
+        if high <= 0:
+            return 0.0
+        with self._random_lock:
+            return self._random.uniform(low, high) / 1000
+
+    def should_inject_error(self) -> bool:
+        """本次回放是否注入错误"""
+        if self.error_rate <= 0:
+            return False
+        with self._random_lock:
+            return self._random.random() < self.error_rate
+
+
+_config: Optional[ReplayConfig] = None
+_config_lock = threading.Lock()
+
+# 回放统计
+_stats = {'recorded': 0, 'replayed': 0, 'missed': 0, 'injected_errors': 0}
+_stats_lock = threading.Lock()
+
+
+def get_replay_config() -> ReplayConfig:
+    """获取录制/回放配置（单例）"""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = ReplayConfig()
+                if _config.mode != MODE_OFF:
+                    logging.info(f"HTTP {_config.mode} 模式，磁带目录: {_config.cassette_dir}")
+    return _config
+
+
+def reset_replay_config() -> None:
+    """重新读取环境变量（基准测试切换模式时使用）"""
+    global _config
+    with _config_lock:
+        _config = None
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def get_http_mode() -> str:
+    """当前HTTP模式：off / record / replay"""
+    return get_replay_config().mode
+
+
+def is_replay_mode() -> bool:
+    return get_http_mode() == MODE_REPLAY
+
+
+def get_replay_stats() -> Dict[str, int]:
+    """录制/回放计数"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _request_key(method: str, url: str, params: Any = None, json_body: Any = None) -> str:
+    """请求指纹：方法 + URL + 查询参数 + JSON请求体"""
+    if isinstance(params, dict):
+        params = sorted((str(k), str(v)) for k, v in params.items())
+    payload = json.dumps([method.upper(), url, params, json_body], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def _cassette_path(namespace: str, key: str, prefix: str) -> str:
+    safe_namespace = ''.join(c if c.isalnum() or c in '.-_' else '_' for c in namespace) or 'default'
+    return os.path.join(get_replay_config().cassette_dir, safe_namespace, f"{prefix}-{key}.json")
+
+
+def _write_cassette(path: str, payload: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1, default=str)
+    os.replace(tmp_path, path)
+
+
+def _read_cassette(path: str) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        return payload if payload.get('version') == CASSETTE_FORMAT_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def _serialize_response(response: requests.Response, elapsed_ms: float) -> dict:
+    """把响应转换为可写入磁带的字典"""
+    content = response.content or b''
+    try:
+        body = {'text': content.decode('utf-8')}
+    except UnicodeDecodeError:
+        body = {'base64': base64.b64encode(content).decode('ascii')}
+    return {
+        'status': response.status_code,
+        'reason': response.reason,
+        'url': response.url,
+        'encoding': response.encoding,
+        'headers': {k: v for k, v in response.headers.items() if k.lower() not in EXCLUDED_RESPONSE_HEADERS},
+        'elapsed_ms': round(elapsed_ms, 1),
+        **body,
+    }
+
+
+def build_response(status: int, url: str, content: bytes = b'', headers: Optional[dict] = None,
+                   encoding: Optional[str] = 'utf-8', reason: str = '') -> requests.Response:
+    """构造一个 requests.Response 对象（回放和错误注入共用）"""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.url = url
+    response._content = content
+    response.encoding = encoding
+    response.headers = CaseInsensitiveDict(headers or {})
+    return response
+
+
+def _deserialize_response(payload: dict) -> requests.Response:
+    if 'base64' in payload:
+        content = base64.b64decode(payload['base64'])
+    else:
+        content = payload.get('text', '').encode('utf-8')
+    return build_response(payload['status'], payload.get('url', ''), content,
+                          headers=payload.get('headers'), encoding=payload.get('encoding'),
+                          reason=payload.get('reason', ''))
+
+
+def send_request(method: str, url: str, *, params=None, json=None, headers=None, timeout=None,
+                 proxies=None, allow_redirects=True, session: Optional[requests.Session] = None) -> requests.Response:
+    """
+    发送HTTP请求（受录制/回放模式控制）
+    Args:
+        method: 请求方法
+        url: 请求URL
+        params: 查询参数
+        json: JSON请求体
+        headers: 请求头
+        timeout: 超时时间
+        proxies: 代理配置
+        allow_redirects: 是否跟随重定向
+        session: 可选的 requests.Session
+    Returns:
+        requests.Response: 响应对象
+    Raises:
+        ReplayMissError: 回放模式下没有对应的录制结果
+        requests.exceptions.RequestException: 联网请求失败
+    """
+    config = get_replay_config()
+    method = method.upper()
+
+    if config.mode == MODE_OFF:
+        sender = session or requests
+        return sender.request(method, url, params=params, json=json, headers=headers, timeout=timeout,
+                              proxies=proxies, allow_redirects=allow_redirects)
+
+    key = _request_key(method, url, params, json)
+    path = _cassette_path(urlparse(url).netloc, key, method.lower())
+
+    if config.mode == MODE_REPLAY:
+        payload = _read_cassette(path)
+        if payload is None:
+            _count('missed')
+            raise ReplayMissError(f"没有录制的响应: {method} {url}")
+
+        delay = config.latency_seconds(payload['response'].get('elapsed_ms'))
+        if delay > 0:
+            time.sleep(delay)
+        if config.should_inject_error():
+            _count('injected_errors')
+            return build_response(503, url, b'injected error', reason='Service Unavailable')
+
+        _count('replayed')
+        return _deserialize_response(payload['response'])
+
+    # 录制模式：真实请求，成功（非429/5xx）的响应写入磁带；304 没有响应体，回放时无法还原，不写入
+    sender = session or requests
+    start = time.perf_counter()
+    response = sender.request(method, url, params=params, json=json, headers=headers, timeout=timeout,
+                              proxies=proxies, allow_redirects=allow_redirects)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if response.status_code < 500 and response.status_code not in (304, 429):
+        try:
+            _write_cassette(path, {
+                'version': CASSETTE_FORMAT_VERSION,
+                'request': {'method': method, 'url': url, 'params': params, 'json': json},
+                'response': _serialize_response(response, elapsed_ms),
+            })
+            _count('recorded')
+        except OSError as e:
+            logging.warning(f"写入HTTP磁带失败: {e}")
+    return response
+
+
+def recorded_call(namespace: str, name: str, func: Callable[[], Any]) -> Any:
+    """
+    录制/回放非HTTP接口的调用结果（如 Scweet 的 get_user_info），结果需可JSON序列化
+    Args:
+        namespace: 磁带子目录
+        name: 调用标识（相同标识的调用视为同一请求）
+        func: 实际执行调用的函数
+    Returns:
+        Any: 调用结果
+    Raises:
+        ReplayMissError: 回放模式下没有对应的录制结果
+    """
+    config = get_replay_config()
+    if config.mode == MODE_OFF:
+        return func()
+
+    key = hashlib.sha256(name.encode('utf-8')).hexdigest()[:32]
+    path = _cassette_path(namespace, key, 'call')
+
+    if config.mode == MODE_REPLAY:
+        payload = _read_cassette(path)
+        if payload is None:
+            _count('missed')
+            raise ReplayMissError(f"没有录制的调用结果: {namespace}/{name}")
+        delay = config.latency_seconds(payload.get('elapsed_ms'))
+        if delay > 0:
+            time.sleep(delay)
+        _count('replayed')
+        return payload.get('result')
+
+    start = time.perf_counter()
+    result = func()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    try:
+        _write_cassette(path, {'version': CASSETTE_FORMAT_VERSION, 'name': name,
+                               'elapsed_ms': round(elapsed_ms, 1), 'result': result})
+        _count('recorded')
+    except (OSError, TypeError) as e:
+        logging.warning(f"写入调用磁带失败: {e}")
+    return result
+
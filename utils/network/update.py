@@ -1,9 +1,20 @@
 # utils/update.py
+import os
 import sys
+import json
 import hashlib
-import requests
+import threading
 import logging
+from typing import Optional
 from .proxy_config import get_global_proxy
+from .replay import send_request
+from utils.core.global_variables import get_cache_path
+
+# exe哈希缓存文件：以文件路径、修改时间和大小为键，避免每次启动都重新计算整个exe的sha256
+SHA256_CACHE_FILE = 'exe_sha256.json'
+
+_update_thread: Optional[threading.Thread] = None
+
 
 def get_file_sha256(file_path) -> str:
     sha256 = hashlib.sha256()
@@ -12,19 +23,54 @@ def get_file_sha256(file_path) -> str:
             sha256.update(chunk)
     return sha256.hexdigest()
 
+
+def get_cached_file_sha256(file_path) -> str:
+    """
+    获取文件sha256，文件的修改时间和大小未变化时直接使用缓存结果
+    Args:
+        file_path: 文件路径
+    Returns:
+        str: sha256十六进制字符串
+    """
+    stat = os.stat(file_path)
+    cache_key = {
+        'path': os.path.abspath(file_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+    }
+
+    cache_path = get_cache_path(SHA256_CACHE_FILE)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if all(cached.get(key) == value for key, value in cache_key.items()) and cached.get('sha256'):
+            logging.debug("使用缓存的exe sha256")
+            return cached['sha256']
+    except (OSError, ValueError):
+        pass
+
+    sha256 = get_file_sha256(file_path)
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({**cache_key, 'sha256': sha256}, f)
+    except OSError as e:
+        logging.debug(f"写入exe sha256缓存失败: {e}")
+    return sha256
+
+
 def check_update() -> None:
     """
     检查exe是否为最新版本，开发环境跳过
     """
-    proxy = get_global_proxy()
-    proxies = proxy if proxy else None
     if getattr(sys, "frozen", False):
         exe_path = sys.executable
         try:
             logging.info("🔍 开始检查程序版本...")
-            local_sha256 = get_file_sha256(exe_path)
+            local_sha256 = get_cached_file_sha256(exe_path)
+            proxy = get_global_proxy()
+            proxies = proxy if proxy else None
             api_url = 'https://api.github.com/repos/kisekinoumi/mzzbscore/releases/latest'
-            resp = requests.get(api_url, timeout=10, proxies=proxies)
+            resp = send_request('GET', api_url, timeout=10, proxies=proxies)
             if resp.status_code == 200:
                 data = resp.json()
                 remote_sha256 = None
@@ -49,3 +95,17 @@ def check_update() -> None:
             logging.warning(f"❌ 检查更新时发生错误: {e}\n无法访问GitHub以检查更新")
     else:
         logging.info("当前运行在开发环境（python），跳过更新检查")
+
+
+def check_update_in_background() -> threading.Thread:
+    """
+    在后台线程中检查更新，不阻塞表格处理
+    Returns:
+        threading.Thread: 执行更新检查的线程
+    """
+    global _update_thread
+
+    if _update_thread is None:
+        _update_thread = threading.Thread(target=check_update, name="update-check", daemon=True)
+        _update_thread.start()
+    return _update_thread
@@ -4,12 +4,15 @@
 import logging
 
 
+# 超过单行截止时间、未能完成的平台写入表格的错误码
+ROW_TIMEOUT_CODE = 'TIMEOUT'
+
 # 定义不可用值的常量
 UNAVAILABLE_VALUES = [
     'No score available', 'No results found', '', None,
     'No href found', 'No Filmarks score found', 'No Filmarks results',
     'N/A', 'No score found', 'No AniList results',
-    'Error with AniList API', 'No response results'
+    'Error with AniList API', 'No response results', ROW_TIMEOUT_CODE
 ]
 
 # 无效名称常量